@@ -0,0 +1,191 @@
+"""
+answer_record 索引基准
+
+在独立的基准表中生成大量合成答题记录，分别在无二级索引和建立
+models.answer_record 中声明的索引之后，测量数据面板、题目概况等热点查询的延迟。
+
+用法（在 app 目录下执行）：
+    python -m benchmarks.bench_answer_record_indexes [--url sqlite:///bench_answer_record.db]
+        [--rows 3000000] [--students 2000] [--problems 300] [--queries 50] [--keep]
+
+默认使用本地 SQLite 文件；也可通过 --url 或 BENCH_DATABASE_URL 指向 MySQL/PostgreSQL 测试库。
+基准表名为 bench_answer_record，不会触碰业务表。
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    create_engine, MetaData, Table, Column, Integer, SmallInteger, String, Text, DateTime, Index,
+    select, func, distinct, case, text
+)
+
+DEFAULT_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench_answer_record.db")
+BENCH_TABLE = "bench_answer_record"
+INSERT_BATCH_SIZE = 10000
+
+# 合成答案内容及对应的方法签名，模拟少量不同解法反复出现
+SAMPLE_ANSWERS = [
+    ("SELECT * FROM employees WHERE salary > 10000;", "a1"),
+    ("SELECT e.first_name FROM employees e JOIN departments d ON e.department_id = d.department_id;", "b2"),
+    ("SELECT department_id, COUNT(*) FROM employees GROUP BY department_id HAVING COUNT(*) > 5;", "c3"),
+    ("SELECT * FROM employees WHERE department_id IN (SELECT department_id FROM departments);", "d4"),
+]
+
+
+def build_table(metadata: MetaData) -> Table:
+    """按 answer_record 的结构建立基准表（不含外键），二级索引与模型声明保持一致"""
+    table = Table(
+        BENCH_TABLE,
+        metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("student_id", Integer, nullable=False),
+        Column("problem_id", Integer, nullable=False),
+        Column("result_type", SmallInteger, nullable=False),
+        Column("answer_content", Text, nullable=False),
+        Column("timestep", DateTime, nullable=False),
+        Column("method_signature", String(32), nullable=True)
+    )
+    return table
+
+
+def model_indexes(table: Table):
+    """把 AnswerRecord 上声明的索引复制到基准表"""
+    from models.answer_record import AnswerRecord
+
+    indexes = []
+    for index in AnswerRecord.__table__.indexes:
+        indexes.append(Index(
+            index.name.replace("answer_record", BENCH_TABLE),
+            *[table.c[column.name] for column in index.columns]
+        ))
+    return indexes
+
+
+def load_rows(engine, table: Table, rows: int, students: int, problems: int) -> None:
+    """批量生成合成答题记录"""
+    rng = random.Random(42)
+    start_time = datetime(2025, 2, 17, 8, 0, 0)
+    inserted = 0
+    with engine.begin() as connection:
+        while inserted < rows:
+            batch = []
+            for _ in range(min(INSERT_BATCH_SIZE, rows - inserted)):
+                answer, signature = rng.choice(SAMPLE_ANSWERS)
+                result_type = rng.choices((0, 1, 2), weights=(4, 3, 3))[0]
+                batch.append({
+                    "student_id": rng.randint(1, students),
+                    "problem_id": rng.randint(1, problems),
+                    "result_type": result_type,
+                    "answer_content": answer,
+                    "timestep": start_time + timedelta(seconds=inserted),
+                    "method_signature": signature
+                })
+                inserted += 1
+            connection.execute(table.insert(), batch)
+            print(f"\r已写入 {inserted:,}/{rows:,} 条", end="", flush=True)
+    print()
+
+
+def hot_queries(table: Table, students: int, problems: int):
+    """热点查询：名称 -> 根据随机数生成语句的函数"""
+    c = table.c
+    return {
+        # 数据面板：学生在某题上的各类提交次数
+        "dashboard": lambda rng: select(
+            func.count(),
+            func.count(case((c.result_type == 0, 1))),
+            func.count(case((c.result_type == 1, 1))),
+            func.count(case((c.result_type == 2, 1)))
+        ).where(c.student_id == rng.randint(1, students), c.problem_id == rng.randint(1, problems)),
+        # 数据面板：学生在某题上的不同正确方法
+        "dashboard_methods": lambda rng: select(
+            c.method_signature, func.count()
+        ).where(
+            c.student_id == rng.randint(1, students), c.problem_id == rng.randint(1, problems), c.result_type == 0
+        ).group_by(c.method_signature),
+        # 答题记录：学生某题的提交按时间倒序
+        "student_records": lambda rng: select(c.id, c.result_type, c.timestep).where(
+            c.student_id == rng.randint(1, students), c.problem_id == rng.randint(1, problems)
+        ).order_by(c.timestep.desc()),
+        # 题目概况：完成人数
+        "problem_summary": lambda rng: select(func.count(distinct(c.student_id))).where(
+            c.problem_id == rng.randint(1, problems), c.result_type == 0
+        ),
+        # 最近提交：按时间分页
+        "recent_records": lambda rng: select(c.id, c.student_id, c.timestep).where(
+            c.timestep < datetime(2025, 2, 17, 8, 0, 0) + timedelta(seconds=rng.randint(0, 10 ** 6))
+        ).order_by(c.timestep.desc(), c.id.desc()).limit(50),
+    }
+
+
+def measure(engine, queries, count: int):
+    """每个查询执行 count 次，返回 名称 -> (中位数, p95) 毫秒"""
+    results = {}
+    with engine.connect() as connection:
+        for name, build in queries.items():
+            rng = random.Random(7)
+            timings = []
+            for _ in range(count):
+                statement = build(rng)
+                begin = time.perf_counter()
+                connection.execute(statement).fetchall()
+                timings.append((time.perf_counter() - begin) * 1000)
+            timings.sort()
+            results[name] = (statistics.median(timings), timings[int(len(timings) * 0.95) - 1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="answer_record 索引基准")
+    parser.add_argument("--url", default=DEFAULT_URL, help="基准数据库连接串")
+    parser.add_argument("--rows", type=int, default=3000000, help="合成答题记录条数")
+    parser.add_argument("--students", type=int, default=2000, help="学生数")
+    parser.add_argument("--problems", type=int, default=300, help="题目数")
+    parser.add_argument("--queries", type=int, default=50, help="每个查询的执行次数")
+    parser.add_argument("--keep", action="store_true", help="结束后保留基准表")
+    args = parser.parse_args()
+
+    # models.base 导入时需要业务库连接串；基准只用其中的模型元数据
+    os.environ.setdefault("SQLALCHEMY_DATABASE_URL", args.url)
+
+    engine = create_engine(args.url)
+    metadata = MetaData()
+    table = build_table(metadata)
+    indexes = model_indexes(table)
+
+    metadata.drop_all(bind=engine)
+    metadata.create_all(bind=engine)
+    try:
+        load_rows(engine, table, args.rows, args.students, args.problems)
+        queries = hot_queries(table, args.students, args.problems)
+
+        before = measure(engine, queries, args.queries)
+
+        begin = time.perf_counter()
+        for index in indexes:
+            index.create(bind=engine)
+        with engine.begin() as connection:
+            if engine.dialect.name in ("sqlite", "postgresql"):
+                connection.execute(text(f"ANALYZE {BENCH_TABLE}"))
+            elif engine.dialect.name == "mysql":
+                connection.execute(text(f"ANALYZE TABLE {BENCH_TABLE}"))
+        print(f"建立 {len(indexes)} 个索引耗时 {time.perf_counter() - begin:.1f} 秒")
+
+        after = measure(engine, queries, args.queries)
+
+        print(f"{'查询':<20}{'无索引 中位/p95 (ms)':>24}{'有索引 中位/p95 (ms)':>24}{'加速比':>10}")
+        for name in queries:
+            (before_median, before_p95), (after_median, after_p95) = before[name], after[name]
+            speedup = before_median / after_median if after_median else float("inf")
+            print(f"{name:<20}{before_median:>12.2f}/{before_p95:<11.2f}{after_median:>12.2f}/{after_p95:<11.2f}{speedup:>9.1f}x")
+    finally:
+        if not args.keep:
+            metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+登录 bcrypt 验证基准
+
+模拟上课开始时的集中登录：同时发起一批登录（默认 300 个），每个登录做一次 bcrypt 验证，
+分别测量验证直接在事件循环中执行和通过 run_in_threadpool 在线程池中执行时的：
+    - 整批完成耗时与吞吐（次/秒）
+    - 单次登录的中位数 / p95 延迟
+    - 事件循环最长停顿（用一个每 10ms 唤醒一次的心跳任务测量，代表其他请求被阻塞的时间）
+
+用法（在 app 目录下执行）：
+    python -m benchmarks.bench_login_bcrypt [--logins 300] [--rounds 10 12] [--users 50]
+
+不连接数据库，只使用 JWTService 中的密码哈希配置；--rounds 可以列出多个成本因子对比。
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import statistics
+import time
+
+HEARTBEAT_INTERVAL = 0.01
+
+
+def load_jwt_service(rounds: int):
+    """按指定成本因子重新加载 jwt_service 模块"""
+    os.environ["BCRYPT_ROUNDS"] = str(rounds)
+    import services.jwt_service as module
+    return importlib.reload(module).jwt_service
+
+
+async def heartbeat(stop: asyncio.Event, stalls: list) -> None:
+    """记录事件循环每次唤醒比预期晚了多久"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        stalls.append(max(0.0, loop.time() - expected))
+
+
+async def run_burst(service, credentials, offload: bool):
+    """同时发起所有登录，返回 (整批耗时秒, 每次登录耗时毫秒列表, 最长停顿毫秒)"""
+    from starlette.concurrency import run_in_threadpool
+
+    async def login(password: str, hashed: str) -> float:
+        begin = time.perf_counter()
+        if offload:
+            valid = await run_in_threadpool(service.verify_password, password, hashed)
+        else:
+            valid = service.verify_password(password, hashed)
+        assert valid
+        return (time.perf_counter() - begin) * 1000
+
+    stop = asyncio.Event()
+    stalls = []
+    monitor = asyncio.create_task(heartbeat(stop, stalls))
+    await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    begin = time.perf_counter()
+    latencies = await asyncio.gather(*(login(password, hashed) for password, hashed in credentials))
+    elapsed = time.perf_counter() - begin
+
+    stop.set()
+    await monitor
+    return elapsed, sorted(latencies), max(stalls, default=0.0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="登录 bcrypt 验证基准")
+    parser.add_argument("--logins", type=int, default=300, help="一批同时登录的次数")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[12], help="bcrypt 成本因子，可列出多个")
+    parser.add_argument("--users", type=int, default=50, help="不同账号数（预先计算哈希）")
+    args = parser.parse_args()
+
+    print(f"{'成本':<6}{'模式':<10}{'整批(s)':>10}{'吞吐(次/s)':>12}{'中位(ms)':>12}{'p95(ms)':>12}{'最长停顿(ms)':>14}")
+    for rounds in args.rounds:
+        service = load_jwt_service(rounds)
+        users = [(f"password-{index}", service.hash_password(f"password-{index}")) for index in range(args.users)]
+        credentials = [users[index % len(users)] for index in range(args.logins)]
+
+        for mode, offload in (("事件循环", False), ("线程池", True)):
+            elapsed, latencies, stall = asyncio.run(run_burst(service, credentials, offload))
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            print(f"{rounds:<6}{mode:<10}{elapsed:>10.2f}{len(latencies) / elapsed:>12.1f}"
+                  f"{statistics.median(latencies):>12.1f}{p95:>12.1f}{stall:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+SQL关键词提取微基准
+
+对比逐关键词 finditer 的旧实现与预编译单一正则的新实现在典型学生提交上的吞吐量，
+并校验两者输出一致。
+
+用法（在 app 目录下执行）：
+    python -m benchmarks.bench_sql_keywords [--repeat 5] [--number 2000]
+"""
+import argparse
+import re
+import timeit
+
+from services.sql_method_service import SQLMethodService
+
+# 典型的学生提交：简单查询、连接、分组、子查询、CASE、集合运算、CTE
+SAMPLE_SUBMISSIONS = [
+    "SELECT * FROM employees WHERE salary > 10000;",
+    "select first_name, last_name from employees e inner join departments d on e.department_id = d.department_id where d.location_id = 1700 order by last_name",
+    "SELECT department_id, COUNT(*) AS cnt, AVG(salary) AS avg_salary\nFROM employees\nGROUP BY department_id\nHAVING COUNT(*) > 5\nORDER BY avg_salary DESC\nLIMIT 10;",
+    "select e.employee_id, e.first_name || ' ' || e.last_name as name, case when e.salary > 15000 then 'high' when e.salary > 8000 then 'mid' else 'low' end as level from employees e left join jobs j on e.job_id = j.job_id",
+    "SELECT DISTINCT d.department_name FROM departments d WHERE EXISTS (SELECT 1 FROM employees e WHERE e.department_id = d.department_id AND e.salary > (SELECT AVG(salary) FROM employees))",
+    "with dept_avg as (select department_id, avg(salary) as avg_sal from employees group by department_id) select e.* from employees e join dept_avg a on e.department_id = a.department_id where e.salary > a.avg_sal",
+    "SELECT city FROM locations UNION ALL SELECT city FROM warehouses EXCEPT SELECT city FROM closed_sites INTERSECT SELECT city FROM active_sites",
+    "select  *\n\tfrom   countries   natural join regions   cross join   jobs  offset 5 fetch first 10 rows only",
+]
+
+
+def legacy_extract_sql_keywords(sql: str):
+    """旧实现：每次调用重新排序关键词，每个关键词一次 finditer，并线性检查已占用区间"""
+    sql_lower = re.sub(r'\s+', ' ', sql.lower().strip())
+    found_keywords = []
+    sorted_keywords = sorted(SQLMethodService.SQL_KEYWORDS, key=len, reverse=True)
+    for keyword in sorted_keywords:
+        pattern = r'\b' + re.escape(keyword) + r'\b'
+        for match in re.finditer(pattern, sql_lower):
+            start_pos = match.start()
+            if not any(existing_start <= start_pos < existing_end for existing_start, existing_end, _ in found_keywords):
+                found_keywords.append((start_pos, match.end(), keyword))
+    found_keywords.sort(key=lambda x: x[0])
+    return [keyword for _, _, keyword in found_keywords]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL关键词提取微基准")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数，取最快一轮")
+    parser.add_argument("--number", type=int, default=2000, help="每轮处理整组样本的次数")
+    args = parser.parse_args()
+
+    service = SQLMethodService()
+
+    # 先校验新旧实现输出一致
+    for sql in SAMPLE_SUBMISSIONS:
+        assert service.extract_sql_keywords(sql) == legacy_extract_sql_keywords(sql), sql
+
+    def run_legacy():
+        for sql in SAMPLE_SUBMISSIONS:
+            legacy_extract_sql_keywords(sql)
+
+    def run_compiled():
+        for sql in SAMPLE_SUBMISSIONS:
+            service.extract_sql_keywords(sql)
+
+    total_calls = args.number * len(SAMPLE_SUBMISSIONS)
+    results = {}
+    for name, func in (("legacy", run_legacy), ("compiled", run_compiled)):
+        best = min(timeit.repeat(func, repeat=args.repeat, number=args.number))
+        results[name] = total_calls / best
+        print(f"{name:>8}: {results[name]:>12,.0f} 条/秒  ({best * 1e6 / total_calls:.2f} µs/条)")
+
+    print(f"加速比: {results['compiled'] / results['legacy']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
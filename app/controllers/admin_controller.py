@@ -628,3 +628,23 @@ async def update_database_schema(
 
 # 删除数据库模式接口已移动到 teacher_controller.py
 # 新路径: DELETE /teacher/schemas/{schema_id}
+
+@admin_router.get("/cache/stats", response_model=BaseResponse, summary="获取缓存命中统计")
+async def get_cache_stats(
+    current_user: dict = Depends(get_current_admin)
+):
+    """
+    获取进程内缓存的命中统计（当前工作进程）
+
+    需要管理员身份的JWT认证令牌
+
+    返回：
+    - token_cache: 已验证令牌缓存的条目数、容量、命中次数、未命中次数、命中率
+    """
+    from services.jwt_service import jwt_service
+
+    return BaseResponse(
+        code=200,
+        message="获取成功",
+        data={"token_cache": jwt_service.token_cache.stats()}
+    )
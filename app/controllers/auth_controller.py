@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from models.base import get_db
 from schemas.auth import LoginRequest, LoginResponse, LoginData, UpdatePasswordRequest
 from schemas.response import BaseResponse
@@ -22,7 +23,8 @@ async def login(
     """
     try:
         # 用户认证
-        user_info, access_token = auth_service.authenticate_user(login_data, db)
+        # bcrypt 验证在线程池中执行，避免阻塞事件循环
+        user_info, access_token = await run_in_threadpool(auth_service.authenticate_user, login_data, db)
         
         # 构造响应数据
         response_data = LoginData(
@@ -94,7 +96,8 @@ async def update_password(
             )
         
         # 调用服务层修改密码
-        success = auth_service.update_password(
+        success = await run_in_threadpool(
+            auth_service.update_password,
             user_id=current_user["id"],
             role=current_user["role"],
             old_password=password_data.old_password,
@@ -5,7 +5,7 @@ from models.base import get_db
 from schemas.public import (
     CurrentSemesterResponse, SemesterListResponse, SystemInfoResponse,
     DatabaseSchemaPublicListResponse, ProblemPublicListResponse, DatabaseSchemaListResponse,
-    DatabaseSchemaWithStatusListResponse
+    DatabaseSchemaWithStatusListResponse, SchemaStructureResponse, SchemaStructureData
 )
 from services.public_service import public_service
 from services.auth_dependency import get_current_user
@@ -152,6 +152,46 @@ async def get_all_database_schemas(
             detail=f"获取数据库模式列表失败: {str(e)}"
         )
 
+@public_router.get("/schema/{schema_id}/structure", response_model=SchemaStructureResponse, summary="获取数据库模式表结构")
+async def get_schema_structure(
+    schema_id: int,
+    engine_type: Optional[str] = Query(None, description="读取结构的数据库引擎：mysql、postgresql、opengauss，默认 postgresql"),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    获取数据库模式中各表的列、主键、唯一约束和外键（模式浏览）
+
+    结构从数据库目录读取后按模式版本缓存，模式重建前重复请求不再查询目录
+
+    需要登录认证（所有角色可访问）
+
+    返回：
+    - version: 模式版本号
+    - tables: 表结构列表
+    """
+    try:
+        structure = public_service.get_schema_structure(schema_id, db=db, engine_type=engine_type)
+        if structure is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="数据库模式不存在"
+            )
+        return SchemaStructureResponse(code=200, msg="获取成功", data=SchemaStructureData(**structure))
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取数据库模式结构失败: {str(e)}"
+        )
+
 @public_router.get("/problem/list", response_model=ProblemPublicListResponse, summary="获取所有题目列表")
 async def get_problem_list(
     db: Session = Depends(get_db)
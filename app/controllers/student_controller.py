@@ -9,11 +9,12 @@ from schemas.student import (
     StudentProfileResponse, StudentRankItem, AnswerSubmitRequest,
     AnswerSubmitResponse, AnswerRecordsResponse, ProblemListResponse,
     DatabaseSchemaListResponse, DatabaseSchemaItem, AIAnalyzeRequest, AIAnalyzeResponse,
-    StudentAnswerRecordsResponse
+    StudentAnswerRecordsResponse, LeaderboardResponse
 )
 from schemas.response import BaseResponse
 from services.student_service import student_service
-from services.auth_dependency import get_current_student, get_current_user
+from services.auth_dependency import get_current_student, get_current_user, get_current_student_identity
+from services.identity_service import identity_service, Identity
 
 student_router = APIRouter(prefix="/student", tags=["学生"])
 
@@ -93,6 +94,58 @@ async def get_student_rank(
             detail=f"获取排行榜失败: {str(e)}"
         ) 
 
+@student_router.get("/leaderboard", response_model=LeaderboardResponse, summary="获取课程/班级排行榜")
+async def get_leaderboard(
+    course_id: Optional[int] = Query(None, description="课程ID（可选，按课程范围排名）"),
+    class_name: Optional[str] = Query(None, description="班级（可选，按班级范围排名）"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的next_cursor）"),
+    limit: int = Query(20, ge=1, le=100, description="每页数量"),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    获取当前学期的排行榜，可按课程或班级限定范围
+
+    需要登录认证（所有角色都可访问）
+
+    查询参数：
+    - course_id: 课程ID（可选）
+    - class_name: 班级（可选，与course_id同时传入时取交集）
+    - cursor: 分页游标（可选）
+    - limit: 每页数量（默认20，最大100）
+
+    返回：
+    - scope: 排名范围（semester/course/class）
+    - items: 当前页的排名条目
+    - total: 范围内学生总数
+    - next_cursor: 下一页游标，为空表示没有更多数据
+    - my_rank: 当前学生在该范围内的名次（仅学生角色返回）
+
+    排序规则与 /student/rank 一致：按答对题目数降序，再按方法数降序
+    """
+    try:
+        student_id = current_user["id"] if current_user.get("role") == "student" else None
+
+        return student_service.get_leaderboard(
+            db=db,
+            course_id=course_id,
+            class_name=class_name,
+            cursor=cursor,
+            limit=limit,
+            student_id=student_id
+        )
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取排行榜失败: {str(e)}"
+        )
+
 @student_router.get("/dashboard", response_model=schemas.student.StudentDashboardResponse, summary="学生数据面板")
 async def get_student_dashboard(
     problem_id: int,
@@ -127,9 +180,13 @@ async def get_student_dashboard(
             # 教师或管理员需要指定学生ID（这里暂时使用当前用户ID，实际应该从请求参数获取）
             target_student_id = current_user["id"]
 
+        student = identity_service.resolve("student", target_student_id, db)
+        if not student:
+            return schemas.student.StudentDashboardResponse(problems=[])
+
         # 获取学生数据面板
         dashboard = student_service.get_student_dashboard(
-            student_id=target_student_id,
+            student=student,
             problem_id=problem_id,
             db=db
         )
@@ -145,7 +202,7 @@ async def get_student_dashboard(
 @student_router.post("/answer/submit", response_model=AnswerSubmitResponse, summary="提交答题结果")
 async def submit_answer(
     answer_data: AnswerSubmitRequest,
-    current_user: dict = Depends(get_current_student),
+    student: Identity = Depends(get_current_student_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -168,7 +225,7 @@ async def submit_answer(
     try:
         # 提交答案
         result_type, message, answer_id = student_service.submit_answer(
-            student_id=current_user["id"],
+            student=student,
             problem_id=answer_data.problem_id,
             answer_content=answer_data.answer_content,
             db=db,
@@ -198,7 +255,7 @@ async def submit_answer(
 @student_router.get("/answers", response_model=StudentAnswerRecordsResponse, summary="查询学生答题记录")
 async def get_student_answer_records(
     problem_id: int,
-    current_user: dict = Depends(get_current_student),
+    student: Identity = Depends(get_current_student_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -221,7 +278,7 @@ async def get_student_answer_records(
     try:
         # 获取学生答题记录
         records = student_service.get_student_answer_records(
-            student_id=current_user["id"],
+            student=student,
             problem_id=problem_id,
             db=db
         )
@@ -281,7 +338,7 @@ async def get_database_schemas_for_student(
 @student_router.post("/answer/ai-analyze", summary="AI分析SQL语句（流式输出）")
 async def ai_analyze_sql(
     request: AIAnalyzeRequest,
-    current_user: dict = Depends(get_current_student),
+    student: Identity = Depends(get_current_student_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -311,7 +368,7 @@ async def ai_analyze_sql(
             async for chunk in ai_service.analyze_sql_answer_stream(
                 problem_id=request.problem_id,
                 answer_content=request.answer_content,
-                student_id=current_user["id"],
+                student=student,
                 db=db
             ):
                 if chunk:
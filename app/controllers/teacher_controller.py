@@ -1,7 +1,7 @@
 import json
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -16,13 +16,16 @@ from schemas.teacher import (
     SchemaStatusUpdateRequest, SchemaStatusUpdateResponse,
     SQLQueryRequest, SQLQueryResponse, SemesterListResponse,
     StudentProblemStatsRequest, StudentProblemStatsResponse,
-    StudentAnswerRecordsRequest, StudentAnswerRecordsResponse,
+    StudentAnswerRecordsRequest, StudentAnswerRecordsResponse, StudentAnswerRecordsStreamRequest,
     StudentProfileResponse, ProblemStatisticsResponse, ProblemSummaryResponse, ProblemSummaryDocResponse, ProblemSummaryData,
+    ProblemSummaryBatchRequest, ProblemSummaryBatchResponse,
+    ActivityTimeseriesResponse, ActivityTimeseriesData,
     ProblemDetailResponse, ProblemEditRequest, ProblemEditResponse,
     TeacherStudentListResponse,
     StudentProblemStatisticsResponse, StudentInfoResponse, StudentProfileNewResponse,
     StudentProfileDocResponse, StudentDetailResponse,
     ProblemDeleteResponse, StudentCourseAddRequest, StudentCourseAddResponse,
+    RosterImportResponse, RosterImportData, ExportJobCreateRequest, ExportJobResponse, ExportJobData,
     SchemaCreateRequest, SchemaCreateResponse, SQLQueryRequest, SQLQueryResponse,
     ProblemCreateRequest, ProblemCreateResponse, StudentDetailInfo, StudentUpdateRequest, StudentUpdateResponse,
     DatabaseLinkInfoResponse, ProblemKnowledgeAnalysisRequest, ProblemKnowledgeAnalysisResponse
@@ -33,7 +36,13 @@ from services.teacher_service import teacher_service
 from services.user_management_service import user_management_service
 from services.student_service import student_service
 from services.admin_service import admin_service
-from services.auth_dependency import get_current_teacher, get_current_user, get_current_admin, get_current_teacher_or_admin
+from services.activity_service import activity_service
+from services.auth_dependency import (
+    get_current_teacher, get_current_user, get_current_admin, get_current_teacher_or_admin,
+    get_current_identity, get_current_teacher_identity
+)
+from services.identity_service import Identity
+from utils.stream_writers import iter_ndjson, iter_csv
 
 teacher_router = APIRouter(prefix="/teacher", tags=["教师"])
 
@@ -49,6 +58,7 @@ def get_teacher_or_admin(current_user: dict = Depends(get_current_user)) -> dict
 @teacher_router.get("/profile", response_model=TeacherProfileResponse, summary="获取教师个人信息")
 async def get_teacher_profile(
     current_user: dict = Depends(get_teacher_or_admin),
+    teacher: Optional[Identity] = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -62,9 +72,15 @@ async def get_teacher_profile(
     - 学期名称
     """
     try:
+        if not teacher:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="未找到教师信息或教师未分配课程"
+            )
+
         # 获取教师信息
         teacher_info = teacher_service.get_teacher_profile(
-            teacher_id=current_user["id"],
+            teacher=teacher,
             db=db
         )
         
@@ -93,6 +109,7 @@ async def get_teacher_profile(
 async def add_student_course(
     course_data: StudentCourseAddRequest,
     current_user: dict = Depends(get_current_teacher_or_admin),
+    teacher: Optional[Identity] = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -118,8 +135,14 @@ async def add_student_course(
     - msg: 消息
     """
     try:
+        if not teacher:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="教师不存在"
+            )
+
         success, message, response = teacher_service.add_student_course_batch(
-            teacher_id=current_user["id"],
+            teacher=teacher,
             course_data_list=course_data.root,
             db=db
         )
@@ -142,6 +165,79 @@ async def add_student_course(
 
 
 
+# 学生名单文件导入接口
+@teacher_router.post("/students/import", response_model=RosterImportResponse, summary="导入学生名单文件")
+async def import_student_roster(
+    file: UploadFile = File(..., description="名单文件（CSV、XLSX、XLS）"),
+    course_id: Optional[int] = Query(None, description="默认课程ID，文件中没有课程列时使用"),
+    current_user: dict = Depends(get_current_teacher_or_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    上传学生名单文件，批量创建学生并添加本学期选课
+
+    需要教师或管理员身份的JWT认证令牌
+
+    文件列（支持英文字段名或中文表头）：
+    - student_id / 学号（必需）
+    - student_name / 姓名
+    - class_ / 班级
+    - status / 状态（0为正常，1为重修，缺省为0）
+    - course_id / 课程ID（缺省时使用查询参数 course_id）
+
+    逻辑：
+    - 学生、课程、本学期已有选课各用一次批量查询预取
+    - 不存在的学生和新的选课记录用多行插入写入，默认密码为"default@password"
+    - 选课按块在保存点内插入；某块失败时逐行重试，已被并发导入的选课跳过并计入错误报告，其他错误照常报错
+
+    返回：
+    - code: 200全部成功，206部分成功，400全部失败
+    - data: 导入统计及逐行错误报告
+    """
+    content = await file.read()
+    if len(content) > 5 * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="名单文件不能超过5MB"
+        )
+
+    try:
+        from services.roster_service import roster_service
+        from services.public_service import public_service
+
+        current_semester = public_service.get_current_semester(db)
+        if not current_semester:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="无法获取当前学期信息"
+            )
+
+        rows = roster_service.read_file(file.filename, content, course_id=course_id)
+        report = roster_service.import_rows(rows, current_semester.semester_id, db)
+
+        fail_count = len(report["errors"])
+        if report["created_selections"] == 0 and fail_count > 0:
+            code, msg = 400, "导入失败"
+        elif fail_count > 0:
+            code, msg = 206, f"部分成功，成功 {report['created_selections']} 条，失败 {fail_count} 条"
+        else:
+            code, msg = 200, f"导入成功，共添加 {report['created_selections']} 条学生选课信息"
+
+        return RosterImportResponse(code=code, msg=msg, data=RosterImportData(**report))
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"导入学生名单失败: {str(e)}"
+        )
+
 # 学生管理接口
 @teacher_router.get("/students", response_model=TeacherStudentListResponse, summary="获取学生列表")
 async def get_students(
@@ -336,7 +432,7 @@ async def delete_student(
 @teacher_router.put("/score/calculate", response_model=ScoreUpdateResponse, summary="教师核算分数")
 async def calculate_scores(
     score_request: ScoreCalculateRequest,
-    current_user: dict = Depends(get_current_teacher),
+    teacher: Identity = Depends(get_current_teacher_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -346,13 +442,14 @@ async def calculate_scores(
 
     请求参数：
     - problem_ids: 题目ID列表，例如 [5, 6, 7, 8]
+    - points_per_problem: 每道题的分值（可选，默认10）
+    - max_score: 分数上限（可选，默认100）
 
     处理逻辑：
     1. 调用/public/currentSemester获取学期号
-    2. 根据学期号，获取所有课程号
-    3. 在选课表里找到所有学生
-    4. 根据答题记录表计算每个学生的分数，一道题10分
-    5. 把分数更新到CourseSelection表的score字段
+    2. 根据学期号，获取所有课程的选课记录
+    3. 一次聚合查询计算每个学生答对的题目数，分数 = min(题目数 × 每题分值, 分数上限)
+    4. 按课程批量把分数更新到CourseSelection表的score字段
 
     返回：
     - code: 状态码（200表示成功）
@@ -360,9 +457,11 @@ async def calculate_scores(
     """
     try:
         result = teacher_service.calculate_scores(
-            teacher_id=current_user["id"],
+            teacher=teacher,
             problem_ids=score_request.problem_ids,
-            db=db
+            db=db,
+            points_per_problem=score_request.points_per_problem,
+            max_score=score_request.max_score
         )
 
         return result
@@ -375,7 +474,7 @@ async def calculate_scores(
 
 @teacher_router.get("/score", response_model=ScoreListResponse, summary="获取学生分数")
 async def get_student_scores(
-    current_user: dict = Depends(get_current_teacher),
+    teacher: Identity = Depends(get_current_teacher_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -395,7 +494,7 @@ async def get_student_scores(
     """
     try:
         result = teacher_service.get_student_scores(
-            teacher_id=current_user["id"],
+            teacher=teacher,
             db=db
         )
 
@@ -605,6 +704,7 @@ async def get_teacher_problem_list(
 async def create_problem(
     problem_data: ProblemCreateRequest,
     current_user: dict = Depends(get_teacher_or_admin),
+    teacher: Optional[Identity] = Depends(get_current_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -619,14 +719,21 @@ async def create_problem(
     - problem_content: 题目内容（必填）
     - example_sql: 示例SQL（必填）
     - schema_id: 数据库模式ID（可选）
+    - check_sql: DML题目的验证查询（可选，填写后 example_sql 为标准 DML 语句，学生答案在沙箱中执行后用该查询比对数据）
 
     返回：
     - code: 状态码（200表示成功）
     - msg: 消息（"题目创建成功"）
     """
     try:
+        if not teacher:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="教师不存在"
+            )
+
         result = teacher_service.create_problem(
-            teacher_id=current_user["id"],
+            teacher=teacher,
             problem_data=problem_data,
             db=db
         )
@@ -680,9 +787,6 @@ async def get_student_problem_stats(
       - result_error_count: 结果错误次数
     """
     try:
-        from models import Student, Problem, AnswerRecord
-        from sqlalchemy import func
-
         # 验证输入参数
         if not stats_request.student_ids:
             raise HTTPException(
@@ -705,43 +809,12 @@ async def get_student_problem_stats(
                 detail="题目ID必须为数字"
             )
 
-        # 构建结果列表
-        result_data = []
-
-        # 遍历每个学生和每个题目的组合
-        for student_id in stats_request.student_ids:
-            # 获取学生内部ID
-            student = db.query(Student).filter(Student.student_id == student_id).first()
-            if not student:
-                continue
-                
-            for problem_id in problem_ids:
-                # 验证题目是否存在
-                problem_exists = db.query(Problem).filter(Problem.problem_id == problem_id).first()
-                if not problem_exists:
-                    continue
-                
-                # 查询该学生在该题目上的所有提交记录
-                submissions = db.query(AnswerRecord).filter(
-                    AnswerRecord.student_id == student.id,
-                    AnswerRecord.problem_id == problem_id
-                ).all()
-
-                # 统计各种类型的提交次数
-                submit_count = len(submissions)
-                correct_count = sum(1 for s in submissions if s.result_type == 0)
-                syntax_error_count = sum(1 for s in submissions if s.result_type == 1)
-                result_error_count = sum(1 for s in submissions if s.result_type == 2)
-
-                # 添加到结果中（即使没有提交记录也添加，显示为0）
-                result_data.append({
-                    "student_id": student.student_id,
-                    "problem_id": str(problem_id),
-                    "submit_count": submit_count,
-                    "correct_count": correct_count,
-                    "syntax_error_count": syntax_error_count,
-                    "result_error_count": result_error_count
-                })
+        # 由服务层通过一次分组查询统计所有 (学生, 题目) 组合
+        result_data = teacher_service.get_student_problem_stats(
+            student_ids=stats_request.student_ids,
+            problem_ids=problem_ids,
+            db=db
+        )
 
         return StudentProblemStatsResponse(data=result_data)
 
@@ -767,14 +840,17 @@ async def get_student_answer_records(
 
     请求参数（JSON格式）：
     - semester_ids: 学期ID列表（如：[1, 2]）
+    - cursor: 上一页返回的游标（可选）
+    - limit: 每页数量（可选，1-1000），不传时返回全部记录
 
     返回：
-    - data: 学生答题记录列表，包含：
+    - data: 学生答题记录列表（按提交时间倒序），包含：
       - student_id: 学生学号
       - problem_content: 题目内容
       - result_type: 结果类型（0:正确，1:语法错误，2:结果错误）
       - answer_content: 答案内容
       - timestep: 提交时间
+    - next_cursor: 下一页游标，为空表示没有更多数据
     """
     try:
         # 验证输入参数
@@ -785,21 +861,79 @@ async def get_student_answer_records(
             )
 
         # 调用服务层方法获取学生答题记录
-        result = teacher_service.get_student_answer_records(
+        result, next_cursor = teacher_service.get_student_answer_records(
             semester_ids=request.semester_ids,
-            db=db
+            db=db,
+            cursor=request.cursor,
+            limit=request.limit
         )
 
-        return StudentAnswerRecordsResponse(data=result)
+        return StudentAnswerRecordsResponse(data=result, next_cursor=next_cursor)
 
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"查询学生答题记录失败: {str(e)}"
         )
 
+# 学生答题记录流式导出接口
+@teacher_router.post("/student/answer-records/stream", summary="流式导出学生答题记录")
+async def stream_student_answer_records(
+    request: StudentAnswerRecordsStreamRequest,
+    current_user: dict = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """
+    以 NDJSON 或 CSV 流式导出学期范围内的学生答题记录
+
+    记录通过服务端游标分批读取并逐块写出，导出整个学期的数据时内存占用保持不变
+
+    需要教师身份的JWT认证令牌
+
+    请求参数（JSON格式）：
+    - semester_ids: 学期ID列表（如：[1, 2]）
+    - format: 导出格式（NDJSON、CSV），默认 NDJSON
+
+    返回：
+    - 文件流，每条记录包含 student_id、problem_content、result_type、answer_content、timestep
+    """
+    if not request.semester_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="学期ID列表不能为空"
+        )
+
+    export_format = request.format.upper()
+    records = teacher_service.iter_student_answer_records(semester_ids=request.semester_ids, db=db)
+
+    if export_format == "NDJSON":
+        content = iter_ndjson(records)
+        media_type = "application/x-ndjson"
+        extension = "ndjson"
+    elif export_format == "CSV":
+        content = iter_csv(records, fieldnames=["student_id", "problem_content", "result_type", "answer_content", "timestep"])
+        media_type = "text/csv; charset=utf-8"
+        extension = "csv"
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="不支持的导出格式，仅支持 NDJSON、CSV"
+        )
+
+    filename = f"answer-records-{datetime.now().strftime('%Y%m%d%H%M%S')}.{extension}"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 # 已删除: 获取学生信息接口 - 功能已整合到其他接口
 
 # 已删除: 获取学生详细信息接口 - 功能已整合到其他接口
@@ -888,35 +1022,16 @@ async def get_problem_summary(
       - total_submission_count: 此题目的总提交次数
     """
     try:
-        from models import Problem, AnswerRecord
-        from sqlalchemy import func, distinct
-
-        # 检查题目是否存在
-        problem = db.query(Problem).filter(Problem.problem_id == problem_id).first()
-        if not problem:
+        # 完成人数（至少有一次正确提交）和总提交次数均来自学生×题目统计汇总
+        summary = teacher_service.get_problem_summary(problem_id=problem_id, db=db)
+        if summary is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="题目不存在"
             )
 
-        # 统计完成该题目的学生人数（至少有一次正确提交）
-        # 使用result_type == 0 表示正确
-        completed_student_count = db.query(distinct(AnswerRecord.student_id)).filter(
-            AnswerRecord.problem_id == problem_id,
-            AnswerRecord.result_type == 0
-        ).count()
-
-        # 统计该题目的总提交次数
-        total_submission_count = db.query(AnswerRecord).filter(
-            AnswerRecord.problem_id == problem_id
-        ).count()
-
         # 构建响应数据
-        data = ProblemSummaryData(
-            problem_id=problem_id,
-            completed_student_count=completed_student_count,
-            total_submission_count=total_submission_count
-        )
+        data = ProblemSummaryData(**summary)
 
         return ProblemSummaryDocResponse(
             code=200,
@@ -932,22 +1047,195 @@ async def get_problem_summary(
             detail=f"获取题目完成情况统计失败: {str(e)}"
         )
 
+# 批量题目完成情况统计接口
+@teacher_router.post("/problem/summary/batch", response_model=ProblemSummaryBatchResponse, summary="批量获取题目完成情况统计")
+async def get_problem_summary_batch(
+    batch_request: ProblemSummaryBatchRequest,
+    current_user: dict = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """
+    批量返回题目的完成人数和总提交次数，题目概览页一次请求即可加载全部统计
+
+    权限要求：需登录，仅教师角色可访问
+    认证方式：必须附带JWT令牌
+
+    请求参数（二选一）：
+    - problem_ids: 题目ID列表，结果按传入顺序返回
+    - schema_id: 数据库模式ID，返回该模式下的所有题目
+
+    返回：
+    - code: 状态码（200表示成功）
+    - msg: 消息（"查询成功"）
+    - data: 题目统计数据列表（不存在的题目不返回）
+    """
+    try:
+        if (batch_request.problem_ids is None) == (batch_request.schema_id is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="problem_ids 和 schema_id 必须且只能提供一个"
+            )
+
+        if batch_request.problem_ids is not None and len(batch_request.problem_ids) > 500:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="题目ID数量不能超过500个"
+            )
+
+        summaries = teacher_service.get_problem_summaries(
+            db=db,
+            problem_ids=batch_request.problem_ids,
+            schema_id=batch_request.schema_id
+        )
+
+        return ProblemSummaryBatchResponse(
+            code=200,
+            msg="查询成功",
+            data=[ProblemSummaryData(**summary) for summary in summaries]
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量获取题目完成情况统计失败: {str(e)}"
+        )
+
+# 提交量时间序列接口
+@teacher_router.get("/activity/timeseries", response_model=ActivityTimeseriesResponse, summary="获取提交量时间序列")
+async def get_activity_timeseries(
+    course_id: Optional[int] = Query(None, description="课程ID"),
+    schema_id: Optional[int] = Query(None, description="数据库模式ID"),
+    problem_id: Optional[int] = Query(None, description="题目ID（可选，进一步限定到单个题目）"),
+    granularity: str = Query("minute", description="时间粒度：minute、hour"),
+    start: Optional[datetime] = Query(None, description="起始时间，默认结束时间之前60个时间桶"),
+    end: Optional[datetime] = Query(None, description="结束时间，默认当前时间"),
+    current_user: dict = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """
+    按分钟或小时返回课程或数据库模式的提交量与正确率序列，供实验课看板定时刷新
+
+    数据来自提交答案时同步维护的时间桶汇总，不扫描答题记录表。一次提交计入学生提交时
+    最近一个学期所选的每一门课程；之后的选课变动不会改变已有计数，需要按当前选课重新
+    归属时执行 python manage.py rebuild-activity
+
+    需要教师身份的JWT认证令牌
+
+    查询参数：
+    - course_id / schema_id: 课程ID或数据库模式ID，至少提供一个
+    - problem_id: 题目ID（可选）
+    - granularity: 时间粒度（minute 最多查询1天，hour 最多查询31天）
+    - start / end: 时间范围
+
+    返回：
+    - data.points: 每个时间桶的提交次数、正确次数、语法错误次数、结果错误次数和正确率
+    """
+    if course_id is None and schema_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="course_id 和 schema_id 至少提供一个"
+        )
+
+    try:
+        points = activity_service.get_timeseries(
+            db=db,
+            granularity=granularity,
+            start=start,
+            end=end,
+            course_id=course_id,
+            schema_id=schema_id,
+            problem_id=problem_id
+        )
+
+        return ActivityTimeseriesResponse(
+            code=200,
+            msg="查询成功",
+            data=ActivityTimeseriesData(
+                granularity=granularity,
+                course_id=course_id,
+                schema_id=schema_id,
+                problem_id=problem_id,
+                points=points
+            )
+        )
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取提交量时间序列失败: {str(e)}"
+        )
+
+# 分数导出接口
+@teacher_router.get("/scores/export", summary="导出课程分数")
+async def export_scores(
+    course_id: int = Query(..., description="课程ID"),
+    class_name: Optional[str] = Query(None, description="班级（可选）"),
+    format: str = Query("CSV", description="导出格式：CSV、XLSX"),
+    teacher: Identity = Depends(get_current_teacher_identity),
+    db: Session = Depends(get_db)
+):
+    """
+    导出教师名下课程的学生分数
+
+    需要教师身份的JWT认证令牌
+
+    查询参数：
+    - course_id: 课程ID
+    - class_name: 班级（可选，不传导出全部班级）
+    - format: 导出格式（CSV、XLSX）
+
+    返回：
+    - 文件流，列为 学号、姓名、班级、学期、总分
+    """
+    file_data, error_message, media_type = teacher_service.export_scores(
+        teacher=teacher,
+        course_id=course_id,
+        class_name=class_name,
+        export_format=format,
+        db=db
+    )
+
+    if file_data is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_message
+        )
+
+    extension = "xlsx" if format.upper() == "XLSX" else "csv"
+    filename = f"course-{course_id}-scores-{datetime.now().strftime('%Y%m%d%H%M%S')}.{extension}"
+    return StreamingResponse(
+        file_data,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 # 导出数据接口
 @teacher_router.get("/dataset/export", summary="导出数据库模式相关数据")
 async def export_dataset(
     schema_name: str = Query(..., description="数据库模式名称"),
     format: str = Query("XLSX", description="导出格式：XLSX、JSON、XML"),
+    engine_type: str = Query("mysql", description="数据来源引擎：mysql、postgresql"),
     current_user: dict = Depends(get_current_teacher),
     db: Session = Depends(get_db)
 ):
     """
-    导出数据库模式相关数据
+    导出数据库模式中所有表的数据
+
+    每张表的数据通过服务端游标分批读取并流式写出，导出大表时内存占用固定
 
     需要教师身份的JWT认证令牌
 
     查询参数：
     - schema_name: 数据库模式名称
-    - format: 导出格式（XLSX、JSON、XML）
+    - format: 导出格式（XLSX每张表一个工作表；JSON、XML按表分组）
+    - engine_type: 数据来源引擎，默认 mysql
 
     返回：
     - 文件流
@@ -957,7 +1245,8 @@ async def export_dataset(
         file_data, error_message, media_type = teacher_service.export_dataset(
             schema_name=schema_name,
             format=format,
-            db=db
+            db=db,
+            engine_type=engine_type
         )
 
         if file_data is None:
@@ -993,6 +1282,111 @@ async def export_dataset(
             detail=f"导出数据失败: {str(e)}"
         )
 
+def _export_job_data(job) -> ExportJobData:
+    """把后台导出任务转换为响应数据"""
+    return ExportJobData(
+        job_id=job.job_id,
+        kind=job.kind,
+        status=job.status,
+        cached=job.cached,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        download_url=f"/teacher/export-jobs/{job.job_id}/download" if job.status == "done" else None
+    )
+
+# 后台导出任务接口
+@teacher_router.post("/export-jobs", response_model=ExportJobResponse, summary="提交后台导出任务")
+async def create_export_job(
+    request: ExportJobCreateRequest,
+    current_user: dict = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """
+    提交后台导出任务，立即返回任务ID，导出文件在后台生成
+
+    相同参数且数据未变化的导出直接复用已缓存的文件（status 直接为 done，cached 为 true）
+
+    需要教师身份的JWT认证令牌
+
+    请求参数（JSON格式）：
+    - kind: 导出类型（scores、answer_records、dataset）
+    - format: 导出格式（scores：CSV、XLSX；answer_records：CSV、NDJSON；dataset：XLSX、JSON、XML）
+    - course_id / class_name: 课程分数导出参数
+    - semester_ids: 答题记录导出参数
+    - schema_name / engine_type: 数据集导出参数
+
+    返回：
+    - 任务状态，完成后通过 download_url 下载文件
+    """
+    try:
+        from services.export_job_service import export_job_service
+
+        job = export_job_service.submit(
+            kind=request.kind,
+            params=request.model_dump(exclude={"kind"}),
+            owner=current_user["id"],
+            db=db
+        )
+        return ExportJobResponse(code=200, msg="提交成功", data=_export_job_data(job))
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"提交导出任务失败: {str(e)}"
+        )
+
+@teacher_router.get("/export-jobs/{job_id}", response_model=ExportJobResponse, summary="查询后台导出任务状态")
+async def get_export_job(
+    job_id: str = Path(..., description="任务ID"),
+    current_user: dict = Depends(get_current_teacher)
+):
+    """
+    查询后台导出任务状态
+
+    需要教师身份的JWT认证令牌，只能查询自己提交的任务
+
+    返回：
+    - status: pending（排队中）、running（生成中）、done（已完成）、failed（失败，error 为原因）
+    """
+    from services.export_job_service import export_job_service
+
+    job = export_job_service.get_job(job_id, current_user["id"])
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="导出任务不存在或已过期"
+        )
+    return ExportJobResponse(code=200, msg="获取成功", data=_export_job_data(job))
+
+@teacher_router.get("/export-jobs/{job_id}/download", summary="下载后台导出文件")
+async def download_export_job(
+    job_id: str = Path(..., description="任务ID"),
+    current_user: dict = Depends(get_current_teacher)
+):
+    """
+    下载已完成的后台导出文件
+
+    需要教师身份的JWT认证令牌，只能下载自己提交的任务
+
+    返回：
+    - 文件
+    """
+    from services.export_job_service import export_job_service
+
+    job = export_job_service.get_artifact(job_id, current_user["id"])
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="导出文件不存在、尚未生成完成或已被清理，请重新提交导出任务"
+        )
+    return FileResponse(job.file_path, media_type=job.media_type, filename=job.filename)
+
 # 导出指定学生成绩数据接口
 
 
@@ -1046,7 +1440,8 @@ async def get_problem_detail(
             is_ordered=problem.is_ordered or 0,  # 注意数据库字段名的拼写
             problem_content=problem.problem_content or "",
             example_sql=problem.example_sql or "",
-            knowledge=problem.knowledge or None
+            knowledge=problem.knowledge or None,
+            check_sql=problem.check_sql or None
         )
 
         return ProblemDetailResponse(
@@ -1088,6 +1483,7 @@ async def edit_problem(
     - problem_content: 题目内容（可选）
     - example_sql: 示例SQL（可选）
     - knowledge: 知识点信息（可选）
+    - check_sql: DML题目的验证查询（可选，传空字符串改回查询题）
 
     返回：
     - code: 状态码
@@ -1115,6 +1511,8 @@ async def edit_problem(
             problem.example_sql = edit_request.example_sql
         if edit_request.knowledge is not None:
             problem.knowledge = edit_request.knowledge
+        if edit_request.check_sql is not None:
+            problem.check_sql = edit_request.check_sql.strip() or None
 
         # 提交更改
         db.commit()
@@ -1190,7 +1588,7 @@ async def delete_problem(
 @teacher_router.post("/schema/create", response_model=SchemaCreateResponse, summary="创建数据库模式")
 async def create_database_schema(
     schema_data: SchemaCreateRequest,
-    current_user: dict = Depends(get_current_teacher),
+    teacher: Identity = Depends(get_current_teacher_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -1224,7 +1622,7 @@ async def create_database_schema(
             )
 
         success, message, response = teacher_service.create_database_schema(
-            teacher_id=current_user["id"],
+            teacher=teacher,
             schema_data=schema_data,
             db=db
         )
@@ -1248,7 +1646,7 @@ async def create_database_schema(
 @teacher_router.post("/schema/query", response_model=SQLQueryResponse, summary="执行SQL查询")
 async def execute_sql_query(
     query_data: SQLQueryRequest,
-    current_user: dict = Depends(get_current_teacher),
+    teacher: Identity = Depends(get_current_teacher_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -1275,7 +1673,7 @@ async def execute_sql_query(
     """
     try:
         result = teacher_service.execute_sql_query(
-            teacher_id=current_user["id"],
+            teacher=teacher,
             query_data=query_data,
             db=db
         )
@@ -1331,7 +1729,7 @@ async def delete_database_schema(
 @teacher_router.put("/schema-status", response_model=SchemaStatusUpdateResponse, summary="设置数据库模式的权限")
 async def update_schema_status(
     request_data: SchemaStatusUpdateRequest,
-    current_user: dict = Depends(get_current_teacher),
+    teacher: Identity = Depends(get_current_teacher_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -1349,7 +1747,7 @@ async def update_schema_status(
     """
     try:
         success, message, response = teacher_service.update_schema_status(
-            teacher_id=current_user["id"],
+            teacher=teacher,
             request_data=request_data,
             db=db
         )
@@ -1372,7 +1770,7 @@ async def update_schema_status(
 
 @teacher_router.get("/schema/link-info", response_model=DatabaseLinkInfoResponse, summary="获取数据库模式的连接信息")
 async def get_database_link_info(
-    current_user: dict = Depends(get_current_teacher),
+    teacher: Identity = Depends(get_current_teacher_identity),
     db: Session = Depends(get_db)
 ):
     """
@@ -1391,7 +1789,7 @@ async def get_database_link_info(
     """
     try:
         result = teacher_service.get_database_link_info(
-            teacher_id=current_user["id"],
+            teacher=teacher,
             db=db
         )
 
@@ -1407,20 +1805,21 @@ async def get_database_link_info(
 
 @teacher_router.post("/problem/ai-analyze", response_model=ProblemKnowledgeAnalysisResponse, summary="AI分析知识点掌握度")
 async def ai_analyze_problem_knowledge(
-    request_data: ProblemKnowledgeAnalysisRequest,
-    current_user: dict = Depends(get_current_teacher),
+    request_data: Optional[ProblemKnowledgeAnalysisRequest] = None,
+    schema_id: Optional[int] = Query(None, description="数据库模式ID，分析该模式下的所有题目"),
+    teacher: Identity = Depends(get_current_teacher_identity),
     db: Session = Depends(get_db)
 ):
     """
-    根据题目信息和完成度信息进行智能分析
+    根据题目知识点和完成情况进行智能分析
 
     需要教师身份的JWT认证令牌
 
-    请求参数：
-    - problems: 题目分析数据列表，包含：
+    请求参数（二选一）：
+    - 请求体 problems: 题目列表，包含：
       - problem_id: 题目ID
-      - completed_student_count: 完成此题目的学生人数
-      - total_submission_count: 此题目的总提交次数
+      - completed_student_count / total_submission_count: 已废弃，完成情况由服务端统计
+    - 查询参数 schema_id: 分析该数据库模式下的所有题目
 
     返回：
     - code: 状态码（200表示成功）
@@ -1429,19 +1828,25 @@ async def ai_analyze_problem_knowledge(
       - ai_result: AI分析结果文本
 
     执行流程：
-    1. 根据problem_id在problem表获取knowledge字段
-    2. 构建AI分析的prompt
-    3. 调用AI服务进行分析
+    1. 一次查询获取所有题目的knowledge字段
+    2. 一次分组查询统计每道题的完成人数和总提交次数
+    3. 构建AI分析的prompt并异步调用AI服务
     4. 返回分析结果
     """
     try:
-        # 将请求数据转换为字典列表
-        problem_data = [item.dict() for item in request_data.root]
-        
+        problem_ids = [item.problem_id for item in request_data.root] if request_data is not None else None
+
+        if (not problem_ids) == (schema_id is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="题目列表和 schema_id 必须且只能提供一个"
+            )
+
         success, message, response = await teacher_service.analyze_problem_knowledge_mastery(
-            teacher_id=current_user["id"],
-            problem_data=problem_data,
-            db=db
+            teacher=teacher,
+            db=db,
+            problem_ids=problem_ids,
+            schema_id=schema_id
         )
 
         if not success:
@@ -0,0 +1,97 @@
+"""
+运维管理命令
+
+用法：
+    python manage.py migrate               创建新增的表并执行未执行的迁移（别名 upgrade-tables）
+    python manage.py migrate --status      列出所有迁移及其执行状态
+    python manage.py backfill-signatures   为历史答题记录回填方法签名和答案内容哈希
+    python manage.py rebuild-stats         从答题记录全量重建学生×题目统计汇总
+    python manage.py rebuild-activity      从答题记录全量重建提交量时间桶汇总
+"""
+import argparse
+
+from models.base import SessionLocal
+
+
+def migrate(args):
+    """创建新增的表并执行迁移"""
+    from models.database import upgrade_tables as _upgrade_tables, migration_status
+
+    if args.status:
+        migration_status()
+        return
+    _upgrade_tables()
+
+
+def backfill_signatures(args):
+    """回填答题记录的方法签名和答案内容哈希"""
+    from models.database import upgrade_tables as _upgrade_tables
+    from services.sql_method_service import sql_method_service
+
+    # 回填前确保列已存在
+    _upgrade_tables()
+
+    db = SessionLocal()
+    try:
+        total = sql_method_service.backfill_method_signatures(db, batch_size=args.batch_size)
+        print(f"方法签名和内容哈希回填完成，共处理 {total} 条记录")
+    finally:
+        db.close()
+
+
+def rebuild_stats(args):
+    """重建学生×题目统计汇总"""
+    from models.database import upgrade_tables as _upgrade_tables
+    from services.statistics_service import statistics_service
+
+    # 重建前确保汇总表已存在
+    _upgrade_tables()
+
+    db = SessionLocal()
+    try:
+        total = statistics_service.rebuild(db)
+        print(f"统计汇总重建完成，共 {total} 行")
+    finally:
+        db.close()
+
+
+def rebuild_activity(args):
+    """重建提交量时间桶汇总"""
+    from models.database import upgrade_tables as _upgrade_tables
+    from services.activity_service import activity_service
+
+    # 重建前确保汇总表已存在
+    _upgrade_tables()
+
+    db = SessionLocal()
+    try:
+        total = activity_service.rebuild(db, batch_size=args.batch_size)
+        print(f"提交量汇总重建完成，共 {total} 行")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL在线平台运维管理命令")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", aliases=["upgrade-tables"], help="创建新增的表并执行未执行的迁移")
+    migrate_parser.add_argument("--status", action="store_true", help="只列出迁移执行状态")
+    migrate_parser.set_defaults(func=migrate)
+
+    backfill_parser = subparsers.add_parser("backfill-signatures", help="为历史答题记录回填方法签名和答案内容哈希")
+    backfill_parser.add_argument("--batch-size", type=int, default=1000, help="每批处理的记录数")
+    backfill_parser.set_defaults(func=backfill_signatures)
+
+    subparsers.add_parser("rebuild-stats", help="从答题记录全量重建学生×题目统计汇总").set_defaults(func=rebuild_stats)
+
+    activity_parser = subparsers.add_parser("rebuild-activity", help="从答题记录全量重建提交量时间桶汇总")
+    activity_parser.add_argument("--batch-size", type=int, default=5000, help="每批读取的答题记录数")
+    activity_parser.set_defaults(func=rebuild_activity)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ from .database_schema import DatabaseSchema
 from .problem import Problem
 from .answer_record import AnswerRecord
 from .date_range import DateRange
+from .student_problem_stats import StudentProblemStats
+from .submission_activity import SubmissionActivity
 
 __all__ = [
     "Student",
@@ -17,5 +19,7 @@ __all__ = [
     "DatabaseSchema",
     "Problem",
     "AnswerRecord",
-    "DateRange"
+    "DateRange",
+    "StudentProblemStats",
+    "SubmissionActivity"
 ] 
\ No newline at end of file
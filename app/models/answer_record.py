@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, String, DateTime, SmallInteger, Text
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, String, DateTime, SmallInteger, Text, Index
 from sqlalchemy.orm import relationship
 from models.base import Base
 
@@ -12,6 +12,22 @@ class AnswerRecord(Base):
     result_type = Column(SmallInteger, nullable=False,comment="0:正确  1：语法错误  2：结果错误")
     answer_content = Column(Text, nullable=False)
     timestep = Column(DateTime, nullable=False)
+    method_signature = Column(String(32), nullable=True, comment="SQL关键词序列签名（MD5），用于统计不同方法数")
+    content_hash = Column(String(32), nullable=True, comment="规范化答案内容的MD5，用于按内容分组统计")
+
+    # 索引：与热点查询的访问模式一一对应
+    __table_args__ = (
+        # 按学生+题目统计不同方法数
+        Index('idx_answer_record_method', 'student_id', 'problem_id', 'method_signature'),
+        # 按学生+题目查询答题记录并按时间倒序（答题记录、AI分析取最近一次提交）
+        Index('idx_answer_record_student_problem_time', 'student_id', 'problem_id', 'timestep'),
+        # 按题目+结果类型统计（题目完成情况、知识点掌握情况）
+        Index('idx_answer_record_problem_result', 'problem_id', 'result_type', 'student_id'),
+        # 按提交时间排序及分页（教师端答题记录导出）
+        Index('idx_answer_record_timestep', 'timestep', 'id'),
+        # 按学生+题目判断答案内容是否首次出现
+        Index('idx_answer_record_content', 'student_id', 'problem_id', 'content_hash'),
+    )
 
     
     # 关系
@@ -19,4 +35,4 @@ class AnswerRecord(Base):
     problem = relationship("Problem", back_populates="answer_records")
     
     def __repr__(self):
-        return f"<AnswerRecord(id={self.id}, student_id={self.student_id}, problem_id={self.problem_id})>"
\ No newline at end of file
+        return f"<AnswerRecord(id={self.id}, student_id={self.student_id}, problem_id={self.problem_id})>"
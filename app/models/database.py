@@ -1,7 +1,9 @@
 from models.base import Base, engine
+from models.migrations import MIGRATIONS, run_migrations, get_applied_versions
 from models import (
     Student, Teacher, DateRange, Semester, Course, 
-    CourseSelection, DatabaseSchema, Problem, AnswerRecord
+    CourseSelection, DatabaseSchema, Problem, AnswerRecord, StudentProblemStats,
+    SubmissionActivity
 )
 
 def create_tables():
@@ -20,5 +22,21 @@ def recreate_tables():
     create_tables()
     print("所有表已重新创建！")
 
+def upgrade_tables():
+    """为已有部署补充新增的表，并执行未执行的迁移（create_all 不会修改已存在的表）"""
+    # 先创建新增的表（如 student_problem_stats、submission_activity）
+    Base.metadata.create_all(bind=engine)
+
+    executed = run_migrations(engine)
+    if not executed:
+        print("数据库结构已是最新")
+
+def migration_status():
+    """列出所有迁移及其执行状态"""
+    applied_versions = get_applied_versions(engine)
+    for item in sorted(MIGRATIONS, key=lambda m: m.version):
+        state = "已执行" if item.version in applied_versions else "待执行"
+        print(f"{item.version}  {state}  {item.description}")
+
 if __name__ == "__main__":
-    create_tables() 
\ No newline at end of file
+    create_tables() 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text
+from sqlalchemy import Column, Integer, String, Text
 from sqlalchemy.orm import relationship
 from models.base import Base
 
@@ -13,6 +13,8 @@ class DatabaseSchema(Base):
     schema_author = Column(Text, nullable=True, comment="创建模式的教师姓名")
     sql_table = Column(Text, nullable=True, comment="数据库建表语句")
     schema_status = Column(Integer, nullable=False, default=1, comment="状态：0为禁用，1为启用")
+    schema_version = Column(Integer, nullable=False, default=1, server_default="1", comment="模式版本号，每次重建模式时递增")
+    schema_checksum = Column(String(64), nullable=True, comment="最近一次建表脚本的SHA-256校验和")
 
     # 关系
     problems = relationship("Problem", back_populates="schema")
@@ -0,0 +1,161 @@
+"""
+数据库迁移
+
+create_all 只会创建缺失的表，不会修改已存在的表。已有部署需要的列和索引变更
+以带版本号的迁移登记在 MIGRATIONS 中，按版本顺序各自在一个事务内执行，
+已执行的版本记录在 schema_migrations 表中。
+
+迁移函数需可重复执行：新部署由 create_all 直接建出最新结构，迁移只补充缺失部分。
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Set
+from sqlalchemy import Table, Column, String, DateTime, MetaData, inspect, text, select
+from sqlalchemy.engine import Connection, Engine
+
+# 迁移记录表不属于业务模型，单独维护元数据
+_migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("version", String(32), primary_key=True),
+    Column("description", String(255), nullable=True),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """一次数据库迁移"""
+    version: str
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: str, description: str):
+    """登记迁移的装饰器"""
+    def decorator(func: Callable[[Connection], None]):
+        MIGRATIONS.append(Migration(version=version, description=description, upgrade=func))
+        return func
+    return decorator
+
+
+def _add_column_if_missing(connection: Connection, table: str, column: str, ddl: str) -> None:
+    """列不存在时添加"""
+    columns = {item["name"] for item in inspect(connection).get_columns(table)}
+    if column not in columns:
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        print(f"已添加列: {table}.{column}")
+
+
+def _create_index_if_missing(connection: Connection, table: str, name: str, columns: List[str]) -> None:
+    """索引不存在时创建"""
+    indexes = {item["name"] for item in inspect(connection).get_indexes(table)}
+    if name not in indexes:
+        connection.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+        print(f"已创建索引: {name}")
+
+
+@migration("0001", "answer_record 增加方法签名列及索引")
+def _answer_record_method_signature(connection: Connection) -> None:
+    _add_column_if_missing(connection, "answer_record", "method_signature", "VARCHAR(32)")
+    _create_index_if_missing(
+        connection, "answer_record", "idx_answer_record_method",
+        ["student_id", "problem_id", "method_signature"]
+    )
+
+
+@migration("0002", "answer_record 热点查询复合索引")
+def _answer_record_hot_path_indexes(connection: Connection) -> None:
+    _create_index_if_missing(
+        connection, "answer_record", "idx_answer_record_student_problem_time",
+        ["student_id", "problem_id", "timestep"]
+    )
+    _create_index_if_missing(
+        connection, "answer_record", "idx_answer_record_problem_result",
+        ["problem_id", "result_type", "student_id"]
+    )
+    _create_index_if_missing(
+        connection, "answer_record", "idx_answer_record_timestep",
+        ["timestep", "id"]
+    )
+
+
+@migration("0003", "answer_record 增加答案内容哈希，student_problem_stats 增加不同答案内容数")
+def _answer_record_content_hash(connection: Connection) -> None:
+    _add_column_if_missing(connection, "answer_record", "content_hash", "VARCHAR(32)")
+    _create_index_if_missing(
+        connection, "answer_record", "idx_answer_record_content",
+        ["student_id", "problem_id", "content_hash"]
+    )
+    _add_column_if_missing(connection, "student_problem_stats", "content_count", "INTEGER NOT NULL DEFAULT 0")
+
+
+@migration("0004", "problem 增加 DML 题目验证查询")
+def _problem_check_sql(connection: Connection) -> None:
+    _add_column_if_missing(connection, "problem", "check_sql", "TEXT")
+
+
+@migration("0005", "database_schema 增加模式版本号和建表脚本校验和")
+def _database_schema_version(connection: Connection) -> None:
+    _add_column_if_missing(connection, "database_schema", "schema_version", "INTEGER NOT NULL DEFAULT 1")
+    _add_column_if_missing(connection, "database_schema", "schema_checksum", "VARCHAR(64)")
+
+
+@migration("0006", "submission_activity 的 course_id = 0 改为所有提交的合计行")
+def _submission_activity_total_rows(connection: Connection) -> None:
+    # 迁移前每次提交只计入一行（course_id = 0 为未选课），各行之和即合计；
+    # 已有的多课程学生的提交仍只归属一门课程，需要时执行 python manage.py rebuild-activity
+    totals = connection.execute(text(
+        "SELECT granularity, bucket_start, problem_id, result_type, SUM(submit_count) AS submit_count "
+        "FROM submission_activity GROUP BY granularity, bucket_start, problem_id, result_type"
+    )).mappings().all()
+    connection.execute(text("DELETE FROM submission_activity WHERE course_id = 0"))
+    insert_sql = text(
+        "INSERT INTO submission_activity "
+        "(granularity, bucket_start, course_id, problem_id, result_type, submit_count) "
+        "VALUES (:granularity, :bucket_start, 0, :problem_id, :result_type, :submit_count)"
+    )
+    for start in range(0, len(totals), 1000):
+        connection.execute(insert_sql, [dict(row) for row in totals[start:start + 1000]])
+
+
+def get_applied_versions(engine: Engine) -> Set[str]:
+    """获取已执行的迁移版本"""
+    schema_migrations.create(bind=engine, checkfirst=True)
+    with engine.connect() as connection:
+        return {row.version for row in connection.execute(select(schema_migrations.c.version))}
+
+
+def run_migrations(engine: Engine) -> List[Migration]:
+    """
+    按版本顺序执行所有未执行的迁移
+
+    Args:
+        engine: 数据库引擎
+
+    Returns:
+        List[Migration]: 本次执行的迁移
+    """
+    applied_versions = get_applied_versions(engine)
+
+    executed = []
+    for item in sorted(MIGRATIONS, key=lambda m: m.version):
+        if item.version in applied_versions:
+            continue
+
+        with engine.begin() as connection:
+            item.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=item.version,
+                description=item.description,
+                applied_at=datetime.now()
+            ))
+        print(f"已执行迁移 {item.version}: {item.description}")
+        executed.append(item)
+
+    return executed
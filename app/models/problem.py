@@ -13,6 +13,7 @@ class Problem(Base):
     example_sql = Column(Text, nullable=True)
     is_ordered = Column(SmallInteger, nullable=True, comment="判断数据的标准：0为行无序，1为行有序")
     knowledge = Column(Text, nullable=True, comment="题目知识点")
+    check_sql = Column(Text, nullable=True, comment="DML题目的验证查询：执行答案后用于比对数据状态的SELECT，为空表示查询题")
 
     # 关系
     schema = relationship("DatabaseSchema", back_populates="problems")
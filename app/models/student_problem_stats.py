@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from models.base import Base
+
+class StudentProblemStats(Base):
+    """学生×题目答题统计汇总模型（由提交答案时同步维护，可从答题记录重建）"""
+    __tablename__ = "student_problem_stats"
+    
+    student_id = Column(Integer, ForeignKey("student.id"), primary_key=True)
+    problem_id = Column(Integer, ForeignKey("problem.problem_id"), primary_key=True)
+    submit_count = Column(Integer, nullable=False, default=0, comment="总提交次数")
+    correct_count = Column(Integer, nullable=False, default=0, comment="正确次数")
+    syntax_error_count = Column(Integer, nullable=False, default=0, comment="语法错误次数")
+    result_error_count = Column(Integer, nullable=False, default=0, comment="结果错误次数")
+    first_correct_at = Column(DateTime, nullable=True, comment="首次正确提交时间")
+    method_count = Column(Integer, nullable=False, default=0, comment="正确提交中不同方法签名的数量")
+    content_count = Column(Integer, nullable=False, default=0, comment="所有提交中不同答案内容（按内容哈希）的数量")
+
+    # 索引：按题目统计完成人数、提交次数
+    __table_args__ = (
+        Index('idx_student_problem_stats_problem', 'problem_id', 'correct_count'),
+    )
+    
+    # 关系
+    student = relationship("Student")
+    problem = relationship("Problem")
+    
+    def __repr__(self):
+        return f"<StudentProblemStats(student_id={self.student_id}, problem_id={self.problem_id}, submit_count={self.submit_count})>"
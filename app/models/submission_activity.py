@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, SmallInteger, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from models.base import Base
+
+class SubmissionActivity(Base):
+    """按时间桶汇总的提交量模型（时间粒度×时间桶×课程×题目×结果类型，由提交答案时同步维护）"""
+    __tablename__ = "submission_activity"
+
+    granularity = Column(String(8), primary_key=True, comment="时间粒度：minute / hour")
+    bucket_start = Column(DateTime, primary_key=True, comment="时间桶起始时间")
+    course_id = Column(Integer, primary_key=True, default=0, comment="提交时学生所选课程，0为所有提交的合计行")
+    problem_id = Column(Integer, ForeignKey("problem.problem_id"), primary_key=True)
+    result_type = Column(SmallInteger, primary_key=True, comment="0:正确  1：语法错误  2：结果错误")
+    submit_count = Column(Integer, nullable=False, default=0, comment="提交次数")
+
+    # 索引：按课程或按题目（模式）取一段时间的序列
+    __table_args__ = (
+        Index('idx_submission_activity_course', 'granularity', 'course_id', 'bucket_start'),
+        Index('idx_submission_activity_problem', 'granularity', 'problem_id', 'bucket_start'),
+    )
+
+    # 关系
+    problem = relationship("Problem")
+
+    def __repr__(self):
+        return f"<SubmissionActivity(granularity={self.granularity}, bucket_start={self.bucket_start}, problem_id={self.problem_id}, result_type={self.result_type})>"
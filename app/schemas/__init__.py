@@ -4,7 +4,7 @@ from .student import (
     StudentProfileResponse, StudentRankItem, StudentRankResponse,
     AnswerSubmitRequest, AnswerSubmitResponse, AnswerRecordItem, AnswerRecordsResponse,
     ProblemItem, ProblemListResponse, DatabaseSchemaItem, DatabaseSchemaListResponse,
-    StudentDashboardItem, StudentDashboardResponse
+    StudentDashboardItem, StudentDashboardResponse, LeaderboardItem, LeaderboardResponse
 )
 from .admin import (
     SemesterUpdateRequest, SemesterUpdateResponse, SemesterInfo, SemesterCreateRequest,
@@ -44,6 +44,8 @@ __all__ = [
     "DatabaseSchemaListResponse",
     "StudentDashboardItem",
     "StudentDashboardResponse",
+    "LeaderboardItem",
+    "LeaderboardResponse",
     "SemesterUpdateRequest",
     "SemesterUpdateResponse",
     "SemesterInfo",
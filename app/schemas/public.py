@@ -185,3 +185,75 @@ class DatabaseSchemaWithStatusListResponse(RootModel):
                 }
             ]
         }
+
+class SchemaColumnInfo(BaseModel):
+    """模式结构中的列信息模型"""
+    name: str
+    type: str
+    nullable: bool
+    default: Optional[str] = None
+
+class SchemaForeignKeyInfo(BaseModel):
+    """模式结构中的外键信息模型"""
+    name: str
+    columns: List[str]
+    ref_table: str
+    ref_columns: List[str]
+
+class SchemaTableInfo(BaseModel):
+    """模式结构中的表信息模型"""
+    name: str
+    columns: List[SchemaColumnInfo]
+    primary_key: List[str]
+    unique: List[List[str]]
+    foreign_keys: List[SchemaForeignKeyInfo]
+
+class SchemaStructureData(BaseModel):
+    """数据库模式结构数据模型"""
+    schema_id: int
+    schema_name: Optional[str] = None
+    sql_schema: str
+    version: int  # 模式版本号，模式重建后递增
+    engine_type: str
+    tables: List[SchemaTableInfo]
+
+class SchemaStructureResponse(BaseModel):
+    """数据库模式结构响应模型"""
+    code: int = 200
+    msg: str = "获取成功"
+    data: SchemaStructureData
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "code": 200,
+                "msg": "获取成功",
+                "data": {
+                    "schema_id": 1,
+                    "schema_name": "ORACLE_HR",
+                    "sql_schema": "oracle_hr",
+                    "version": 3,
+                    "engine_type": "postgresql",
+                    "tables": [
+                        {
+                            "name": "employees",
+                            "columns": [
+                                {"name": "employee_id", "type": "integer", "nullable": False, "default": None},
+                                {"name": "department_id", "type": "integer", "nullable": True, "default": None}
+                            ],
+                            "primary_key": ["employee_id"],
+                            "unique": [],
+                            "foreign_keys": [
+                                {
+                                    "name": "emp_dept_fk",
+                                    "columns": ["department_id"],
+                                    "ref_table": "departments",
+                                    "ref_columns": ["department_id"]
+                                }
+                            ]
+                        }
+                    ]
+                }
+            }
+        }
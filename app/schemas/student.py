@@ -27,6 +27,51 @@ class StudentRankItem(BaseModel):
 # 直接使用 List[StudentRankItem] 作为响应类型，不需要单独的 RootModel
 StudentRankResponse = List[StudentRankItem]
 
+class LeaderboardItem(BaseModel):
+    """排行榜条目模型"""
+    rank: int  # 范围内名次
+    student_name: str
+    class_name: str
+    correct_count: int  # 答对的题目数量
+    method_count: int  # 不同方法数量
+
+    class Config:
+        from_attributes = True
+
+class LeaderboardResponse(BaseModel):
+    """排行榜响应模型（游标分页）"""
+    scope: str  # semester / course / class
+    items: List[LeaderboardItem]
+    total: int  # 范围内学生总数
+    next_cursor: Optional[str] = None  # 下一页游标，为空表示没有更多数据
+    my_rank: Optional[LeaderboardItem] = None  # 当前学生在该范围内的名次
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "scope": "class",
+                "items": [
+                    {
+                        "rank": 1,
+                        "student_name": "张三",
+                        "class_name": "软件2211班",
+                        "correct_count": 12,
+                        "method_count": 18
+                    }
+                ],
+                "total": 35,
+                "next_cursor": "eyJjIjoxMiwibSI6MTgsInMiOjQyfQ",
+                "my_rank": {
+                    "rank": 7,
+                    "student_name": "李四",
+                    "class_name": "软件2211班",
+                    "correct_count": 9,
+                    "method_count": 11
+                }
+            }
+        }
+
 class StudentDashboardItem(BaseModel):
     """学生数据面板项模型"""
     problem_id: int
@@ -153,6 +153,108 @@ class StudentCourseAddResponse(BaseModel):
             }
         }
 
+class RosterImportError(BaseModel):
+    """名单导入错误项模型"""
+    row: int  # 文件中的行号（第1行为表头）
+    student_id: str
+    error: str
+
+class RosterImportData(BaseModel):
+    """名单导入结果模型"""
+    total_rows: int  # 文件中的数据行数
+    created_students: int  # 新建的学生数
+    created_selections: int  # 新增的选课记录数
+    errors: List[RosterImportError]  # 逐行错误报告
+
+class RosterImportResponse(BaseModel):
+    """名单导入响应模型"""
+    code: int = 200
+    msg: str = "导入成功"
+    data: RosterImportData
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "code": 206,
+                "msg": "部分成功，成功 498 条，失败 2 条",
+                "data": {
+                    "total_rows": 500,
+                    "created_students": 120,
+                    "created_selections": 498,
+                    "errors": [
+                        {
+                            "row": 17,
+                            "student_id": "20232251177",
+                            "error": "学生 20232251177 已经选择了课程 10"
+                        },
+                        {
+                            "row": 233,
+                            "student_id": "",
+                            "error": "学号不能为空"
+                        }
+                    ]
+                }
+            }
+        }
+
+# 后台导出任务相关模型
+class ExportJobCreateRequest(BaseModel):
+    """提交后台导出任务请求模型"""
+    kind: str = Field(..., description="导出类型：scores、answer_records、dataset")
+    format: Optional[str] = Field(None, description="导出格式，不传时使用该类型的默认格式")
+    course_id: Optional[int] = Field(None, description="课程ID（scores）")
+    class_name: Optional[str] = Field(None, description="班级（scores，可选）")
+    semester_ids: Optional[List[int]] = Field(None, description="学期ID列表（answer_records）")
+    schema_name: Optional[str] = Field(None, description="数据库模式名称（dataset）")
+    engine_type: Optional[str] = Field(None, description="数据来源引擎（dataset），默认 mysql")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "kind": "scores",
+                "format": "XLSX",
+                "course_id": 1,
+                "class_name": "计算机2301"
+            }
+        }
+
+class ExportJobData(BaseModel):
+    """后台导出任务状态模型"""
+    job_id: str
+    kind: str
+    status: str  # pending、running、done、failed
+    cached: bool  # 是否直接命中已缓存的导出文件
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    download_url: Optional[str] = None  # 任务完成后的下载地址
+
+class ExportJobResponse(BaseModel):
+    """后台导出任务响应模型"""
+    code: int = 200
+    msg: str = "获取成功"
+    data: ExportJobData
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "code": 200,
+                "msg": "获取成功",
+                "data": {
+                    "job_id": "3f2b9c0e8d7a4c1b9e6f5a4d3c2b1a09",
+                    "kind": "scores",
+                    "status": "done",
+                    "cached": True,
+                    "error": None,
+                    "created_at": "2025-03-01T10:00:00",
+                    "finished_at": "2025-03-01T10:00:00",
+                    "download_url": "/teacher/export-jobs/3f2b9c0e8d7a4c1b9e6f5a4d3c2b1a09/download"
+                }
+            }
+        }
+
 # 数据库模式相关模型
 class SQLFileContent(BaseModel):
     """SQL文件内容模型"""
@@ -322,11 +424,15 @@ class SQLQueryResponse(BaseModel):
 class ScoreCalculateRequest(BaseModel):
     """分数核算请求模型"""
     problem_ids: List[int]
+    points_per_problem: int = Field(10, ge=0, description="每道题的分值")
+    max_score: int = Field(100, ge=0, description="分数上限")
 
     class Config:
         json_schema_extra = {
             "example": {
-                "problem_ids": [5, 6, 7, 8]
+                "problem_ids": [5, 6, 7, 8],
+                "points_per_problem": 10,
+                "max_score": 100
             }
         }
 
@@ -390,6 +496,7 @@ class TeacherProblemItem(BaseModel):
     problem_content: str
     example_sql: str
     knowledge: Optional[str] = None
+    check_sql: Optional[str] = None  # DML题目的验证查询
 
     class Config:
         from_attributes = True
@@ -507,11 +614,27 @@ class StudentProblemStatsRequest(BaseModel):
 class StudentAnswerRecordsRequest(BaseModel):
     """学生答题记录查询请求模型"""
     semester_ids: List[int]
+    cursor: Optional[str] = None  # 上一页返回的游标
+    limit: Optional[int] = Field(None, ge=1, le=1000)  # 每页数量，为空时返回全部记录
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "semester_ids": [1, 2],
+                "limit": 500
+            }
+        }
+
+class StudentAnswerRecordsStreamRequest(BaseModel):
+    """学生答题记录流式导出请求模型"""
+    semester_ids: List[int]
+    format: str = "NDJSON"  # NDJSON 或 CSV
 
     class Config:
         json_schema_extra = {
             "example": {
-                "semester_ids": [1, 2]
+                "semester_ids": [1, 2],
+                "format": "CSV"
             }
         }
 
@@ -529,6 +652,7 @@ class StudentAnswerRecord(BaseModel):
 class StudentAnswerRecordsResponse(BaseModel):
     """学生答题记录响应模型"""
     data: List[StudentAnswerRecord]
+    next_cursor: Optional[str] = None  # 下一页游标，为空表示没有更多数据
 
     class Config:
         from_attributes = True
@@ -1013,6 +1137,93 @@ class ProblemSummaryDocResponse(BaseModel):
             }
         }
 
+class ProblemSummaryBatchRequest(BaseModel):
+    """批量题目统计请求模型（problem_ids 与 schema_id 二选一）"""
+    problem_ids: Optional[List[int]] = None
+    schema_id: Optional[int] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "problem_ids": [11, 12, 13]
+            }
+        }
+
+class ProblemSummaryBatchResponse(BaseModel):
+    """批量题目统计响应模型"""
+    code: int = 200
+    msg: str = "查询成功"
+    data: List[ProblemSummaryData]
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "code": 200,
+                "msg": "查询成功",
+                "data": [
+                    {
+                        "problem_id": 11,
+                        "completed_student_count": 121,
+                        "total_submission_count": 449
+                    },
+                    {
+                        "problem_id": 12,
+                        "completed_student_count": 98,
+                        "total_submission_count": 376
+                    }
+                ]
+            }
+        }
+
+# 提交量时间序列相关模型
+class ActivityPoint(BaseModel):
+    """提交量时间序列数据点模型"""
+    bucket_start: datetime  # 时间桶起始时间
+    submit_count: int  # 提交次数
+    correct_count: int  # 正确次数
+    syntax_error_count: int  # 语法错误次数
+    result_error_count: int  # 结果错误次数
+    accuracy: float  # 正确率
+
+class ActivityTimeseriesData(BaseModel):
+    """提交量时间序列数据模型"""
+    granularity: str  # minute / hour
+    course_id: Optional[int] = None
+    schema_id: Optional[int] = None
+    problem_id: Optional[int] = None
+    points: List[ActivityPoint]
+
+class ActivityTimeseriesResponse(BaseModel):
+    """提交量时间序列响应模型"""
+    code: int = 200
+    msg: str = "查询成功"
+    data: ActivityTimeseriesData
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "code": 200,
+                "msg": "查询成功",
+                "data": {
+                    "granularity": "minute",
+                    "course_id": 3,
+                    "schema_id": None,
+                    "problem_id": None,
+                    "points": [
+                        {
+                            "bucket_start": "2025-03-12T10:01:00",
+                            "submit_count": 42,
+                            "correct_count": 17,
+                            "syntax_error_count": 12,
+                            "result_error_count": 13,
+                            "accuracy": 0.4048
+                        }
+                    ]
+                }
+            }
+        }
+
 # 题目详情和编辑相关模型
 class ProblemDetailData(BaseModel):
     """题目详情数据模型"""
@@ -1022,6 +1233,7 @@ class ProblemDetailData(BaseModel):
     problem_content: str
     example_sql: str
     knowledge: Optional[str] = None
+    check_sql: Optional[str] = None  # DML题目的验证查询
 
     class Config:
         from_attributes = True
@@ -1057,6 +1269,7 @@ class ProblemEditRequest(BaseModel):
     problem_content: Optional[str] = None
     example_sql: Optional[str] = None
     knowledge: Optional[str] = None
+    check_sql: Optional[str] = None  # DML题目的验证查询，传空字符串改回查询题
 
     class Config:
         json_schema_extra = {
@@ -1093,6 +1306,7 @@ class ProblemCreateRequest(BaseModel):
     example_sql: str
     knowledge: Optional[str] = None
     schema_id: Optional[int] = None  # 可选的数据库模式ID
+    check_sql: Optional[str] = None  # DML题目的验证查询（SELECT），为空表示查询题
 
     class Config:
         json_schema_extra = {
@@ -1228,16 +1442,15 @@ class TeacherStudentListResponse(BaseModel):
 class ProblemKnowledgeAnalysisItem(BaseModel):
     """题目知识点分析项模型"""
     problem_id: int
-    completed_student_count: int  # 完成此题目的学生人数
-    total_submission_count: int   # 此题目的总提交次数
+    # 以下两项已由服务端统计，保留字段以兼容旧客户端，传入的值不再使用
+    completed_student_count: Optional[int] = None  # 完成此题目的学生人数
+    total_submission_count: Optional[int] = None   # 此题目的总提交次数
 
     class Config:
         from_attributes = True
         json_schema_extra = {
             "example": {
-                "problem_id": 1,
-                "completed_student_count": 21,
-                "total_submission_count": 49
+                "problem_id": 1
             }
         }
 
@@ -1249,19 +1462,13 @@ class ProblemKnowledgeAnalysisRequest(RootModel[List[ProblemKnowledgeAnalysisIte
         json_schema_extra = {
             "example": [
                 {
-                    "problem_id": 1,
-                    "completed_student_count": 21,
-                    "total_submission_count": 49
+                    "problem_id": 1
                 },
                 {
-                    "problem_id": 2,
-                    "completed_student_count": 121,
-                    "total_submission_count": 44
+                    "problem_id": 2
                 },
                 {
-                    "problem_id": 3,
-                    "completed_student_count": 41,
-                    "total_submission_count": 54
+                    "problem_id": 3
                 }
             ]
         }
@@ -0,0 +1,231 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from models import AnswerRecord, CourseSelection, Problem, SubmissionActivity
+
+# 支持的时间粒度：时间桶长度及单次查询允许的最大时间跨度
+GRANULARITIES = {
+    "minute": (timedelta(minutes=1), timedelta(days=1)),
+    "hour": (timedelta(hours=1), timedelta(days=31)),
+}
+
+# 合计行的课程ID：每次提交都计入，不限课程的查询读取该行
+ALL_COURSES = 0
+
+class ActivityService:
+    """提交量时间序列服务类
+
+    维护 submission_activity 汇总表：提交答案时在同一事务内对分钟桶、小时桶各加一，
+    实验课看板按时间段读取少量汇总行，不再扫描答题记录表。
+
+    每次提交计入 course_id = 0 的合计行，并计入学生提交时最近一个学期所选的每一门课程；
+    不限课程的查询只读合计行，不会重复计数。课程归属按提交时的选课确定，之后的选课变动
+    不影响已有计数（需要按当前选课重新归属时执行 rebuild）。
+    """
+
+    def truncate(self, value: datetime, granularity: str) -> datetime:
+        """把时间截断到所在时间桶的起始时间"""
+        if granularity == "minute":
+            return value.replace(second=0, microsecond=0)
+        return value.replace(minute=0, second=0, microsecond=0)
+
+    def get_student_course_ids(self, db: Session, student_id: int) -> List[int]:
+        """学生最近一个学期所选的所有课程ID（升序），未选课返回空列表"""
+        latest_semester = db.query(func.max(CourseSelection.semester_id)).filter(
+            CourseSelection.student_id == student_id
+        ).scalar()
+        if latest_semester is None:
+            return []
+        rows = db.query(CourseSelection.course_id).filter(
+            CourseSelection.student_id == student_id,
+            CourseSelection.semester_id == latest_semester
+        ).distinct().order_by(CourseSelection.course_id).all()
+        return [row.course_id for row in rows]
+
+    def record_submission(self, db: Session, answer_record: AnswerRecord) -> None:
+        """
+        将一条新的答题记录计入各粒度的时间桶（不提交事务，由调用方与答题记录一起提交）
+
+        Args:
+            db: 数据库会话
+            answer_record: 答题记录
+        """
+        # 合计行和各课程行按课程ID升序更新，并发提交加锁顺序一致
+        course_ids = [ALL_COURSES] + self.get_student_course_ids(db, answer_record.student_id)
+        for granularity in GRANULARITIES:
+            for course_id in course_ids:
+                self._increment(
+                    db,
+                    granularity=granularity,
+                    bucket_start=self.truncate(answer_record.timestep, granularity),
+                    course_id=course_id,
+                    problem_id=answer_record.problem_id,
+                    result_type=answer_record.result_type
+                )
+
+    def _increment(self, db: Session, **key) -> None:
+        """对时间桶计数原子加一，桶不存在时创建（单条 upsert 语句，不先更新再插入）"""
+        dialect = db.get_bind().dialect.name
+        values = dict(key, submit_count=1)
+        increment = {"submit_count": SubmissionActivity.submit_count + 1}
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+            statement = mysql_insert(SubmissionActivity).values(**values).on_duplicate_key_update(**increment)
+        else:
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            statement = dialect_insert(SubmissionActivity).values(**values).on_conflict_do_update(
+                index_elements=list(key), set_=increment
+            )
+        db.execute(statement)
+
+    def get_timeseries(self, db: Session, granularity: str = "minute", start: Optional[datetime] = None,
+                       end: Optional[datetime] = None, course_id: Optional[int] = None,
+                       schema_id: Optional[int] = None, problem_id: Optional[int] = None) -> List[Dict]:
+        """
+        获取课程或数据库模式在一段时间内的提交量与正确率序列（无提交的时间桶补0）
+
+        Args:
+            db: 数据库会话
+            granularity: 时间粒度，minute 或 hour
+            start: 起始时间，默认 end 之前60个时间桶
+            end: 结束时间，默认当前时间
+            course_id: 课程ID（可选）
+            schema_id: 数据库模式ID（可选）
+            problem_id: 题目ID（可选）
+
+        Returns:
+            List[Dict]: 每个时间桶的 bucket_start、submit_count、correct_count、
+                        syntax_error_count、result_error_count、accuracy
+
+        Raises:
+            ValueError: 时间粒度不支持或时间范围无效
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"不支持的时间粒度: {granularity}，仅支持 {'、'.join(GRANULARITIES)}")
+        step, max_span = GRANULARITIES[granularity]
+
+        end = self.truncate(end or datetime.now(), granularity)
+        start = self.truncate(start, granularity) if start else end - step * 59
+        if start > end:
+            raise ValueError("起始时间不能晚于结束时间")
+        if end - start > max_span:
+            raise ValueError(f"{granularity} 粒度单次最多查询 {max_span.days} 天")
+
+        query = db.query(
+            SubmissionActivity.bucket_start,
+            SubmissionActivity.result_type,
+            func.sum(SubmissionActivity.submit_count).label("submit_count")
+        ).filter(
+            SubmissionActivity.granularity == granularity,
+            SubmissionActivity.bucket_start >= start,
+            SubmissionActivity.bucket_start <= end
+        )
+        query = query.filter(SubmissionActivity.course_id == (ALL_COURSES if course_id is None else course_id))
+        if problem_id is not None:
+            query = query.filter(SubmissionActivity.problem_id == problem_id)
+        if schema_id is not None:
+            query = query.join(
+                Problem, SubmissionActivity.problem_id == Problem.problem_id
+            ).filter(Problem.schema_id == schema_id)
+
+        counts: Dict[datetime, Dict[int, int]] = {}
+        for row in query.group_by(SubmissionActivity.bucket_start, SubmissionActivity.result_type).all():
+            counts.setdefault(row.bucket_start, {})[row.result_type] = int(row.submit_count)
+
+        points = []
+        bucket = start
+        while bucket <= end:
+            by_type = counts.get(bucket, {})
+            submit_count = sum(by_type.values())
+            correct_count = by_type.get(0, 0)
+            points.append({
+                "bucket_start": bucket,
+                "submit_count": submit_count,
+                "correct_count": correct_count,
+                "syntax_error_count": by_type.get(1, 0),
+                "result_error_count": by_type.get(2, 0),
+                "accuracy": round(correct_count / submit_count, 4) if submit_count else 0.0
+            })
+            bucket += step
+
+        return points
+
+    def rebuild(self, db: Session, batch_size: int = 5000) -> int:
+        """
+        从答题记录全量重建提交量汇总表
+
+        时间截断在不同数据库上写法不同，这里用服务端游标流式读取答题记录在内存中分桶，
+        内存占用只与时间桶数量有关。
+
+        Args:
+            db: 数据库会话
+            batch_size: 每批读取的答题记录数
+
+        Returns:
+            int: 重建后的汇总行数
+        """
+        try:
+            # 学生 -> 最近一个学期的所有课程，与 get_student_course_ids 的取法一致
+            student_courses: Dict[int, List[int]] = {}
+            latest_semesters: Dict[int, int] = {}
+            selections = db.query(
+                CourseSelection.student_id, CourseSelection.course_id, CourseSelection.semester_id
+            ).order_by(
+                CourseSelection.semester_id.desc(),
+                CourseSelection.course_id.asc()
+            )
+            for selection in selections:
+                latest = latest_semesters.setdefault(selection.student_id, selection.semester_id)
+                courses = student_courses.setdefault(selection.student_id, [])
+                if selection.semester_id == latest and selection.course_id not in courses:
+                    courses.append(selection.course_id)
+
+            buckets = Counter()
+            records = db.query(
+                AnswerRecord.student_id,
+                AnswerRecord.problem_id,
+                AnswerRecord.result_type,
+                AnswerRecord.timestep
+            ).yield_per(batch_size)
+            for record in records:
+                course_ids = [ALL_COURSES] + student_courses.get(record.student_id, [])
+                for granularity in GRANULARITIES:
+                    for course_id in course_ids:
+                        buckets[(
+                            granularity,
+                            self.truncate(record.timestep, granularity),
+                            course_id,
+                            record.problem_id,
+                            record.result_type
+                        )] += 1
+
+            db.query(SubmissionActivity).delete(synchronize_session=False)
+
+            rows = [
+                {
+                    "granularity": granularity,
+                    "bucket_start": bucket_start,
+                    "course_id": course_id,
+                    "problem_id": problem_id,
+                    "result_type": result_type,
+                    "submit_count": submit_count
+                }
+                for (granularity, bucket_start, course_id, problem_id, result_type), submit_count in buckets.items()
+            ]
+            for offset in range(0, len(rows), batch_size):
+                db.bulk_insert_mappings(SubmissionActivity, rows[offset:offset + batch_size])
+            db.commit()
+
+            return len(rows)
+
+        except Exception:
+            db.rollback()
+            raise
+
+# 全局提交量时间序列服务实例
+activity_service = ActivityService()
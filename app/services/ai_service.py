@@ -3,7 +3,10 @@ import requests
 import json
 from typing import Optional, AsyncGenerator
 from sqlalchemy.orm import Session
-from models import Problem, DatabaseSchema, AnswerRecord, Student
+from starlette.concurrency import run_in_threadpool
+from models import Problem, DatabaseSchema, AnswerRecord
+from services.identity_service import Identity
+from services.schema_introspection_service import schema_introspection_service
 
 
 class AIService:
@@ -18,7 +21,7 @@ class AIService:
         self,
         problem_id: int,
         answer_content: str,
-        student_id: str,  # 注意：这里是学号字符串，不是数据库主键
+        student: Identity,
         db: Session
     ) -> AsyncGenerator[str, None]:
         """
@@ -27,7 +30,7 @@ class AIService:
         Args:
             problem_id: 题目ID
             answer_content: 学生答案内容
-            student_id: 学生学号（字符串）
+            student: 学生身份
             db: 数据库会话
 
         Yields:
@@ -40,12 +43,6 @@ class AIService:
                 yield "题目不存在，无法进行分析。"
                 return
 
-            # 根据学号获取学生信息
-            student = db.query(Student).filter(Student.student_id == student_id).first()
-            if not student:
-                yield "学生信息不存在，无法进行分析。"
-                return
-
             # 获取数据库模式信息
             schema = db.query(DatabaseSchema).filter(
                 DatabaseSchema.schema_id == problem.schema_id
@@ -86,7 +83,8 @@ class AIService:
         if schema:
             schema_info = f"""
 数据库名称：{schema.schema_name}
-建表语句：{schema.sql_schema}
+建表语句：
+{schema_introspection_service.describe(schema)}
 """
         
         problem_info = f"""
@@ -183,6 +181,10 @@ class AIService:
         except Exception as e:
             return f"AI服务异常：{str(e)}"
 
+    async def _call_ai_api_async(self, prompt: str) -> str:
+        """在线程池中调用AI API，等待响应期间不阻塞事件循环"""
+        return await run_in_threadpool(self._call_ai_api, prompt)
+
     async def _call_ai_api_stream(self, prompt: str) -> AsyncGenerator[str, None]:
         """调用AI API进行流式输出"""
         if not self.api_key:
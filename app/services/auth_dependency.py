@@ -1,7 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
 from typing import Optional
+from models.base import get_db
 from services.jwt_service import jwt_service
+from services.identity_service import identity_service, Identity
 
 security = HTTPBearer()
 
@@ -58,4 +61,34 @@ async def get_current_teacher_or_admin(current_user: dict = Depends(get_current_
             status_code=status.HTTP_403_FORBIDDEN,
             detail="需要教师或管理员权限"
         )
-    return current_user 
\ No newline at end of file
+    return current_user
+
+def get_current_identity(current_user: dict = Depends(get_current_user),
+                         db: Session = Depends(get_db)) -> Optional[Identity]:
+    """
+    解析当前用户的身份（数据库主键）
+
+    FastAPI 在同一请求内只调用一次该依赖，多个依赖和接口共用解析结果；
+    管理员或用户已不存在时返回 None
+    """
+    return identity_service.resolve(current_user.get("role"), current_user.get("id"), db)
+
+def _require_identity(identity: Optional[Identity]) -> Identity:
+    """令牌对应的用户已被删除时视为认证失效"""
+    if identity is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="用户不存在或已被删除",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return identity
+
+def get_current_teacher_identity(current_user: dict = Depends(get_current_teacher),
+                                 identity: Optional[Identity] = Depends(get_current_identity)) -> Identity:
+    """获取当前教师的身份"""
+    return _require_identity(identity)
+
+def get_current_student_identity(current_user: dict = Depends(get_current_student),
+                                 identity: Optional[Identity] = Depends(get_current_identity)) -> Identity:
+    """获取当前学生的身份"""
+    return _require_identity(identity)
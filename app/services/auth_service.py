@@ -1,3 +1,4 @@
+import hmac
 from typing import Optional, Tuple
 
 from fastapi import HTTPException
@@ -16,7 +17,11 @@ class AuthService:
         self.jwt_service = jwt_service
     
     def authenticate_user(self, login_data: LoginRequest, db: Session) -> Optional[Tuple[UserInfo, str]]:
-        """用户认证"""
+        """
+        用户认证
+
+        bcrypt 验证是 CPU 密集操作，异步路由中应通过 run_in_threadpool 调用本方法
+        """
         user = self._get_user_by_role_and_id(login_data.role, login_data.account, db)
         
         if not user:
@@ -26,11 +31,16 @@ class AuthService:
             )
         
         # 验证密码
-        if not self._verify_password(user, login_data.password):
+        valid, new_hash = self._verify_password(user, login_data.password)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="密码错误"
             )
+
+        # 明文或低成本哈希在登录成功后升级为当前成本的哈希
+        if new_hash:
+            self._rehash_password(user, new_hash, db)
         
         # 创建用户信息
         user_info = self._create_user_info(user, login_data.role)
@@ -54,7 +64,7 @@ class AuthService:
             return False
         
         # 验证旧密码
-        if not self._verify_password(user, old_password):
+        if not self._verify_password(user, old_password)[0]:
             return False
         
         # 更新密码
@@ -69,12 +79,12 @@ class AuthService:
                 return True  # 暂时返回True，实际需要更新数据库
             elif role == "teacher":
                 # 更新教师密码
-                user.teacher_password = new_password  # 实际应用中应该加密
+                user.teacher_password = self.jwt_service.hash_password(new_password)
                 db.commit()
                 return True
             elif role == "student":
                 # 更新学生密码
-                user.student_password = new_password  # 实际应用中应该加密
+                user.student_password = self.jwt_service.hash_password(new_password)
                 db.commit()
                 return True
             
@@ -99,30 +109,33 @@ class AuthService:
         
         return None
     
-    def _verify_password(self, user, password: str) -> bool:
-        """验证密码"""
-        if isinstance(user, dict):  # 管理员
-            return user.get("password") == password  # 实际应用中应该使用加密验证
+    def _verify_password(self, user, password: str) -> Tuple[bool, Optional[str]]:
+        """
+        验证密码
+
+        Returns:
+            Tuple[bool, Optional[str]]: (是否验证通过, 需要写回的新哈希)
+        """
+        if isinstance(user, dict):  # 管理员：硬编码明文密码，直接比较，无需计算哈希
+            return hmac.compare_digest(password.encode(), user["password"].encode()), None
         elif hasattr(user, 'teacher_password'):  # 教师
-            # 清理密码字符串，去除可能的空白字符
-            stored_password = str(user.teacher_password).strip() if user.teacher_password else ""
-            input_password = str(password).strip() if password else ""
-            
-            # 详细调试信息
-            print(f"stored password: '{stored_password}' (length: {len(stored_password)})")
-            print(f"input password: '{input_password}' (length: {len(input_password)})")
-            print(f"stored password repr: {repr(stored_password)}")
-            print(f"input password repr: {repr(input_password)}")
-            
-            result = stored_password == input_password
-            return result
+            return self.jwt_service.verify_and_update(password, user.teacher_password)
         elif hasattr(user, 'student_password'):  # 学生
-            # 同样处理学生密码
-            stored_password = str(user.student_password).strip() if user.student_password else ""
-            input_password = str(password).strip() if password else ""
-            return stored_password == input_password
+            return self.jwt_service.verify_and_update(password, user.student_password)
         
-        return False
+        return False, None
+
+    def _rehash_password(self, user, new_hash: str, db: Session) -> None:
+        """写回升级后的密码哈希；失败不影响本次登录，下次登录会再次尝试"""
+        try:
+            if hasattr(user, 'teacher_password'):
+                user.teacher_password = new_hash
+            elif hasattr(user, 'student_password'):
+                user.student_password = new_hash
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"更新密码哈希失败: {e}")
     
     def _create_user_info(self, user, role: str) -> UserInfo:
         """创建用户信息"""
@@ -1,5 +1,8 @@
 
-from typing import Optional, Tuple, List, Dict, Any
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional, Tuple, List, Dict, Any, Set, FrozenSet
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
@@ -7,16 +10,45 @@ import os
 from dotenv import load_dotenv
 import json
 import psycopg2
+from utils.sql_script import InsertRun, plan_script, copy_csv_buffer, check_dml_script, referenced_tables
+from utils.ttl_cache import TTLCache
+from services.schema_version_service import schema_version_service, SchemaChange
 
 # 加载环境变量
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
 
+# 教学数据库模式需要在这些引擎上同时创建
+PROVISION_ENGINES = ("mysql", "postgresql", "opengauss")
+
+# 并发创建模式的总时限（秒）
+SCHEMA_PROVISION_TIMEOUT = float(os.getenv("SCHEMA_PROVISION_TIMEOUT", "300"))
+
+# 批量导入种子数据时每条多行 INSERT 包含的行数
+SEED_BATCH_ROWS = int(os.getenv("SEED_BATCH_ROWS", "1000"))
+
+# 回滚执行模式下等待行锁的最长时间（秒）
+DML_LOCK_TIMEOUT = int(os.getenv("DML_LOCK_TIMEOUT", "5"))
+
+# 回滚执行模式下单条语句的最长执行时间（秒）；MySQL 的 max_execution_time 只作用于 SELECT
+DML_STATEMENT_TIMEOUT = int(os.getenv("DML_STATEMENT_TIMEOUT", "10"))
+
+# 模式生成列（自增、序列、标识列）缓存时间（秒）
+GENERATED_COLUMNS_CACHE_TTL = float(os.getenv("GENERATED_COLUMNS_CACHE_TTL", "300"))
+
+# DML 判题验证结果中代替本事务内生成的自增值/序列值的占位值
+GENERATED_VALUE = "<generated>"
+
 class DatabaseEngineService:
     """数据库引擎服务类"""
     
     def __init__(self):
         self.engines = {}
         self.sessions = {}
+        # (引擎类型, 模式名称) -> 生成列名集合
+        self.generated_columns_cache = TTLCache(ttl=GENERATED_COLUMNS_CACHE_TTL, maxsize=256)
+        # (模式名称, 引擎类型) -> 尚未结束（含失败后的清理）的创建尝试标记
+        self._provisioning: Dict[Tuple[str, str], object] = {}
+        self._provisioning_lock = threading.Lock()
         self._init_engines()
     
     def _init_engines(self):
@@ -168,6 +200,17 @@ class DatabaseEngineService:
         finally:
             session.close()
 
+    def _connect_opengauss(self):
+        """使用psycopg2直接连接OpenGauss（连接配置来自环境变量）"""
+        return psycopg2.connect(
+            host=os.getenv("OPENGAUSS_HOST", "localhost"),
+            port=os.getenv("OPENGAUSS_PORT", "15432"),
+            database=os.getenv("OPENGAUSS_DATABASE", "postgres"),
+            user=os.getenv("OPENGAUSS_USER", "gaussdb"),
+            password=os.getenv("OPENGAUSS_PASSWORD", "@Wyx778899"),
+            options="-c client_encoding=UTF8"  # 显式设置客户端编码为 UTF-8
+        )
+
     def _execute_sql_opengauss(self, sql: str) -> Tuple[bool, str, Optional[List[Dict]]]:
         """
         使用直接 psycopg2 连接执行 OpenGauss SQL
@@ -180,21 +223,7 @@ class DatabaseEngineService:
         """
         conn = None
         try:
-            # 从环境变量获取 OpenGauss 连接配置
-            host = os.getenv("OPENGAUSS_HOST", "localhost")
-            port = os.getenv("OPENGAUSS_PORT", "15432")
-            database = os.getenv("OPENGAUSS_DATABASE", "postgres")
-            user = os.getenv("OPENGAUSS_USER", "gaussdb")
-            password = os.getenv("OPENGAUSS_PASSWORD", "@Wyx778899")
-
-            # 使用psycopg2直接连接OpenGauss
-            conn = psycopg2.connect(
-                host=host,
-                port=port,
-                database=database,
-                user=user,
-                password=password
-            )
+            conn = self._connect_opengauss()
 
             with conn.cursor() as cur:
                 # 分割多个SQL语句
@@ -247,6 +276,720 @@ class DatabaseEngineService:
             if conn:
                 conn.close()
     
+    def _raw_connection(self, engine_type: str):
+        """获取 DBAPI 连接（批量导入需要驱动原生接口，如 psycopg2 的 copy_expert）"""
+        if engine_type == "opengauss":
+            return self._connect_opengauss()
+        engine = self.engines.get(engine_type)
+        return engine.raw_connection() if engine is not None else None
+
+    def execute_script(self, sql: str, engine_type: str = "mysql") -> Tuple[bool, str]:
+        """
+        在一个连接中执行建表及种子数据脚本，连续的字面量 INSERT 批量导入
+
+        PostgreSQL/OpenGauss 用 COPY FROM STDIN 导入，MySQL 合并为多行 INSERT；
+        建索引、追加外键的语句推迟到数据导入之后执行，唯一性和外键仍在导入时或建约束时
+        校验（MySQL 不关闭 FOREIGN_KEY_CHECKS/UNIQUE_CHECKS，各引擎的脚本各自校验）。
+        某组数据无法批量导入时（如值的类型需要隐式转换），回退为逐条执行原始语句。
+
+        Args:
+            sql: SQL 脚本
+            engine_type: 数据库引擎类型
+
+        Returns:
+            Tuple[bool, str]: (是否成功, 消息)
+        """
+        is_mysql = engine_type == "mysql"
+        steps, deferred = plan_script(sql, backslash_escapes=is_mysql)
+
+        conn = self._raw_connection(engine_type)
+        if conn is None:
+            return False, f"不支持的数据库引擎: {engine_type}"
+
+        try:
+            cur = conn.cursor()
+            try:
+                for step in steps:
+                    if isinstance(step, InsertRun):
+                        if is_mysql:
+                            self._insert_batches(cur, step)
+                        else:
+                            self._copy_rows(cur, step)
+                    else:
+                        cur.execute(step)
+
+                for statement in deferred:
+                    cur.execute(statement)
+
+                conn.commit()
+                return True, "执行成功"
+            finally:
+                cur.close()
+
+        except Exception as e:
+            conn.rollback()
+            error_msg = str(e.orig) if hasattr(e, 'orig') else str(e)
+            return False, f"SQL执行错误: {error_msg}"
+        finally:
+            self._reset_connection(conn, engine_type)
+            conn.close()
+
+    def _insert_batches(self, cur, run: InsertRun) -> None:
+        """把一组 INSERT 合并为每条 SEED_BATCH_ROWS 行的多行 INSERT 执行（沿用原始值文本）"""
+        for offset in range(0, len(run.raw_rows), SEED_BATCH_ROWS):
+            values = ", ".join(run.raw_rows[offset:offset + SEED_BATCH_ROWS])
+            cur.execute(f"INSERT INTO {run.table} {run.column_sql} VALUES {values}")
+
+    def _copy_rows(self, cur, run: InsertRun) -> None:
+        """用 COPY FROM STDIN 导入一组 INSERT 的数据，失败时回到保存点并改为多行 INSERT"""
+        cur.execute("SAVEPOINT bulk_seed")
+        try:
+            cur.copy_expert(f"COPY {run.table} {run.column_sql} FROM STDIN CSV", copy_csv_buffer(run.rows))
+        except psycopg2.Error as e:
+            print(f"COPY 导入 {run.table} 失败，改为多行 INSERT: {e}")
+            cur.execute("ROLLBACK TO SAVEPOINT bulk_seed")
+            self._insert_batches(cur, run)
+        cur.execute("RELEASE SAVEPOINT bulk_seed")
+
+    def _reset_connection(self, conn, engine_type: str) -> None:
+        """连接池中的连接归还前恢复脚本可能修改的会话设置（如 mysqldump 导出脚本中的 SET FOREIGN_KEY_CHECKS=0）"""
+        if engine_type == "opengauss":
+            return
+        try:
+            cur = conn.cursor()
+            if engine_type == "mysql":
+                cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+                cur.execute("SET UNIQUE_CHECKS = 1")
+            else:
+                cur.execute("RESET search_path")
+            cur.close()
+            conn.commit()
+        except Exception as e:
+            print(f"恢复{engine_type}连接会话设置失败: {e}")
+
+    def _quote_identifier(self, name: str, engine_type: str) -> str:
+        """引用表名"""
+        return f"`{name}`" if engine_type == "mysql" else f'"{name}"'
+
+    def _list_tables(self, cur, sql_schema: str) -> List[str]:
+        """列出模式中的所有基本表"""
+        cur.execute(
+            "SELECT table_name FROM information_schema.tables "
+            "WHERE lower(table_schema) = lower(%s) AND table_type = 'BASE TABLE' ORDER BY table_name",
+            (sql_schema,)
+        )
+        return [row[0] for row in cur.fetchall()]
+
+    def _copy_table_data_sql(self, source: str, target: str, table: str, engine_type: str) -> str:
+        """把源模式中一张表的数据复制到目标模式的语句"""
+        quoted = self._quote_identifier(table, engine_type)
+        # PostgreSQL 的 GENERATED ALWAYS 标识列需要显式允许写入
+        overriding = " OVERRIDING SYSTEM VALUE" if engine_type == "postgresql" else ""
+        return f"INSERT INTO {target}.{quoted}{overriding} SELECT * FROM {source}.{quoted}"
+
+    def _sequence_columns(self, cur, sql_schema: str, table: str, include_identity: bool = True) -> List[str]:
+        """PostgreSQL/OpenGauss 表中由序列生成值的列（serial 默认值，可选包括标识列）"""
+        condition = "(column_default LIKE 'nextval(%%' OR is_identity = 'YES')" if include_identity \
+            else "column_default LIKE 'nextval(%%'"
+        cur.execute(
+            "SELECT column_name FROM information_schema.columns "
+            f"WHERE lower(table_schema) = lower(%s) AND table_name = %s AND {condition}",
+            (sql_schema, table)
+        )
+        return [row[0] for row in cur.fetchall()]
+
+    def _detach_sequences(self, cur, sql_schema: str, table: str, engine_type: str) -> None:
+        """
+        LIKE ... INCLUDING ALL 复制的 serial 默认值仍是 nextval('<模板>.seq')，副本会共用并推进
+        模板的序列；为副本的每个 serial 列新建自己的序列（标识列复制时已带独立序列）
+        """
+        quoted_table = f"{sql_schema}.{self._quote_identifier(table, engine_type)}"
+        for column in self._sequence_columns(cur, sql_schema, table, include_identity=False):
+            sequence = f"{sql_schema}.{self._quote_identifier(f'{table}_{column}_seq', engine_type)}"
+            quoted_column = self._quote_identifier(column, engine_type)
+            cur.execute(f"CREATE SEQUENCE {sequence} OWNED BY {quoted_table}.{quoted_column}")
+            cur.execute(f"ALTER TABLE {quoted_table} ALTER COLUMN {quoted_column} SET DEFAULT nextval('{sequence}'::regclass)")
+
+    def _sync_sequences(self, cur, sql_schema: str, table: str, engine_type: str) -> None:
+        """复制数据后把副本的序列推进到已有最大值之后，后续 INSERT 不会与复制来的行冲突"""
+        quoted_table = f"{sql_schema}.{self._quote_identifier(table, engine_type)}"
+        for column in self._sequence_columns(cur, sql_schema, table):
+            cur.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, %s), "
+                f"COALESCE(MAX({self._quote_identifier(column, engine_type)}), 0) + 1, false) FROM {quoted_table}",
+                (quoted_table, column)
+            )
+
+    def clone_schema(self, source: str, target: str, engine_type: str) -> Tuple[bool, str]:
+        """
+        以已有模式为模板创建副本：逐表复制表结构，再在服务端用 INSERT ... SELECT 复制数据
+
+        复制在数据库内部完成，不需要重新执行建表和种子数据脚本。副本不包含外键约束；
+        PostgreSQL/OpenGauss 上副本的 serial 列使用自己的序列。
+
+        Args:
+            source: 模板模式名称
+            target: 副本模式名称
+            engine_type: 数据库引擎类型
+
+        Returns:
+            Tuple[bool, str]: (是否成功, 消息)
+        """
+        conn = self._raw_connection(engine_type)
+        if conn is None:
+            return False, f"不支持的数据库引擎: {engine_type}"
+
+        try:
+            cur = conn.cursor()
+            try:
+                tables = self._list_tables(cur, source)
+                cur.execute(f"CREATE SCHEMA {target}")
+                for table in tables:
+                    quoted = self._quote_identifier(table, engine_type)
+                    if engine_type == "mysql":
+                        cur.execute(f"CREATE TABLE {target}.{quoted} LIKE {source}.{quoted}")
+                    else:
+                        cur.execute(f"CREATE TABLE {target}.{quoted} (LIKE {source}.{quoted} INCLUDING ALL)")
+                        self._detach_sequences(cur, target, table, engine_type)
+                    cur.execute(self._copy_table_data_sql(source, target, table, engine_type))
+                    if engine_type != "mysql":
+                        self._sync_sequences(cur, target, table, engine_type)
+                conn.commit()
+                return True, "复制成功"
+            finally:
+                cur.close()
+        except Exception as e:
+            conn.rollback()
+            return False, f"复制模式失败: {e}"
+        finally:
+            conn.close()
+
+    def reset_schema_data(self, source: str, target: str, engine_type: str) -> Tuple[bool, str]:
+        """清空副本模式中的数据并重新从模板模式复制，表结构保持不变"""
+        conn = self._raw_connection(engine_type)
+        if conn is None:
+            return False, f"不支持的数据库引擎: {engine_type}"
+
+        try:
+            cur = conn.cursor()
+            try:
+                tables = self._list_tables(cur, source)
+                if set(tables) != set(self._list_tables(cur, target)):
+                    return False, "副本模式的表与模板不一致"
+                for table in tables:
+                    cur.execute(f"TRUNCATE TABLE {target}.{self._quote_identifier(table, engine_type)}")
+                for table in tables:
+                    cur.execute(self._copy_table_data_sql(source, target, table, engine_type))
+                    if engine_type != "mysql":
+                        self._sync_sequences(cur, target, table, engine_type)
+                conn.commit()
+                return True, "重置成功"
+            finally:
+                cur.close()
+        except Exception as e:
+            conn.rollback()
+            return False, f"重置模式数据失败: {e}"
+        finally:
+            conn.close()
+
+    def schema_setup_sql(self, sql_schema: str, engine_type: str) -> str:
+        """重建模式并切换到该模式的语句"""
+        if engine_type == "mysql":
+            return f"DROP SCHEMA IF EXISTS {sql_schema};\nCREATE SCHEMA {sql_schema};\nUSE {sql_schema};"
+        return f"DROP SCHEMA IF EXISTS {sql_schema} CASCADE;\nCREATE SCHEMA {sql_schema};\nSET search_path TO {sql_schema};"
+
+    def list_schemas(self, prefix: str, engine_type: str) -> List[str]:
+        """列出名称以 prefix 开头（不区分大小写）的模式"""
+        conn = self._raw_connection(engine_type)
+        if conn is None:
+            return []
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT schema_name FROM information_schema.schemata")
+            names = [row[0] for row in cur.fetchall() if row[0].lower().startswith(prefix.lower())]
+            cur.close()
+            return names
+        finally:
+            conn.rollback()
+            conn.close()
+
+    def drop_schema(self, sql_schema: str, engine_type: str) -> Tuple[bool, str]:
+        """删除指定引擎上的模式"""
+        cascade = "" if engine_type == "mysql" else " CASCADE"
+        success, message, _ = self.execute_sql(f"DROP SCHEMA IF EXISTS {sql_schema}{cascade}", engine_type)
+        if not success:
+            print(f"删除{engine_type}模式 {sql_schema} 失败: {message}")
+        return success, message
+
+    def _provision_engine(self, sql_schema: str, engine_type: str, script: str) -> Tuple[bool, str]:
+        """在单个引擎上重建模式并执行建表脚本"""
+        try:
+            return self.execute_script(self.schema_setup_sql(sql_schema, engine_type) + "\n" + script, engine_type)
+        except Exception as e:
+            return False, f"执行错误: {str(e)}"
+
+    def provision_schema(self, sql_schema: str, scripts: Dict[str, str],
+                         timeout: float = SCHEMA_PROVISION_TIMEOUT) -> Tuple[bool, Dict[str, str]]:
+        """
+        在多个引擎上并发创建模式并执行建表脚本
+
+        各引擎同时执行，总耗时约为最慢的一个引擎。任一引擎失败或超过时限时，所有引擎上的
+        该模式都会被删除，不会留下只在部分引擎上创建成功的模式；超时的引擎在其执行结束后
+        再删除，避免删除与建表交错。
+
+        每次调用使用独立的尝试标记，同一模式在某个引擎上的上一次尝试（包括超时后的删除）
+        结束前，新的调用直接返回失败，旧尝试的删除不会误删新尝试创建的模式。
+
+        Args:
+            sql_schema: 模式名称
+            scripts: 引擎类型 -> 建表脚本
+            timeout: 所有引擎共享的时限（秒）
+
+        Returns:
+            Tuple[bool, Dict[str, str]]: (是否全部成功, 引擎类型 -> 错误信息)
+        """
+        attempt = object()
+        with self._provisioning_lock:
+            busy = [engine_type for engine_type in scripts if (sql_schema, engine_type) in self._provisioning]
+            if busy:
+                return False, {engine_type: "该模式上一次创建尚未结束，请稍后重试" for engine_type in busy}
+            for engine_type in scripts:
+                self._provisioning[(sql_schema, engine_type)] = attempt
+
+        executor = ThreadPoolExecutor(max_workers=len(scripts), thread_name_prefix="schema-provision")
+        futures = {
+            executor.submit(self._provision_engine, sql_schema, engine_type, script): engine_type
+            for engine_type, script in scripts.items()
+        }
+        done, not_done = wait(futures, timeout=timeout)
+        executor.shutdown(wait=False)
+
+        errors = {}
+        for future in done:
+            success, message = future.result()
+            if not success:
+                errors[futures[future]] = message
+        for future in not_done:
+            errors[futures[future]] = f"超过 {timeout:g} 秒未完成"
+
+        if errors:
+            for future, engine_type in futures.items():
+                # 已完成的引擎立即删除，未完成的在执行结束后删除
+                future.add_done_callback(
+                    lambda _, engine_type=engine_type: self._abandon_provision(sql_schema, engine_type, attempt)
+                )
+        else:
+            for engine_type in scripts:
+                self._release_provision(sql_schema, engine_type, attempt)
+
+        return not errors, errors
+
+    def _abandon_provision(self, sql_schema: str, engine_type: str, attempt: object) -> None:
+        """删除失败的创建尝试留下的模式，之后才允许同一模式的新尝试"""
+        try:
+            with self._provisioning_lock:
+                current = self._provisioning.get((sql_schema, engine_type)) is attempt
+            if current:
+                self.drop_schema(sql_schema, engine_type)
+        finally:
+            self._release_provision(sql_schema, engine_type, attempt)
+
+    def _release_provision(self, sql_schema: str, engine_type: str, attempt: object) -> None:
+        """结束创建尝试（只移除本次尝试自己的标记）"""
+        with self._provisioning_lock:
+            if self._provisioning.get((sql_schema, engine_type)) is attempt:
+                del self._provisioning[(sql_schema, engine_type)]
+
+    def replace_schema(self, sql_schema: str, scripts: Dict[str, str],
+                       timeout: float = SCHEMA_PROVISION_TIMEOUT) -> Tuple[bool, Dict[str, str]]:
+        """
+        用新的建表脚本重建已有模式：先在临时模式中建好，所有引擎都成功后再逐个引擎替换
+
+        建表失败或超时时只删除临时模式，正在使用的模式在所有引擎上都保持原样。
+        替换在各引擎上分别进行（每个引擎内的替换是一次性的），某个引擎替换失败时
+        该引擎保留原模式，已替换的引擎不会撤回。
+
+        Args:
+            sql_schema: 模式名称
+            scripts: 引擎类型 -> 建表脚本
+            timeout: 所有引擎共享的建表时限（秒）
+
+        Returns:
+            Tuple[bool, Dict[str, str]]: (是否全部替换成功, 引擎类型 -> 错误信息)
+        """
+        staging = f"{sql_schema}_stg_{uuid.uuid4().hex[:8]}"
+        success, errors = self.provision_schema(staging, scripts, timeout)
+        if not success:
+            return False, errors
+
+        for engine_type in scripts:
+            success, message = self._swap_schema(staging, sql_schema, engine_type)
+            if not success:
+                errors[engine_type] = message
+            self.drop_schema(staging, engine_type)
+        return not errors, errors
+
+    def _swap_schema(self, staging: str, target: str, engine_type: str) -> Tuple[bool, str]:
+        """把临时模式替换为目标模式，原目标模式改名后删除"""
+        conn = self._raw_connection(engine_type)
+        if conn is None:
+            return False, f"不支持的数据库引擎: {engine_type}"
+
+        backup = f"{target}_old_{uuid.uuid4().hex[:8]}"
+        try:
+            cur = conn.cursor()
+            try:
+                if engine_type == "mysql":
+                    # MySQL 不能重命名模式：在一条 RENAME TABLE 中把原表移到备份模式、新表移入目标模式
+                    renames = [
+                        f"{source}.{quoted} TO {destination}.{quoted}"
+                        for source, destination in ((target, backup), (staging, target))
+                        for quoted in (self._quote_identifier(table, engine_type)
+                                       for table in self._list_tables(cur, source))
+                    ]
+                    cur.execute(f"CREATE SCHEMA IF NOT EXISTS {target}")
+                    cur.execute(f"CREATE SCHEMA {backup}")
+                    if renames:
+                        cur.execute("RENAME TABLE " + ", ".join(renames))
+                else:
+                    cur.execute(
+                        "SELECT 1 FROM information_schema.schemata WHERE lower(schema_name) = lower(%s)", (target,)
+                    )
+                    if cur.fetchone():
+                        cur.execute(f"ALTER SCHEMA {target} RENAME TO {backup}")
+                    cur.execute(f"ALTER SCHEMA {staging} RENAME TO {target}")
+                conn.commit()
+            finally:
+                cur.close()
+        except Exception as e:
+            conn.rollback()
+            error_msg = str(e.orig) if hasattr(e, 'orig') else str(e)
+            return False, f"替换模式失败: {error_msg}"
+        finally:
+            conn.close()
+
+        self.drop_schema(backup, engine_type)
+        return True, "替换成功"
+
+    def _rows_to_dicts(self, columns: List[str], rows) -> List[Dict]:
+        """把查询结果转换为字典列表（处理方式与 execute_sql 一致）"""
+        data = []
+        for row in rows:
+            row_dict = {}
+            for column, value in zip(columns, row):
+                if hasattr(value, 'isoformat'):  # datetime对象
+                    value = value.isoformat()
+                elif isinstance(value, (bytes, bytearray)):  # 二进制数据
+                    value = str(value)
+                row_dict[column] = value
+            data.append(row_dict)
+        return data
+
+    def introspect_schema(self, sql_schema: str, engine_type: str = "postgresql") -> List[Dict[str, Any]]:
+        """
+        从 information_schema 读取模式中各表的列、主键、唯一约束和外键
+
+        Args:
+            sql_schema: 模式名称
+            engine_type: 数据库引擎类型
+
+        Returns:
+            List[Dict[str, Any]]: 表列表，每项包含 name、columns、primary_key、unique、foreign_keys
+
+        Raises:
+            ValueError: 数据库引擎不可用
+        """
+        conn = self._raw_connection(engine_type)
+        if conn is None:
+            raise ValueError(f"不支持的数据库引擎: {engine_type}")
+
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    "SELECT c.table_name, c.column_name, c.data_type, c.character_maximum_length, "
+                    "c.numeric_precision, c.numeric_scale, c.is_nullable, c.column_default "
+                    "FROM information_schema.columns c JOIN information_schema.tables t "
+                    "ON t.table_schema = c.table_schema AND t.table_name = c.table_name "
+                    "WHERE lower(c.table_schema) = lower(%s) AND t.table_type = 'BASE TABLE' "
+                    "ORDER BY c.table_name, c.ordinal_position",
+                    (sql_schema,)
+                )
+                column_rows = cur.fetchall()
+
+                cur.execute(
+                    "SELECT tc.table_name, tc.constraint_name, tc.constraint_type, kcu.column_name "
+                    "FROM information_schema.table_constraints tc JOIN information_schema.key_column_usage kcu "
+                    "ON kcu.constraint_schema = tc.constraint_schema AND kcu.constraint_name = tc.constraint_name "
+                    "AND kcu.table_name = tc.table_name "
+                    "WHERE lower(tc.table_schema) = lower(%s) AND tc.constraint_type IN ('PRIMARY KEY', 'UNIQUE') "
+                    "ORDER BY tc.table_name, tc.constraint_name, kcu.ordinal_position",
+                    (sql_schema,)
+                )
+                key_rows = cur.fetchall()
+
+                if engine_type == "mysql":
+                    cur.execute(
+                        "SELECT table_name, constraint_name, column_name, referenced_table_name, referenced_column_name "
+                        "FROM information_schema.key_column_usage "
+                        "WHERE lower(table_schema) = lower(%s) AND referenced_table_name IS NOT NULL "
+                        "ORDER BY table_name, constraint_name, ordinal_position",
+                        (sql_schema,)
+                    )
+                else:
+                    cur.execute(
+                        "SELECT kcu.table_name, kcu.constraint_name, kcu.column_name, ref.table_name, ref.column_name "
+                        "FROM information_schema.referential_constraints rc "
+                        "JOIN information_schema.key_column_usage kcu "
+                        "ON kcu.constraint_schema = rc.constraint_schema AND kcu.constraint_name = rc.constraint_name "
+                        "JOIN information_schema.key_column_usage ref "
+                        "ON ref.constraint_schema = rc.unique_constraint_schema AND ref.constraint_name = rc.unique_constraint_name "
+                        "AND ref.ordinal_position = kcu.position_in_unique_constraint "
+                        "WHERE lower(rc.constraint_schema) = lower(%s) "
+                        "ORDER BY kcu.table_name, kcu.constraint_name, kcu.ordinal_position",
+                        (sql_schema,)
+                    )
+                foreign_key_rows = cur.fetchall()
+            finally:
+                cur.close()
+        finally:
+            conn.rollback()
+            conn.close()
+
+        tables: Dict[str, Dict[str, Any]] = {}
+        for table_name, column_name, data_type, length, precision, scale, is_nullable, default in column_rows:
+            if length is not None:
+                column_type = f"{data_type}({length})"
+            elif precision is not None and scale and data_type.lower() in ("decimal", "numeric"):
+                column_type = f"{data_type}({precision},{scale})"
+            else:
+                column_type = data_type
+            table = tables.setdefault(table_name, {
+                "name": table_name, "columns": [], "primary_key": [], "unique": [], "foreign_keys": []
+            })
+            table["columns"].append({
+                "name": column_name,
+                "type": column_type,
+                "nullable": str(is_nullable).upper() == "YES",
+                "default": None if default is None else str(default)
+            })
+
+        unique_constraints: Dict[Tuple[str, str], List[str]] = {}
+        for table_name, constraint_name, constraint_type, column_name in key_rows:
+            if table_name not in tables:
+                continue
+            if constraint_type == "PRIMARY KEY":
+                tables[table_name]["primary_key"].append(column_name)
+            else:
+                unique_constraints.setdefault((table_name, constraint_name), []).append(column_name)
+        for (table_name, _), columns in unique_constraints.items():
+            tables[table_name]["unique"].append(columns)
+
+        foreign_keys: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for table_name, constraint_name, column_name, ref_table, ref_column in foreign_key_rows:
+            if table_name not in tables:
+                continue
+            foreign_key = foreign_keys.setdefault((table_name, constraint_name), {
+                "name": constraint_name, "columns": [], "ref_table": ref_table, "ref_columns": []
+            })
+            foreign_key["columns"].append(column_name)
+            foreign_key["ref_columns"].append(ref_column)
+        for (table_name, _), foreign_key in foreign_keys.items():
+            tables[table_name]["foreign_keys"].append(foreign_key)
+
+        return list(tables.values())
+
+    def _foreign_schemas(self, cur, sql_schema: str) -> Set[str]:
+        """sql_schema 以外的所有模式名称（小写），与 sql_schema 中表名相同的除外（避免与表名限定冲突）"""
+        cur.execute("SELECT schema_name FROM information_schema.schemata")
+        schemas = {row[0].lower() for row in cur.fetchall()}
+        tables = {table.lower() for table in self._list_tables(cur, sql_schema)}
+        return schemas - tables - {sql_schema.lower()}
+
+    def execute_in_rollback(self, sql_schema: str, dml_sql: str, check_sql: str, engine_type: str = "mysql",
+                            template_schema: Optional[str] = None) -> Tuple[bool, str, Optional[List[Dict]]]:
+        """
+        在一个事务中执行 DML 语句和验证查询，无论成功与否最后都回滚
+
+        验证查询看到的是 DML 执行后的数据，事务回滚后共享的教学模式不留下任何修改；
+        其他连接在此期间读不到未提交的数据。只允许执行 DML_STATEMENT_TYPES 中的语句，
+        DDL、事务控制、ANALYZE/OPTIMIZE 等可能提交事务的语句一律拒绝；限定名不能引用
+        其他模式（如 other_schema.t），语句只作用于 sql_schema。
+        等待行锁超过 DML_LOCK_TIMEOUT 秒、单条语句超过 DML_STATEMENT_TIMEOUT 秒时报错，
+        避免并发提交长时间互相阻塞。
+
+        回滚不会归还自增值和序列值，同一条 INSERT 每次执行得到的主键都不同：验证结果中
+        验证查询所查表的生成列，若值大于执行 DML 前该列的最大值（即本事务内生成的值），
+        替换为 GENERATED_VALUE；已有行的主键照常比较。
+
+        Args:
+            sql_schema: 教学模式名称
+            dml_sql: DML 语句（可包含多条）
+            check_sql: 验证查询（SELECT）
+            engine_type: 数据库引擎类型
+            template_schema: 与 sql_schema 结构相同的模式（沙箱传模板名），按它查询生成列
+
+        Returns:
+            Tuple[bool, str, Optional[List[Dict]]]: (是否成功, 消息, 验证查询结果)
+        """
+        is_mysql = engine_type == "mysql"
+        statements, error_msg = check_dml_script(dml_sql, backslash_escapes=is_mysql)
+        if error_msg:
+            return False, error_msg, None
+
+        conn = self._raw_connection(engine_type)
+        if conn is None:
+            return False, f"不支持的数据库引擎: {engine_type}", None
+
+        try:
+            cur = conn.cursor()
+            try:
+                _, error_msg = check_dml_script(dml_sql, is_mysql, self._foreign_schemas(cur, sql_schema))
+                if error_msg:
+                    return False, error_msg, None
+
+                if is_mysql:
+                    cur.execute(f"USE {sql_schema}")
+                    cur.execute(f"SET SESSION innodb_lock_wait_timeout = {DML_LOCK_TIMEOUT}")
+                    cur.execute(f"SET SESSION max_execution_time = {DML_STATEMENT_TIMEOUT * 1000}")
+                else:
+                    # SET LOCAL 只在当前事务内有效，回滚后自动恢复
+                    cur.execute(f"SET LOCAL search_path TO {sql_schema}")
+                    cur.execute(f"SET LOCAL lock_timeout = '{DML_LOCK_TIMEOUT}s'")
+                    cur.execute(f"SET LOCAL statement_timeout = '{DML_STATEMENT_TIMEOUT}s'")
+
+                watermarks = self._generated_watermarks(
+                    cur, sql_schema, template_schema or sql_schema, check_sql, engine_type
+                )
+
+                for statement in statements:
+                    cur.execute(statement)
+
+                cur.execute(check_sql.strip().rstrip(";"))
+                columns = [desc[0] for desc in cur.description]
+                rows = self._rows_to_dicts(columns, cur.fetchall())
+                return True, "执行成功", self._mask_generated(rows, watermarks)
+            finally:
+                cur.close()
+
+        except Exception as e:
+            error_msg = str(e.orig) if hasattr(e, 'orig') else str(e)
+            return False, f"SQL执行错误: {error_msg}", None
+        finally:
+            conn.rollback()
+            if is_mysql:
+                try:
+                    cur = conn.cursor()
+                    cur.execute("SET SESSION innodb_lock_wait_timeout = DEFAULT")
+                    cur.execute("SET SESSION max_execution_time = DEFAULT")
+                    cur.close()
+                except Exception as e:
+                    print(f"恢复mysql连接会话设置失败: {e}")
+            conn.close()
+
+    def generated_columns(self, sql_schema: str, engine_type: str) -> Dict[str, FrozenSet[str]]:
+        """
+        模式中各表值由数据库生成的列（表名、列名均小写）：MySQL 的 AUTO_INCREMENT 列，
+        PostgreSQL/OpenGauss 的 serial（nextval 默认值）和标识列。结果按模式缓存
+        """
+        def load():
+            if engine_type == "mysql":
+                condition = "extra LIKE '%%auto_increment%%'"
+            else:
+                condition = "(column_default LIKE 'nextval(%%' OR is_identity = 'YES')"
+            conn = self._raw_connection(engine_type)
+            if conn is None:
+                return {}
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    "SELECT table_name, column_name FROM information_schema.columns "
+                    f"WHERE lower(table_schema) = lower(%s) AND {condition}",
+                    (sql_schema,)
+                )
+                columns: Dict[str, Set[str]] = {}
+                for table_name, column_name in cur.fetchall():
+                    columns.setdefault(table_name.lower(), set()).add(column_name.lower())
+                cur.close()
+                return {table: frozenset(names) for table, names in columns.items()}
+            finally:
+                conn.rollback()
+                conn.close()
+
+        return self.generated_columns_cache.get_or_load((engine_type, sql_schema.lower()), load)
+
+    def invalidate_generated_columns(self, sql_schema: str) -> None:
+        """清除模式在所有引擎上的生成列缓存"""
+        for engine_type in PROVISION_ENGINES:
+            self.generated_columns_cache.invalidate((engine_type, sql_schema.lower()))
+
+    def _generated_watermarks(self, cur, sql_schema: str, template_schema: str, check_sql: str,
+                              engine_type: str) -> Dict[str, Any]:
+        """
+        执行 DML 前，验证查询所查各表的生成列当前最大值（列名小写 -> 最大值）
+
+        新生成的自增值/序列值都大于该值。多个表有同名生成列时取其中最大的值。
+        """
+        generated = self.generated_columns(template_schema, engine_type)
+        watermarks: Dict[str, Any] = {}
+        for table in referenced_tables(check_sql, backslash_escapes=engine_type == "mysql"):
+            for column in generated.get(table, ()):
+                cur.execute(
+                    f"SELECT COALESCE(MAX({self._quote_identifier(column, engine_type)}), 0) "
+                    f"FROM {sql_schema}.{self._quote_identifier(table, engine_type)}"
+                )
+                value = cur.fetchone()[0]
+                watermarks[column] = max(watermarks.get(column, value), value)
+        return watermarks
+
+    def _mask_generated(self, rows: List[Dict], watermarks: Dict[str, Any]) -> List[Dict]:
+        """把本事务内生成的值（大于执行前最大值）替换为 GENERATED_VALUE"""
+        if not watermarks:
+            return rows
+        for row in rows:
+            for key, value in row.items():
+                watermark = watermarks.get(key.lower())
+                if watermark is not None and isinstance(value, (int, float)) and value > watermark:
+                    row[key] = GENERATED_VALUE
+        return rows
+
+    def rows_match(self, actual: List[Dict], expected: List[Dict], is_ordered: bool = False) -> bool:
+        """比较两个查询结果（有序时逐行比较，无序时按多重集合比较）"""
+        if len(actual) != len(expected):
+            return False
+
+        def normalize(row: Dict) -> str:
+            return json.dumps(row, sort_keys=True, default=str)
+
+        actual_rows = [normalize(row) for row in actual]
+        expected_rows = [normalize(row) for row in expected]
+        if is_ordered:
+            return actual_rows == expected_rows
+        return sorted(actual_rows) == sorted(expected_rows)
+
+    def judge_dml_in_rollback(self, sql_schema: str, engine_type: str, answer_sql: str, reference_sql: str,
+                              check_sql: str, is_ordered: bool = False) -> Tuple[int, str]:
+        """
+        以回滚执行模式判定 DML 答案：学生语句和标准答案各在一个回滚的事务中执行，比较验证查询结果
+
+        两次执行分配到的自增/序列值不同，本事务内生成的值在验证结果中统一为 GENERATED_VALUE
+        （见 execute_in_rollback），已有行的主键照常比较。
+
+        Returns:
+            Tuple[int, str]: (结果类型 0正确 1语法错误 2结果错误, 消息)
+        """
+        success, error_msg, expected = self.execute_in_rollback(sql_schema, reference_sql, check_sql, engine_type)
+        if not success:
+            raise RuntimeError(f"标准答案执行失败: {error_msg}")
+
+        success, error_msg, actual = self.execute_in_rollback(sql_schema, answer_sql, check_sql, engine_type)
+        if not success:
+            return 1, f"语法错误: {error_msg}"
+
+        if self.rows_match(actual, expected, is_ordered):
+            return 0, "结果正确"
+        return 2, "结果错误"
+
     def compare_results_unordered(self, student_sql: str, answer_sql: str, engine_type: str = "postgresql") -> Tuple[bool, str]:
         """
         比较无序结果（使用EXCEPT ALL）
@@ -355,3 +1098,11 @@ class DatabaseEngineService:
 
 # 全局数据库引擎服务实例
 database_engine_service = DatabaseEngineService()
+
+
+@schema_version_service.subscribe
+def _invalidate_generated_columns(change: SchemaChange) -> None:
+    """模式重建后清除新旧模式名称的生成列缓存"""
+    database_engine_service.invalidate_generated_columns(change.sql_schema)
+    if change.previous_sql_schema:
+        database_engine_service.invalidate_generated_columns(change.previous_sql_schema)
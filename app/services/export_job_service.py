@@ -0,0 +1,425 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple, Iterator
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models import AnswerRecord, CourseSelection, Problem, Semester, Student
+from models.base import SessionLocal
+from utils.ttl_cache import TTLCache
+
+# 导出文件缓存目录及磁盘配额
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "export_cache"))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# 最近使用（生成或下载）未超过该时间（秒）的文件不参与配额淘汰，其他进程刚生成或正在下载的文件不会被删除
+EXPORT_CACHE_MIN_AGE = float(os.getenv("EXPORT_CACHE_MIN_AGE", "600"))
+
+# 任务状态文件目录及保留时间（秒）
+EXPORT_JOB_DIR = os.path.join(EXPORT_CACHE_DIR, "jobs")
+EXPORT_JOB_TTL = 24 * 3600
+
+_JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+# 后台导出线程数
+EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "2"))
+
+# 任务状态
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class ExportJob:
+    """后台导出任务"""
+    job_id: str
+    kind: str
+    params: Dict[str, Any]
+    owner: str
+    cache_key: str
+    extension: str
+    status: str = JOB_PENDING
+    error: Optional[str] = None
+    media_type: Optional[str] = None
+    cached: bool = False
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+
+    @property
+    def file_path(self) -> str:
+        return os.path.join(EXPORT_CACHE_DIR, f"{self.cache_key}.{self.extension}")
+
+    @property
+    def filename(self) -> str:
+        return f"{self.kind}-{self.created_at.strftime('%Y%m%d%H%M%S')}.{self.extension}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat()
+        data["finished_at"] = self.finished_at.isoformat() if self.finished_at else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExportJob":
+        data = dict(data)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        data["finished_at"] = datetime.fromisoformat(data["finished_at"]) if data.get("finished_at") else None
+        return cls(**data)
+
+
+class ExportJobService:
+    """后台导出任务服务类
+
+    提交导出后立即返回任务ID，文件在后台线程中生成并缓存到本地磁盘。缓存键由导出类型、
+    参数和数据版本共同决定：数据未变化时重复导出直接命中缓存；数据变化后数据版本不同，
+    会生成新文件。缓存目录超过磁盘配额时按最近使用时间淘汰最旧的文件。
+
+    任务状态除保存在进程内外，每次变化时写入缓存目录下的 jobs/<任务ID>.json，
+    由其他工作进程接收的查询和下载请求从状态文件读取任务；缓存文件和状态文件在共用
+    EXPORT_CACHE_DIR 的所有进程间共享（多台机器部署时该目录需为共享存储）。
+    """
+
+    # 导出类型 -> 允许的格式（第一个为默认格式）
+    FORMATS = {
+        "scores": ("CSV", "XLSX"),
+        "answer_records": ("CSV", "NDJSON"),
+        "dataset": ("XLSX", "JSON", "XML"),
+    }
+
+    def __init__(self):
+        self.jobs = TTLCache(ttl=EXPORT_JOB_TTL, maxsize=1000)
+        self._inflight: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=EXPORT_JOB_WORKERS, thread_name_prefix="export-job")
+
+    def submit(self, kind: str, params: Dict[str, Any], owner: str, db: Session) -> ExportJob:
+        """
+        提交导出任务
+
+        Args:
+            kind: 导出类型（scores、answer_records、dataset）
+            params: 导出参数
+            owner: 提交者（教师工号），只有提交者可以查询和下载
+            db: 数据库会话（用于计算数据版本）
+
+        Returns:
+            ExportJob: 导出任务；命中缓存时状态直接为 done
+
+        Raises:
+            ValueError: 导出类型或参数无效
+        """
+        params = self._normalize_params(kind, params)
+        version = self._data_version(kind, params, db)
+        cache_key = hashlib.sha256(
+            json.dumps({"kind": kind, "params": params, "owner": owner, "version": version},
+                       sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()
+
+        job = ExportJob(
+            job_id=uuid.uuid4().hex,
+            kind=kind,
+            params=params,
+            owner=owner,
+            cache_key=cache_key,
+            extension=params["format"].lower()
+        )
+
+        with self._lock:
+            # 相同导出正在生成时复用该任务
+            inflight_id = self._inflight.get(cache_key)
+            inflight_job = self.jobs.get(inflight_id) if inflight_id else None
+            if inflight_job and inflight_job.status in (JOB_PENDING, JOB_RUNNING):
+                return inflight_job
+
+            if os.path.exists(job.file_path):
+                os.utime(job.file_path)
+                job.status = JOB_DONE
+                job.cached = True
+                job.media_type = self._media_type(kind, params["format"])
+                job.finished_at = datetime.now()
+                self.jobs.set(job.job_id, job)
+                self._save(job)
+                return job
+
+            self.jobs.set(job.job_id, job)
+            self._inflight[cache_key] = job.job_id
+        self._save(job)
+
+        self._executor.submit(self._run, job)
+        return job
+
+    def get_job(self, job_id: str, owner: str) -> Optional[ExportJob]:
+        """获取任务（只返回提交者自己的任务）；本进程没有的任务从状态文件读取"""
+        job = self.jobs.get(job_id) or self._load(job_id)
+        if job is None or job.owner != owner:
+            return None
+        return job
+
+    def get_artifact(self, job_id: str, owner: str) -> Optional[ExportJob]:
+        """
+        获取已完成且缓存文件仍存在的任务，并刷新文件的最近使用时间
+
+        刷新后的文件在 EXPORT_CACHE_MIN_AGE 秒内不会被任何进程的配额淘汰删除，下载期间文件保持存在。
+        """
+        job = self.get_job(job_id, owner)
+        if job is None or job.status != JOB_DONE:
+            return None
+        try:
+            os.utime(job.file_path)
+        except FileNotFoundError:
+            return None
+        return job
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(EXPORT_JOB_DIR, f"{job_id}.json")
+
+    def _save(self, job: ExportJob) -> None:
+        """把任务状态写入状态文件（先写临时文件再原子替换）"""
+        try:
+            os.makedirs(EXPORT_JOB_DIR, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=EXPORT_JOB_DIR, suffix=".part")
+            with os.fdopen(fd, "w", encoding="utf-8") as output:
+                json.dump(job.to_dict(), output, ensure_ascii=False, default=str)
+            os.replace(temp_path, self._job_path(job.job_id))
+        except OSError as e:
+            print(f"保存导出任务状态失败: {e}")
+
+    def _load(self, job_id: str) -> Optional[ExportJob]:
+        """从状态文件读取其他进程提交的任务，不存在或已过期时返回None"""
+        if not _JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        path = self._job_path(job_id)
+        try:
+            if time.time() - os.path.getmtime(path) > EXPORT_JOB_TTL:
+                return None
+            with open(path, encoding="utf-8") as source:
+                return ExportJob.from_dict(json.load(source))
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+    def _normalize_params(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """校验并规范化导出参数，使相同含义的请求得到相同的缓存键"""
+        if kind not in self.FORMATS:
+            raise ValueError(f"不支持的导出类型: {kind}，仅支持 {'、'.join(self.FORMATS)}")
+
+        export_format = (params.get("format") or self.FORMATS[kind][0]).upper()
+        if export_format not in self.FORMATS[kind]:
+            raise ValueError(f"{kind} 导出仅支持 {'、'.join(self.FORMATS[kind])} 格式")
+
+        if kind == "scores":
+            if params.get("course_id") is None:
+                raise ValueError("导出分数需要 course_id")
+            return {
+                "course_id": int(params["course_id"]),
+                "class_name": params.get("class_name") or None,
+                "format": export_format
+            }
+        if kind == "answer_records":
+            if not params.get("semester_ids"):
+                raise ValueError("导出答题记录需要 semester_ids")
+            return {
+                "semester_ids": sorted({int(semester_id) for semester_id in params["semester_ids"]}),
+                "format": export_format
+            }
+        if not params.get("schema_name"):
+            raise ValueError("导出数据集需要 schema_name")
+        return {
+            "schema_name": params["schema_name"],
+            "engine_type": params.get("engine_type") or "mysql",
+            "format": export_format
+        }
+
+    def _data_version(self, kind: str, params: Dict[str, Any], db: Session) -> str:
+        """
+        计算导出数据的版本：导出内容可能发生变化时版本随之变化
+
+        分数导出直接对导出的各行（学号、姓名、班级、学期、分数）求摘要；答题记录导出对
+        范围内记录的数量和最大ID（记录只追加）、范围内学生的学号以及题目内容求摘要。
+        """
+        if kind == "scores":
+            query = db.query(
+                Student.student_id, Student.student_name, Student.class_,
+                Semester.semester_name, CourseSelection.score
+            ).select_from(CourseSelection).join(
+                Student, CourseSelection.student_id == Student.id
+            ).join(
+                Semester, CourseSelection.semester_id == Semester.semester_id
+            ).filter(CourseSelection.course_id == params["course_id"])
+            if params["class_name"]:
+                query = query.filter(Student.class_ == params["class_name"])
+            version = [self._rows_digest(query.order_by(CourseSelection.id))]
+        elif kind == "answer_records":
+            student_scope = select(CourseSelection.student_id).where(
+                CourseSelection.semester_id.in_(params["semester_ids"])
+            )
+            records = db.query(func.count(AnswerRecord.id), func.max(AnswerRecord.id)).filter(
+                AnswerRecord.student_id.in_(student_scope)
+            ).one()
+            students = db.query(Student.id, Student.student_id).filter(Student.id.in_(student_scope))
+            problems = db.query(Problem.problem_id, Problem.problem_content)
+            version = [
+                list(records),
+                self._rows_digest(students.order_by(Student.id)),
+                self._rows_digest(problems.order_by(Problem.problem_id))
+            ]
+        else:
+            from services.export_service import export_service
+            schema = export_service.resolve_schema(params["schema_name"], db)
+            version = [schema.schema_id, schema.schema_version, schema.schema_checksum] if schema else None
+        return json.dumps(version, default=str)
+
+    def _rows_digest(self, query) -> str:
+        """逐批读取查询结果并计算摘要，内存占用与行数无关"""
+        digest = hashlib.sha256()
+        for row in query.yield_per(1000):
+            digest.update(json.dumps(list(row), ensure_ascii=False, default=str).encode("utf-8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def _media_type(self, kind: str, export_format: str) -> str:
+        """导出文件的媒体类型"""
+        return {
+            "CSV": "text/csv; charset=utf-8",
+            "NDJSON": "application/x-ndjson",
+            "XLSX": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            "JSON": "application/json; charset=utf-8",
+            "XML": "application/xml; charset=utf-8",
+        }[export_format]
+
+    def _build(self, job: ExportJob, db: Session) -> Tuple[Optional[Iterator], Optional[str]]:
+        """生成导出内容流，返回 (内容流, 错误信息)"""
+        from services.teacher_service import teacher_service
+        params = job.params
+
+        if job.kind == "scores":
+            from services.identity_service import identity_service
+            teacher = identity_service.resolve("teacher", job.owner, db)
+            if not teacher:
+                return None, "教师不存在"
+            content, error, _ = teacher_service.export_scores(
+                teacher=teacher,
+                course_id=params["course_id"],
+                class_name=params["class_name"],
+                export_format=params["format"],
+                db=db
+            )
+            return content, error
+
+        if job.kind == "answer_records":
+            from utils.stream_writers import iter_csv, iter_ndjson
+            records = teacher_service.iter_student_answer_records(semester_ids=params["semester_ids"], db=db)
+            if params["format"] == "CSV":
+                return iter_csv(records, fieldnames=["student_id", "problem_content", "result_type", "answer_content", "timestep"]), None
+            return iter_ndjson(records), None
+
+        content, error, _ = teacher_service.export_dataset(
+            schema_name=params["schema_name"],
+            format=params["format"],
+            db=db,
+            engine_type=params["engine_type"]
+        )
+        return content, error
+
+    def _run(self, job: ExportJob) -> None:
+        """在后台线程中生成导出文件并写入缓存目录"""
+        job.status = JOB_RUNNING
+        self._save(job)
+        db = SessionLocal()
+        temp_path = None
+        try:
+            content, error = self._build(job, db)
+            if content is None:
+                job.status = JOB_FAILED
+                job.error = error
+                return
+
+            os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+            # 先写临时文件再原子替换，下载方不会读到写了一半的文件
+            fd, temp_path = tempfile.mkstemp(dir=EXPORT_CACHE_DIR, suffix=".part")
+            with os.fdopen(fd, "wb") as output:
+                for chunk in content:
+                    output.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            os.replace(temp_path, job.file_path)
+            temp_path = None
+
+            job.media_type = self._media_type(job.kind, job.params["format"])
+            job.status = JOB_DONE
+            self._enforce_quota(keep=job.file_path)
+
+        except Exception as e:
+            print(f"后台导出失败: {e}")
+            job.status = JOB_FAILED
+            job.error = f"导出失败: {str(e)}"
+        finally:
+            job.finished_at = datetime.now()
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            self._save(job)
+            with self._lock:
+                if self._inflight.get(job.cache_key) == job.job_id:
+                    del self._inflight[job.cache_key]
+            db.close()
+
+    def _enforce_quota(self, keep: Optional[str] = None) -> List[str]:
+        """
+        缓存目录超过磁盘配额时，按最近使用时间从旧到新删除文件；刚生成的文件和最近
+        EXPORT_CACHE_MIN_AGE 秒内生成或下载过的文件不删除。同时清理过期的任务状态文件
+        """
+        self._expire_job_files()
+
+        now = time.time()
+        entries = []
+        for name in os.listdir(EXPORT_CACHE_DIR):
+            path = os.path.join(EXPORT_CACHE_DIR, name)
+            if name.endswith(".part") or not os.path.isfile(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # 其他进程刚刚删除
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, path in sorted(entries):
+            if total <= EXPORT_CACHE_MAX_BYTES:
+                break
+            if keep and os.path.abspath(path) == os.path.abspath(keep):
+                continue
+            try:
+                # 重新读取最近使用时间：列目录之后可能刚被下载
+                if now - os.path.getmtime(path) < EXPORT_CACHE_MIN_AGE:
+                    continue
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted.append(path)
+        return evicted
+
+    def _expire_job_files(self) -> None:
+        """删除超过 EXPORT_JOB_TTL 的任务状态文件"""
+        if not os.path.isdir(EXPORT_JOB_DIR):
+            return
+        deadline = time.time() - EXPORT_JOB_TTL
+        for name in os.listdir(EXPORT_JOB_DIR):
+            path = os.path.join(EXPORT_JOB_DIR, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+# 全局后台导出任务服务实例
+export_job_service = ExportJobService()
@@ -0,0 +1,98 @@
+from datetime import datetime
+from typing import Optional, Tuple, Iterator
+from sqlalchemy import MetaData, Table, select, inspect, or_
+from sqlalchemy.orm import Session
+from models import DatabaseSchema
+from services.database_engine_service import database_engine_service
+from utils.stream_writers import TableStream, iter_json_tables, iter_xml_tables, iter_xlsx
+
+# 导出格式 -> (媒体类型, 扩展名)
+EXPORT_FORMATS = {
+    "XLSX": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "JSON": ("application/json; charset=utf-8", "json"),
+    "XML": ("application/xml; charset=utf-8", "xml"),
+}
+
+# 支持导出的数据库引擎（openGauss 与 PostgreSQL 数据一致，从 MySQL 或 PostgreSQL 导出即可）
+EXPORT_ENGINES = ("mysql", "postgresql")
+
+class ExportService:
+    """数据集导出服务类
+
+    从教学数据库模式中逐表读取数据，通过服务端游标分批取行并直接交给流式写入器，
+    导出大表时内存占用固定。
+    """
+
+    def resolve_schema(self, schema_name: str, db: Session) -> Optional[DatabaseSchema]:
+        """按实际模式名（sql_schema）或显示名称（schema_name）查找数据库模式"""
+        return db.query(DatabaseSchema).filter(
+            or_(DatabaseSchema.sql_schema == schema_name, DatabaseSchema.schema_name == schema_name)
+        ).order_by(DatabaseSchema.schema_id).first()
+
+    def iter_schema_tables(self, sql_schema: str, engine_type: str = "mysql",
+                           batch_size: int = 1000) -> Iterator[TableStream]:
+        """
+        逐表产出 (表名, 列名列表, 行迭代器)
+
+        整个导出期间占用一个连接，每张表的数据通过服务端游标按 batch_size 分批读取；
+        调用方必须在读取下一张表之前消费完当前表的行。
+        """
+        engine = database_engine_service.get_engine(engine_type)
+        with engine.connect() as connection:
+            table_names = inspect(connection).get_table_names(schema=sql_schema)
+            for table_name in sorted(table_names):
+                table = Table(table_name, MetaData(), schema=sql_schema, autoload_with=connection)
+                result = connection.execution_options(
+                    stream_results=True,
+                    yield_per=batch_size
+                ).execute(select(table))
+                try:
+                    yield table_name, list(result.keys()), result
+                finally:
+                    result.close()
+
+    def export_schema(self, schema_name: str, export_format: str, db: Session,
+                      engine_type: str = "mysql") -> Tuple[Optional[Iterator], Optional[str], Optional[str]]:
+        """
+        导出数据库模式中所有表的数据
+
+        Args:
+            schema_name: 数据库模式名称
+            export_format: 导出格式（XLSX、JSON、XML）
+            db: 数据库会话
+            engine_type: 数据来源引擎（mysql、postgresql）
+
+        Returns:
+            Tuple[Optional[Iterator], Optional[str], Optional[str]]: (文件流, 错误信息, 媒体类型)
+        """
+        export_format = export_format.upper()
+        if export_format not in EXPORT_FORMATS:
+            return None, f"不支持的导出格式，仅支持 {'、'.join(EXPORT_FORMATS)}", None
+
+        if engine_type not in EXPORT_ENGINES or database_engine_service.get_engine(engine_type) is None:
+            return None, f"不支持的数据库引擎: {engine_type}", None
+
+        schema = self.resolve_schema(schema_name, db)
+        if not schema or not schema.sql_schema:
+            return None, "数据库模式不存在", None
+
+        media_type, _ = EXPORT_FORMATS[export_format]
+        tables = self.iter_schema_tables(schema.sql_schema, engine_type)
+
+        if export_format == "XLSX":
+            content = iter_xlsx(tables)
+        elif export_format == "JSON":
+            content = iter_json_tables(tables, header={
+                "schema": schema.sql_schema,
+                "export_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+        else:
+            content = iter_xml_tables(tables, root_tag="dataset", root_attrs={
+                "schema": schema.sql_schema,
+                "export_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+
+        return content, None, media_type
+
+# 全局数据集导出服务实例
+export_service = ExportService()
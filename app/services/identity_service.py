@@ -0,0 +1,71 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy.orm import Session
+from models import Student, Teacher
+from utils.ttl_cache import TTLCache
+
+# 身份映射缓存：条目数与过期时间（秒）。本进程内的修改和删除会主动失效，
+# 过期时间限定其他进程修改后本进程最多读到多久的旧映射
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "20000"))
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "300"))
+
+
+@dataclass(frozen=True)
+class Identity:
+    """已解析的登录身份"""
+    role: str  # teacher / student
+    account: str  # 教职工号或学号（JWT 的 sub）
+    id: int  # 数据库主键
+    name: Optional[str] = None
+
+
+class IdentityService:
+    """身份解析服务类
+
+    把 JWT 中的教职工号/学号映射为数据库主键。映射在进程内缓存，同一账号的后续请求
+    不再查询 teacher/student 表；通过用户管理接口修改或删除用户时清除对应条目。
+    管理员没有数据库记录，不解析。
+    """
+
+    def __init__(self):
+        self.cache = TTLCache(ttl=IDENTITY_CACHE_TTL, maxsize=IDENTITY_CACHE_SIZE)
+
+    def resolve(self, role: str, account: str, db: Session) -> Optional[Identity]:
+        """
+        解析身份
+
+        Args:
+            role: 角色（teacher、student）
+            account: 教职工号或学号
+            db: 数据库会话
+
+        Returns:
+            Optional[Identity]: 用户不存在或角色没有数据库记录时返回 None（不缓存）
+        """
+        if role not in ("teacher", "student") or not account:
+            return None
+
+        key = (role, str(account))
+        identity = self.cache.get(key)
+        if identity is not None:
+            return identity
+
+        if role == "teacher":
+            row = db.query(Teacher.id, Teacher.teacher_name).filter(Teacher.teacher_id == account).first()
+        else:
+            row = db.query(Student.id, Student.student_name).filter(Student.student_id == account).first()
+        if row is None:
+            return None
+
+        identity = Identity(role=role, account=str(account), id=row[0], name=row[1])
+        self.cache.set(key, identity)
+        return identity
+
+    def invalidate(self, role: str, account: str) -> None:
+        """用户信息修改或删除后清除映射"""
+        self.cache.invalidate((role, str(account)))
+
+
+# 全局身份解析服务实例
+identity_service = IdentityService()
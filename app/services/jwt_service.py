@@ -1,8 +1,18 @@
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import hashlib
+import hmac
 import os
+import time
+from utils.ttl_cache import TTLCache
+
+# 已验证令牌缓存的最大条目数
+JWT_TOKEN_CACHE_SIZE = int(os.getenv("JWT_TOKEN_CACHE_SIZE", "10000"))
+
+# bcrypt 成本因子：每加 1，哈希和验证耗时翻倍；调高后旧哈希在下次登录时自动升级
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
 class JWTService:
     """JWT服务类"""
@@ -11,7 +21,9 @@ class JWTService:
         self.secret_key = os.getenv("JWT_SECRET_KEY", "your-secret-key-here")
         self.algorithm = "HS256"
         self.access_token_expire_minutes = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+        # 令牌哈希 -> 解码后的声明，条目在令牌的 exp 到期时失效
+        self.token_cache = TTLCache(ttl=self.access_token_expire_minutes * 60, maxsize=JWT_TOKEN_CACHE_SIZE)
     
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """创建访问令牌"""
@@ -26,12 +38,26 @@ class JWTService:
         return encoded_jwt
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """验证令牌"""
+        """
+        验证令牌
+
+        验证通过的令牌按其 SHA-256 哈希缓存解码结果，直到令牌的 exp 到期，
+        同一令牌的后续请求不再重复验签和解析；验证失败的令牌不缓存。
+        """
+        cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+        payload = self.token_cache.get(cache_key)
+        if payload is not None:
+            return dict(payload)
+
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return payload
         except JWTError:
             return None
+
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            self.token_cache.set(cache_key, dict(payload), ttl=remaining)
+        return payload
     
     def hash_password(self, password: str) -> str:
         """加密密码"""
@@ -39,7 +65,33 @@ class JWTService:
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """验证密码"""
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return self.verify_and_update(plain_password, hashed_password)[0]
+
+    def is_password_hash(self, stored_password: Optional[str]) -> bool:
+        """判断保存的密码是否已经是哈希（历史数据中可能仍是明文）"""
+        return bool(stored_password) and self.pwd_context.identify(stored_password) is not None
+
+    def verify_and_update(self, plain_password: str, stored_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        验证密码，并在需要时给出新的哈希
+
+        保存的是明文（迁移前的数据）时按明文比较，验证通过后返回该密码的哈希；
+        保存的是哈希但成本因子低于 BCRYPT_ROUNDS 时，验证通过后返回按当前成本重新计算的哈希。
+
+        Returns:
+            Tuple[bool, Optional[str]]: (是否验证通过, 需要写回的新哈希，无需更新时为 None)
+        """
+        if not stored_password or plain_password is None:
+            return False, None
+
+        if self.is_password_hash(stored_password):
+            return self.pwd_context.verify_and_update(plain_password, stored_password)
+
+        # 明文密码：沿用原来去除首尾空白后比较的规则
+        stored_password = str(stored_password).strip()
+        if not hmac.compare_digest(stored_password.encode("utf-8"), str(plain_password).strip().encode("utf-8")):
+            return False, None
+        return True, self.hash_password(stored_password)
 
 # 全局JWT服务实例
 jwt_service = JWTService() 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func, String
 from models import Semester, DateRange, DatabaseSchema, Problem
@@ -188,6 +188,23 @@ class PublicService:
             print(f"获取包含状态的数据库模式列表失败: {e}")
             return DatabaseSchemaWithStatusListResponse(root=[])
 
+    def get_schema_structure(self, schema_id: int, db: Session, engine_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        获取数据库模式的表结构（每个模式版本只读取一次数据库目录）
+
+        Returns:
+            Optional[Dict[str, Any]]: 模式结构，模式不存在时返回None
+
+        Raises:
+            ValueError: 模式未设置SQL模式名称或引擎不可用
+        """
+        from services.schema_introspection_service import schema_introspection_service
+
+        schema = db.query(DatabaseSchema).filter(DatabaseSchema.schema_id == schema_id).first()
+        if not schema:
+            return None
+        return schema_introspection_service.get_structure(schema, engine_type)
+
     def check_semester_exists(self, semester_id: int, db: Session) -> bool:
         """检查学期是否存在"""
         try:
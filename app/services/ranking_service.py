@@ -0,0 +1,237 @@
+import bisect
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Optional, List, Dict, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case
+from models import Student, Course, CourseSelection, StudentProblemStats
+from utils.cursor import encode_cursor, decode_cursor
+from utils.ttl_cache import TTLCache
+
+# 排名索引的缓存时间（秒），以及每个学期索引缓存的范围（课程/班级组合）数量上限
+RANKING_CACHE_TTL = float(os.getenv("RANKING_CACHE_TTL", "30"))
+RANKING_SCOPE_CACHE_SIZE = int(os.getenv("RANKING_SCOPE_CACHE_SIZE", "256"))
+
+
+@dataclass(frozen=True)
+class RankEntry:
+    """排行榜条目"""
+    student_pk: int
+    student_id: str
+    student_name: str
+    class_: str
+    correct_count: int
+    method_count: int
+
+    @property
+    def sort_key(self) -> Tuple[int, int, int]:
+        # 按正确题目数降序、方法数降序，学生主键升序保证排序稳定
+        return (-self.correct_count, -self.method_count, self.student_pk)
+
+
+@dataclass
+class RankingIndex:
+    """一个学期的排名索引，所有范围的排行榜共享同一份聚合结果
+
+    学生答题统计变化时用 update_entry 更新该学生的条目，只失效包含该学生的范围。
+    entries 和各范围的列表都不原地修改，读取中的排行榜不受并发更新影响。
+    """
+    semester_id: int
+    entries: List[RankEntry]
+    course_members: Dict[int, set]
+    _scopes: TTLCache = field(
+        default_factory=lambda: TTLCache(ttl=RANKING_CACHE_TTL, maxsize=RANKING_SCOPE_CACHE_SIZE),
+        compare=False, repr=False
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, compare=False, repr=False)
+
+    def scoped(self, course_id: Optional[int] = None, class_name: Optional[str] = None) -> List[RankEntry]:
+        """获取指定范围（学期/课程/班级）内按名次排序的条目"""
+        scope_key = (course_id, class_name)
+        scoped_entries = self._scopes.get(scope_key)
+        if scoped_entries is None:
+            source = self.entries
+            members = self.course_members.get(course_id, set()) if course_id is not None else None
+            scoped_entries = [
+                entry for entry in source
+                if (members is None or entry.student_pk in members)
+                and (class_name is None or entry.class_ == class_name)
+            ]
+            with self._lock:
+                # 计算期间条目已更新时不写入缓存，避免缓存旧名次
+                if self.entries is source:
+                    self._scopes.set(scope_key, scoped_entries)
+        return scoped_entries
+
+    def update_entry(self, student_pk: int, correct_count: int, method_count: int) -> None:
+        """更新学生的正确题目数与方法数，重新定位名次并失效其所在的学期/课程/班级范围"""
+        with self._lock:
+            for position, entry in enumerate(self.entries):
+                if entry.student_pk == student_pk:
+                    break
+            else:
+                return  # 学生不在本学期的选课名单中
+            if entry.correct_count == correct_count and entry.method_count == method_count:
+                return
+
+            updated = replace(entry, correct_count=correct_count, method_count=method_count)
+            entries = self.entries[:position] + self.entries[position + 1:]
+            entries.insert(bisect.bisect_left([item.sort_key for item in entries], updated.sort_key), updated)
+            self.entries = entries
+
+            courses = [course_id for course_id, members in self.course_members.items() if student_pk in members]
+            for course_id in [None] + courses:
+                for class_name in (None, entry.class_):
+                    self._scopes.invalidate((course_id, class_name))
+
+
+class RankingService:
+    """排行榜服务类"""
+
+    def __init__(self):
+        # 排名索引缓存，键为学期ID；答对题目后更新对应学生的条目
+        self.cache = TTLCache(ttl=RANKING_CACHE_TTL, maxsize=16)
+
+    def invalidate(self) -> None:
+        """选课名单等批量变化后清空所有排名索引"""
+        self.cache.clear()
+
+    def refresh_student(self, student_pk: int, db: Session) -> None:
+        """
+        学生答题统计变化后，更新已缓存的各学期索引中该学生的条目
+
+        Args:
+            student_pk: 学生主键
+            db: 数据库会话
+        """
+        indexes = self.cache.values()
+        if not indexes:
+            return
+
+        stat = db.query(
+            func.count(case((StudentProblemStats.correct_count > 0, 1))).label("correct_count"),
+            func.coalesce(func.sum(StudentProblemStats.method_count), 0).label("method_count")
+        ).filter(StudentProblemStats.student_id == student_pk).one()
+        for index in indexes:
+            index.update_entry(student_pk, int(stat.correct_count), int(stat.method_count))
+
+    def get_index(self, semester_id: int, db: Session) -> RankingIndex:
+        """获取学期排名索引（优先使用缓存）"""
+        return self.cache.get_or_load(semester_id, lambda: self._build_index(semester_id, db))
+
+    def _build_index(self, semester_id: int, db: Session) -> RankingIndex:
+        """聚合当前学期所有选课学生的正确题目数与方法数"""
+        # 学期内的选课名单（一名学生可能选多门课程）
+        roster = db.query(
+            Student.id,
+            Student.student_id,
+            Student.student_name,
+            Student.class_,
+            CourseSelection.course_id
+        ).join(
+            CourseSelection, CourseSelection.student_id == Student.id
+        ).join(
+            Course, CourseSelection.course_id == Course.course_id
+        ).filter(
+            Course.semester_id == semester_id
+        ).all()
+
+        students: Dict[int, tuple] = {}
+        course_members: Dict[int, set] = {}
+        for row in roster:
+            students[row.id] = row
+            course_members.setdefault(row.course_id, set()).add(row.id)
+
+        if not students:
+            return RankingIndex(semester_id=semester_id, entries=[], course_members={})
+
+        # 一次分组聚合学生×题目统计汇总，得到所有学生的正确题目数和方法数
+        stats = db.query(
+            StudentProblemStats.student_id,
+            func.count(case((StudentProblemStats.correct_count > 0, 1))).label("correct_count"),
+            func.coalesce(func.sum(StudentProblemStats.method_count), 0).label("method_count")
+        ).filter(
+            StudentProblemStats.student_id.in_(list(students.keys()))
+        ).group_by(StudentProblemStats.student_id).all()
+        stats_by_student = {row.student_id: row for row in stats}
+
+        entries = []
+        for student_pk, student in students.items():
+            stat = stats_by_student.get(student_pk)
+            entries.append(RankEntry(
+                student_pk=student_pk,
+                student_id=student.student_id,
+                student_name=student.student_name or "",
+                class_=student.class_ or "",
+                correct_count=int(stat.correct_count) if stat else 0,
+                method_count=int(stat.method_count) if stat else 0
+            ))
+        entries.sort(key=lambda entry: entry.sort_key)
+
+        return RankingIndex(semester_id=semester_id, entries=entries, course_members=course_members)
+
+    def get_leaderboard(self, semester_id: int, db: Session, course_id: Optional[int] = None,
+                        class_name: Optional[str] = None, cursor: Optional[str] = None,
+                        limit: int = 20, student_id: Optional[str] = None) -> Dict:
+        """
+        获取指定范围的排行榜（游标分页）
+
+        Args:
+            semester_id: 学期ID
+            db: 数据库会话
+            course_id: 课程ID（可选，按课程范围排名）
+            class_name: 班级（可选，按班级范围排名）
+            cursor: 上一页返回的游标
+            limit: 每页数量
+            student_id: 学号（可选，用于返回"我的名次"）
+
+        Returns:
+            Dict: 包含 items、total、next_cursor、my_rank
+        """
+        entries = self.get_index(semester_id, db).scoped(course_id, class_name)
+
+        # 游标记录上一页最后一个条目的排序键，数据变化时翻页也不会重复或遗漏
+        start = 0
+        if cursor:
+            values = decode_cursor(cursor)
+            try:
+                last_key = (-int(values["c"]), -int(values["m"]), int(values["s"]))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"无效的分页游标: {cursor}")
+            start = bisect.bisect_right([entry.sort_key for entry in entries], last_key)
+
+        page = entries[start:start + limit]
+        items = [self._to_item(start + i + 1, entry) for i, entry in enumerate(page)]
+
+        next_cursor = None
+        if start + limit < len(entries):
+            last = page[-1]
+            next_cursor = encode_cursor({"c": last.correct_count, "m": last.method_count, "s": last.student_pk})
+
+        my_rank = None
+        if student_id is not None:
+            for position, entry in enumerate(entries, 1):
+                if entry.student_id == student_id:
+                    my_rank = self._to_item(position, entry)
+                    break
+
+        return {
+            "items": items,
+            "total": len(entries),
+            "next_cursor": next_cursor,
+            "my_rank": my_rank
+        }
+
+    def _to_item(self, rank: int, entry: RankEntry) -> Dict:
+        """构建排行榜条目响应数据"""
+        return {
+            "rank": rank,
+            "student_name": entry.student_name,
+            "class_name": entry.class_,
+            "correct_count": entry.correct_count,
+            "method_count": entry.method_count
+        }
+
+# 全局排行榜服务实例
+ranking_service = RankingService()
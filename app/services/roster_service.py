@@ -0,0 +1,259 @@
+import io
+import os
+import re
+from typing import Optional, List, Dict, Any, Iterable, Set
+import pandas as pd
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from models import Student, Course, CourseSelection
+from services.jwt_service import jwt_service
+
+# 文件列名 -> 字段名（同时支持英文字段名和中文表头）
+ROSTER_COLUMN_ALIASES = {
+    "student_id": "student_id", "学号": "student_id",
+    "student_name": "student_name", "姓名": "student_name",
+    "class_": "class_", "class": "class_", "班级": "class_",
+    "status": "status", "状态": "status",
+    "course_id": "course_id", "课程id": "course_id", "课程号": "course_id",
+}
+
+# 新建学生的默认密码
+DEFAULT_STUDENT_PASSWORD = "default@password"
+
+# 每条多行插入语句及每次 IN 查询包含的最大行数
+BULK_CHUNK_SIZE = 500
+
+_INTEGRAL_FLOAT = re.compile(r"^(\d+)\.0+$")
+
+def _chunks(items: List[Any], size: int = BULK_CHUNK_SIZE) -> Iterable[List[Any]]:
+    """按固定大小切分列表"""
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
+
+def _clean_text(value: Any) -> str:
+    """去掉首尾空白；Excel 把学号存成数字时去掉多余的 .0"""
+    text = "" if value is None else str(value).strip()
+    match = _INTEGRAL_FLOAT.match(text)
+    return match.group(1) if match else text
+
+def _parse_int(value: Any) -> Optional[int]:
+    """解析整数，无法解析时返回None"""
+    text = _clean_text(value)
+    if not text:
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+class RosterService:
+    """学生名单导入服务类
+
+    名单逐行校验后按集合处理：学生、课程、已有选课各用一次（分块）IN 查询预取，
+    新学生和新选课用多行 INSERT 写入。选课按块在保存点内插入，某块违反唯一约束时回到保存点
+    逐行重试：并发导入同一名单时已存在的选课跳过并在错误报告中列出，其他完整性错误照常抛出。
+    """
+
+    def read_file(self, filename: str, content: bytes, course_id: Optional[int] = None,
+                  default_status: int = 0) -> List[Dict[str, Any]]:
+        """
+        解析 CSV/XLSX/XLS 名单文件
+
+        Args:
+            filename: 文件名（用于判断格式）
+            content: 文件内容
+            course_id: 默认课程ID，文件中没有课程列或单元格为空时使用
+            default_status: 默认状态，文件中没有状态列或单元格为空时使用
+
+        Returns:
+            List[Dict[str, Any]]: 名单行，包含 row（文件中的行号）、student_id、student_name、class_、status、course_id
+
+        Raises:
+            ValueError: 文件格式不支持或缺少学号列
+        """
+        extension = os.path.splitext(filename or "")[1].lower()
+        if extension == ".csv":
+            try:
+                frame = pd.read_csv(io.BytesIO(content), dtype=str, keep_default_na=False, encoding="utf-8-sig")
+            except UnicodeDecodeError:
+                # 兼容 Excel 另存为的 GBK 编码 CSV
+                frame = pd.read_csv(io.BytesIO(content), dtype=str, keep_default_na=False, encoding="gbk")
+        elif extension in (".xlsx", ".xls"):
+            frame = pd.read_excel(io.BytesIO(content), dtype=str, keep_default_na=False)
+        else:
+            raise ValueError("仅支持 CSV、XLSX、XLS 文件")
+
+        frame = frame.rename(columns=lambda column: ROSTER_COLUMN_ALIASES.get(str(column).strip().lower(), str(column).strip()))
+        if "student_id" not in frame.columns:
+            raise ValueError("名单文件缺少学号（student_id）列")
+
+        rows = []
+        for index, record in enumerate(frame.to_dict("records")):
+            status = _parse_int(record.get("status"))
+            row_course_id = _parse_int(record.get("course_id"))
+            rows.append({
+                "row": index + 2,  # 第1行为表头
+                "student_id": _clean_text(record.get("student_id")),
+                "student_name": _clean_text(record.get("student_name")) or None,
+                "class_": _clean_text(record.get("class_")) or None,
+                "status": default_status if status is None and not _clean_text(record.get("status")) else status,
+                "course_id": course_id if row_course_id is None and not _clean_text(record.get("course_id")) else row_course_id
+            })
+        return rows
+
+    def import_rows(self, rows: List[Dict[str, Any]], semester_id: int, db: Session) -> Dict[str, Any]:
+        """
+        导入名单行：创建不存在的学生，并为其添加本学期选课
+
+        Args:
+            rows: 名单行（格式同 read_file 的返回值）
+            semester_id: 选课所属学期ID
+            db: 数据库会话
+
+        Returns:
+            Dict[str, Any]: 包含 total_rows、created_students、created_selections、errors（逐行错误报告）
+        """
+        errors = []
+
+        def reject(row: Dict[str, Any], message: str):
+            errors.append({"row": row["row"], "student_id": row.get("student_id") or "", "error": message})
+
+        # 一次查询校验所有课程
+        course_ids = list({row["course_id"] for row in rows if row.get("course_id") is not None})
+        existing_courses: Set[int] = set()
+        for chunk in _chunks(course_ids):
+            existing_courses.update(db.execute(select(Course.course_id).where(Course.course_id.in_(chunk))).scalars())
+
+        # 逐行校验（纯内存）
+        valid_rows = []
+        seen = set()
+        for row in rows:
+            if not row.get("student_id"):
+                reject(row, "学号不能为空")
+            elif row.get("course_id") is None:
+                reject(row, "课程ID缺失或无效")
+            elif row["course_id"] not in existing_courses:
+                reject(row, f"课程ID {row['course_id']} 不存在")
+            elif row.get("status") not in (0, 1):
+                reject(row, "状态只能为0（正常）或1（重修）")
+            elif (row["student_id"], row["course_id"]) in seen:
+                reject(row, f"与前面的行重复：学生 {row['student_id']} 已在名单中选择课程 {row['course_id']}")
+            else:
+                seen.add((row["student_id"], row["course_id"]))
+                valid_rows.append(row)
+
+        if not valid_rows:
+            return {"total_rows": len(rows), "created_students": 0, "created_selections": 0, "errors": errors}
+
+        try:
+            # 预取已存在的学生，不存在的用多行 INSERT 一次性创建
+            pk_by_student_id = self._fetch_student_pks({row["student_id"] for row in valid_rows}, db)
+            new_students = {}
+            # 默认密码每次导入只计算一次哈希，所有新学生共用
+            default_password_hash = None
+            for row in valid_rows:
+                if row["student_id"] not in pk_by_student_id:
+                    if default_password_hash is None:
+                        default_password_hash = jwt_service.hash_password(DEFAULT_STUDENT_PASSWORD)
+                    new_students.setdefault(row["student_id"], {
+                        "student_id": row["student_id"],
+                        "student_name": row.get("student_name"),
+                        "class_": row.get("class_"),
+                        "student_password": default_password_hash
+                    })
+            for chunk in _chunks(list(new_students.values())):
+                db.execute(insert(Student).values(chunk))
+            if new_students:
+                pk_by_student_id.update(self._fetch_student_pks(set(new_students), db))
+
+            # 预取本学期已有的选课
+            existing_pairs = set()
+            for chunk in _chunks(list(set(pk_by_student_id.values()))):
+                existing_pairs.update(db.execute(select(CourseSelection.student_id, CourseSelection.course_id).where(
+                    CourseSelection.semester_id == semester_id,
+                    CourseSelection.student_id.in_(chunk)
+                )).all())
+
+            selection_rows, source_rows = [], []
+            for row in valid_rows:
+                student_pk = pk_by_student_id[row["student_id"]]
+                if (student_pk, row["course_id"]) in existing_pairs:
+                    reject(row, f"学生 {row['student_id']} 已经选择了课程 {row['course_id']}")
+                    continue
+                selection_rows.append({
+                    "student_id": student_pk,
+                    "course_id": row["course_id"],
+                    "status": row["status"],
+                    "semester_id": semester_id,
+                    "score": 0  # 默认分数为0
+                })
+                source_rows.append(row)
+
+            created_selections = 0
+            for offset in range(0, len(selection_rows), BULK_CHUNK_SIZE):
+                chunk = selection_rows[offset:offset + BULK_CHUNK_SIZE]
+                skipped = self._insert_selections(chunk, db)
+                for index in skipped:
+                    # 预取之后被其他请求同时插入的选课
+                    row = source_rows[offset + index]
+                    reject(row, f"学生 {row['student_id']} 已经选择了课程 {row['course_id']}")
+                created_selections += len(chunk) - len(skipped)
+
+            db.commit()
+
+        except Exception:
+            db.rollback()
+            raise
+
+        errors.sort(key=lambda error: error["row"])
+        return {
+            "total_rows": len(rows),
+            "created_students": len(new_students),
+            "created_selections": created_selections,
+            "errors": errors
+        }
+
+    def _fetch_student_pks(self, student_ids: Set[str], db: Session) -> Dict[str, int]:
+        """按学号批量查询学生主键（学号重复时取最早创建的一条）"""
+        pk_by_student_id = {}
+        for chunk in _chunks(list(student_ids)):
+            rows = db.execute(
+                select(Student.student_id, Student.id).where(Student.student_id.in_(chunk)).order_by(Student.id)
+            ).all()
+            for student_id, student_pk in rows:
+                pk_by_student_id.setdefault(student_id, student_pk)
+        return pk_by_student_id
+
+    def _insert_selections(self, rows: List[Dict[str, Any]], db: Session) -> List[int]:
+        """
+        多行插入选课记录，返回因已存在（违反唯一约束 unique_student_course）而未插入的行下标
+
+        整组插入失败时回到保存点逐行插入；逐行失败且该选课确实已存在时跳过并报告，
+        其他完整性错误照常抛出，不会被当作重复静默忽略。
+        """
+        try:
+            with db.begin_nested():
+                db.execute(insert(CourseSelection).values(rows))
+            return []
+        except IntegrityError:
+            pass
+
+        skipped = []
+        for index, row in enumerate(rows):
+            try:
+                with db.begin_nested():
+                    db.execute(insert(CourseSelection).values(row))
+            except IntegrityError:
+                exists = db.execute(select(CourseSelection.id).where(
+                    CourseSelection.student_id == row["student_id"],
+                    CourseSelection.course_id == row["course_id"],
+                    CourseSelection.semester_id == row["semester_id"]
+                ).with_for_update()).first()  # 加锁读取，看到其他事务刚提交的选课
+                if exists is None:
+                    raise
+                skipped.append(index)
+        return skipped
+
+# 全局学生名单导入服务实例
+roster_service = RosterService()
@@ -0,0 +1,248 @@
+import hashlib
+import os
+import re
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Set, Tuple, Iterator
+from services.database_engine_service import database_engine_service
+from services.schema_version_service import schema_version_service, SchemaChange
+from utils.ttl_cache import TTLCache
+
+# 每个教学模式（每种引擎）预先复制好的沙箱数量
+SANDBOX_POOL_SIZE = int(os.getenv("SANDBOX_POOL_SIZE", "2"))
+
+# 后台复制、重置沙箱的线程数
+SANDBOX_WORKERS = int(os.getenv("SANDBOX_WORKERS", "2"))
+
+# 标准答案验证结果的缓存时间（秒）
+SANDBOX_EXPECTED_CACHE_TTL = float(os.getenv("SANDBOX_EXPECTED_CACHE_TTL", "300"))
+
+PoolKey = Tuple[str, str]  # (引擎类型, 模板模式名称)
+
+# 沙箱名称中的创建者标记：主机名摘要 + 进程号，用于识别已退出进程遗留的沙箱
+_HOST_TAG = hashlib.md5(socket.gethostname().encode("utf-8")).hexdigest()[:4]
+_OWNER_TAG = f"{_HOST_TAG}p{os.getpid()}"
+
+
+def _process_alive(pid: int) -> bool:
+    """本机进程是否仍在运行"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SandboxService:
+    """DML 题目沙箱服务类
+
+    学生的 INSERT/UPDATE/DELETE 在教学模式的副本（沙箱）中执行，不会修改所有学生共用的模式，
+    也不会与其他学生在共享模式上争用行锁。语句经 execute_in_rollback 执行：只允许 DML 语句、
+    不能引用其他模式，执行后回滚。
+    沙箱以教学模式为模板在数据库内部复制，每个模式预先复制 SANDBOX_POOL_SIZE 个放在池中，
+    判题时直接取用；语句执行后都已回滚，用完后直接放回池中，只有使用过程中出现异常时
+    才在后台清空数据、重新从模板复制后放回。
+
+    教学模式重建（模式版本变更事件）时调用 discard，池中旧模板的沙箱全部删除，
+    正在使用的沙箱归还时也会被删除。
+
+    池只保存在进程内存中，进程重启后原有沙箱无人管理。沙箱名称带有主机和进程号，
+    每个模式的池首次使用时在后台删除本机已退出进程遗留的沙箱。
+    """
+
+    def __init__(self):
+        self._ready: Dict[PoolKey, List[str]] = {}
+        self._pending: Dict[PoolKey, int] = {}
+        self._generation: Dict[PoolKey, int] = {}
+        self._started: Set[PoolKey] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=SANDBOX_WORKERS, thread_name_prefix="sandbox")
+        self.expected_cache = TTLCache(ttl=SANDBOX_EXPECTED_CACHE_TTL, maxsize=1000)
+
+    @contextmanager
+    def lease(self, sql_schema: str, engine_type: str) -> Iterator[str]:
+        """
+        取用一个沙箱，退出时归还
+
+        池中有空闲沙箱时直接取用，否则当场复制一个。
+
+        Yields:
+            str: 沙箱模式名称
+        """
+        key = (engine_type, sql_schema)
+        with self._lock:
+            generation = self._generation.get(key, 0)
+            ready = self._ready.setdefault(key, [])
+            name = ready.pop() if ready else None
+            first_lease = key not in self._started
+            self._started.add(key)
+
+        if first_lease:
+            self._executor.submit(self._drop_orphans, key)
+        if name is None:
+            name = self._create(key)
+        self._replenish(key)
+
+        # 语句都经 execute_in_rollback 执行并回滚，沙箱数据不变，正常归还时直接放回池中；
+        # 使用过程中抛出异常时无法确认是否回滚，归还时重置数据
+        dirty = True
+        try:
+            yield name
+            dirty = False
+        finally:
+            self._executor.submit(self._recycle, key, name, generation, dirty)
+
+    def discard(self, sql_schema: str) -> None:
+        """模板模式重建后，删除该模式在所有引擎上的沙箱"""
+        stale = []
+        with self._lock:
+            for key in list(self._ready):
+                if key[1] == sql_schema:
+                    self._generation[key] = self._generation.get(key, 0) + 1
+                    stale.extend((key, name) for name in self._ready.pop(key))
+        for (engine_type, _), name in stale:
+            self._executor.submit(database_engine_service.drop_schema, name, engine_type)
+
+    def judge(self, sql_schema: str, engine_type: str, answer_sql: str, reference_sql: str,
+              check_sql: str, is_ordered: bool = False) -> Tuple[int, str]:
+        """
+        判定 DML 答案：在沙箱中执行学生语句，再用验证查询比对数据状态
+
+        标准答案执行后的验证结果按 (模板、标准答案、验证查询) 缓存，同一题目不必每次
+        都占用第二个沙箱。
+
+        Args:
+            sql_schema: 教学模式名称
+            engine_type: 数据库引擎类型
+            answer_sql: 学生提交的语句
+            reference_sql: 标准答案语句
+            check_sql: 验证查询（SELECT）
+            is_ordered: 验证结果是否按行有序比较
+
+        Returns:
+            Tuple[int, str]: (结果类型 0正确 1语法错误 2结果错误, 消息)
+        """
+        expected = self._expected_rows(sql_schema, engine_type, reference_sql, check_sql)
+
+        with self.lease(sql_schema, engine_type) as name:
+            success, error_msg, actual = database_engine_service.execute_in_rollback(
+                name, answer_sql, check_sql, engine_type, template_schema=sql_schema
+            )
+            if not success:
+                return 1, f"语法错误: {error_msg}"
+
+        if database_engine_service.rows_match(actual, expected, is_ordered):
+            return 0, "结果正确"
+        return 2, "结果错误"
+
+    def _expected_rows(self, sql_schema: str, engine_type: str, reference_sql: str, check_sql: str) -> List[Dict]:
+        """在沙箱中执行标准答案并返回验证查询结果（带缓存）"""
+        key = (engine_type, sql_schema)
+        with self._lock:
+            generation = self._generation.get(key, 0)
+        digest = hashlib.md5(f"{reference_sql}\0{check_sql}".encode("utf-8")).hexdigest()
+        cache_key = (engine_type, sql_schema, generation, digest)
+
+        def load():
+            with self.lease(sql_schema, engine_type) as name:
+                success, error_msg, rows = database_engine_service.execute_in_rollback(
+                    name, reference_sql, check_sql, engine_type, template_schema=sql_schema
+                )
+                if not success:
+                    raise RuntimeError(f"标准答案执行失败: {error_msg}")
+                return rows
+
+        return self.expected_cache.get_or_load(cache_key, load)
+
+    def _create(self, key: PoolKey) -> str:
+        """以模板模式复制一个新沙箱"""
+        engine_type, sql_schema = key
+        name = f"{sql_schema}_sbx_{_OWNER_TAG}_{uuid.uuid4().hex[:8]}"
+        success, message = database_engine_service.clone_schema(sql_schema, name, engine_type)
+        if not success:
+            database_engine_service.drop_schema(name, engine_type)
+            raise RuntimeError(message)
+        return name
+
+    def _drop_orphans(self, key: PoolKey) -> None:
+        """删除本机已退出进程遗留的沙箱，以及不带创建者标记的旧格式沙箱"""
+        engine_type, sql_schema = key
+        pattern = re.compile(
+            rf"^{re.escape(sql_schema)}_sbx_(?:([0-9a-f]{{4}})p(\d+)_)?[0-9a-f]{{8}}$", re.IGNORECASE
+        )
+        for name in database_engine_service.list_schemas(f"{sql_schema}_sbx_", engine_type):
+            match = pattern.match(name)
+            if not match:
+                continue
+            host, pid = match.groups()
+            if host is not None:
+                # 其他主机上的进程无法判断是否存活，由其自身启动时清理
+                if host.lower() != _HOST_TAG or _process_alive(int(pid)):
+                    continue
+            database_engine_service.drop_schema(name, engine_type)
+
+    def _replenish(self, key: PoolKey) -> None:
+        """池中空闲和正在复制的沙箱不足 SANDBOX_POOL_SIZE 时，在后台补充"""
+        with self._lock:
+            missing = SANDBOX_POOL_SIZE - len(self._ready.get(key, [])) - self._pending.get(key, 0)
+            if missing <= 0:
+                return
+            self._pending[key] = self._pending.get(key, 0) + missing
+            generation = self._generation.get(key, 0)
+        for _ in range(missing):
+            self._executor.submit(self._fill, key, generation)
+
+    def _fill(self, key: PoolKey, generation: int) -> None:
+        """后台复制一个沙箱放入池中"""
+        try:
+            name = self._create(key)
+        except Exception as e:
+            print(f"复制沙箱失败 {key}: {e}")
+            name = None
+        finally:
+            with self._lock:
+                self._pending[key] -= 1
+        if name:
+            self._offer(key, name, generation)
+
+    def _recycle(self, key: PoolKey, name: str, generation: int, dirty: bool) -> None:
+        """归还沙箱：放回池中（dirty 时先重置数据），模板已重建或重置失败时删除"""
+        engine_type, sql_schema = key
+        with self._lock:
+            current = self._generation.get(key, 0) == generation
+        if current and not dirty:
+            self._offer(key, name, generation)
+            return
+        if current:
+            success, message = database_engine_service.reset_schema_data(sql_schema, name, engine_type)
+            if success:
+                self._offer(key, name, generation)
+                return
+            print(f"重置沙箱 {name} 失败: {message}")
+        database_engine_service.drop_schema(name, engine_type)
+
+    def _offer(self, key: PoolKey, name: str, generation: int) -> None:
+        """把沙箱放入池中；模板已重建或池已满时删除"""
+        with self._lock:
+            ready = self._ready.setdefault(key, [])
+            if self._generation.get(key, 0) == generation and len(ready) < SANDBOX_POOL_SIZE:
+                ready.append(name)
+                return
+        database_engine_service.drop_schema(name, key[0])
+
+
+# 全局沙箱服务实例
+sandbox_service = SandboxService()
+
+
+@schema_version_service.subscribe
+def _discard_sandboxes(change: SchemaChange) -> None:
+    """模式重建后，基于旧数据复制的沙箱作废"""
+    sandbox_service.discard(change.sql_schema)
+    if change.previous_sql_schema:
+        sandbox_service.discard(change.previous_sql_schema)
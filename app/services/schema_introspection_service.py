@@ -0,0 +1,108 @@
+import os
+from typing import Optional, Dict, Any
+from models import DatabaseSchema
+from services.database_engine_service import database_engine_service
+from services.schema_version_service import schema_version_service, SchemaChange
+from utils.ttl_cache import TTLCache
+
+# 默认从哪种引擎读取模式结构（三种引擎上的表结构一致）
+INTROSPECTION_ENGINE = os.getenv("INTROSPECTION_ENGINE", "postgresql")
+
+# 结构缓存以模式版本为键，过期时间只用于回收长期不用的条目
+INTROSPECTION_CACHE_TTL = float(os.getenv("INTROSPECTION_CACHE_TTL", str(24 * 3600)))
+
+
+class SchemaIntrospectionService:
+    """数据库模式结构服务类
+
+    从 information_schema 读取教学模式的表、列、主键、唯一约束和外键，每个模式版本
+    只查询一次目录；AI 提示词和模式浏览接口共用同一份缓存。模式重建后版本号变化，
+    旧版本的缓存条目不再命中，并由模式变更事件主动清理。
+    """
+
+    def __init__(self):
+        self.cache = TTLCache(ttl=INTROSPECTION_CACHE_TTL, maxsize=256)
+
+    def _cache_key(self, schema_id: int, version: int, engine_type: str):
+        return (schema_id, version, engine_type)
+
+    def get_structure(self, schema: DatabaseSchema, engine_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        获取模式结构（带缓存）
+
+        Args:
+            schema: 数据库模式
+            engine_type: 读取结构的引擎，默认 INTROSPECTION_ENGINE
+
+        Returns:
+            Dict[str, Any]: 包含 schema_id、schema_name、sql_schema、version、engine_type、tables
+
+        Raises:
+            ValueError: 模式未设置 sql_schema 或引擎不可用
+        """
+        if not schema.sql_schema:
+            raise ValueError("数据库模式未设置SQL模式名称")
+
+        engine_type = engine_type or INTROSPECTION_ENGINE
+        version = schema.schema_version or 1
+
+        def load():
+            return {
+                "schema_id": schema.schema_id,
+                "schema_name": schema.schema_name,
+                "sql_schema": schema.sql_schema,
+                "version": version,
+                "engine_type": engine_type,
+                "tables": database_engine_service.introspect_schema(schema.sql_schema, engine_type)
+            }
+
+        return self.cache.get_or_load(self._cache_key(schema.schema_id, version, engine_type), load)
+
+    def render_ddl(self, structure: Dict[str, Any]) -> str:
+        """把模式结构渲染为精简的 CREATE TABLE 语句（用于提示词）"""
+        statements = []
+        for table in structure["tables"]:
+            lines = []
+            for column in table["columns"]:
+                line = f"  {column['name']} {column['type']}"
+                if not column["nullable"]:
+                    line += " NOT NULL"
+                lines.append(line)
+            if table["primary_key"]:
+                lines.append(f"  PRIMARY KEY ({', '.join(table['primary_key'])})")
+            for columns in table["unique"]:
+                lines.append(f"  UNIQUE ({', '.join(columns)})")
+            for foreign_key in table["foreign_keys"]:
+                lines.append(
+                    f"  FOREIGN KEY ({', '.join(foreign_key['columns'])}) "
+                    f"REFERENCES {foreign_key['ref_table']} ({', '.join(foreign_key['ref_columns'])})"
+                )
+            statements.append(f"CREATE TABLE {table['name']} (\n" + ",\n".join(lines) + "\n);")
+        return "\n".join(statements)
+
+    def describe(self, schema: DatabaseSchema) -> str:
+        """
+        模式的建表语句描述：优先使用目录中的实际结构，读取失败时退回保存的建表语句
+        """
+        try:
+            ddl = self.render_ddl(self.get_structure(schema))
+            if ddl:
+                return ddl
+        except Exception as e:
+            print(f"读取模式结构失败 {schema.sql_schema}: {e}")
+        return schema.sql_table or schema.sql_schema or ""
+
+    def invalidate(self, schema_id: int, version: int) -> None:
+        """清除模式某个版本在所有引擎上的缓存"""
+        for engine_type in ("mysql", "postgresql", "opengauss"):
+            self.cache.invalidate(self._cache_key(schema_id, version, engine_type))
+
+
+# 全局数据库模式结构服务实例
+schema_introspection_service = SchemaIntrospectionService()
+
+
+@schema_version_service.subscribe
+def _invalidate_structure(change: SchemaChange) -> None:
+    """模式重建后清除旧版本的结构缓存"""
+    schema_introspection_service.invalidate(change.schema_id, change.version - 1)
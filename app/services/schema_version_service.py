@@ -0,0 +1,97 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Optional, List, Callable, Tuple
+from sqlalchemy.orm import Session
+from models import DatabaseSchema
+
+
+@dataclass(frozen=True)
+class SchemaChange:
+    """数据库模式重建事件"""
+    schema_id: int
+    sql_schema: str
+    version: int
+    checksum: Optional[str]
+    previous_sql_schema: Optional[str] = None  # 重建时修改了模式名称则为原名称
+
+
+SchemaListener = Callable[[SchemaChange], None]
+
+
+class SchemaVersionService:
+    """数据库模式版本服务类
+
+    每次重新创建教学模式（create_database_schema、update_database_schema 执行建表脚本）
+    或修改模式指向的 sql_schema 时，
+    在同一事务中把 schema_version 原子地加一并记录建表脚本校验和；事务提交后向进程内订阅者
+    发布 SchemaChange 事件。依赖模式数据的缓存以 (schema_id, schema_version) 作为键，
+    或订阅事件主动清理，不必依赖过期时间。
+    """
+
+    def __init__(self):
+        self._listeners: List[SchemaListener] = []
+        self._lock = threading.Lock()
+
+    def compute_checksum(self, *scripts: Optional[str]) -> str:
+        """计算建表脚本的校验和"""
+        digest = hashlib.sha256()
+        for script in scripts:
+            digest.update((script or "").encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def bump(self, schema: DatabaseSchema, checksum: str) -> None:
+        """
+        标记模式已重建：版本号以 schema_version = schema_version + 1 在数据库端递增
+
+        只修改对象属性，随调用方的事务一起提交；提交后调用 publish 通知订阅者。
+        """
+        schema.schema_version = DatabaseSchema.schema_version + 1
+        schema.schema_checksum = checksum
+
+    def get_version(self, schema_id: int, db: Session) -> Optional[Tuple[int, Optional[str]]]:
+        """查询模式当前的 (版本号, 校验和)，模式不存在时返回None"""
+        row = db.query(DatabaseSchema.schema_version, DatabaseSchema.schema_checksum).filter(
+            DatabaseSchema.schema_id == schema_id
+        ).first()
+        return (row.schema_version, row.schema_checksum) if row else None
+
+    def subscribe(self, listener: SchemaListener) -> SchemaListener:
+        """订阅模式重建事件（可作为装饰器使用）"""
+        with self._lock:
+            self._listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener: SchemaListener) -> None:
+        """取消订阅"""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def publish(self, schema: DatabaseSchema, previous_sql_schema: Optional[str] = None) -> SchemaChange:
+        """
+        发布模式重建事件（在事务提交之后调用）
+
+        单个订阅者出错不影响其他订阅者。
+        """
+        change = SchemaChange(
+            schema_id=schema.schema_id,
+            sql_schema=schema.sql_schema,
+            version=schema.schema_version,
+            checksum=schema.schema_checksum,
+            previous_sql_schema=previous_sql_schema if previous_sql_schema != schema.sql_schema else None
+        )
+
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(change)
+            except Exception as e:
+                print(f"处理模式变更事件失败 {getattr(listener, '__name__', listener)}: {e}")
+        return change
+
+
+# 全局数据库模式版本服务实例
+schema_version_service = SchemaVersionService()
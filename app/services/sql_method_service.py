@@ -1,5 +1,7 @@
+import hashlib
 import re
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from sqlalchemy import func, distinct, or_
 from sqlalchemy.orm import Session
 from models import AnswerRecord, Student
 
@@ -16,12 +18,21 @@ class SQLMethodService:
         "when", "then", "else", "end"
     ]
     
+    # 预编译的关键词扫描正则：按长度降序组成单一分支，保证同一位置优先匹配长关键词（如"group by"优先于"group"）
+    _KEYWORD_PATTERN = re.compile(
+        r'\b(?:' + '|'.join(re.escape(keyword) for keyword in sorted(SQL_KEYWORDS, key=len, reverse=True)) + r')\b'
+    )
+    _WHITESPACE_PATTERN = re.compile(r'\s+')
+    
     def __init__(self):
         pass
     
     def extract_sql_keywords(self, sql: str) -> List[str]:
         """
         从SQL语句中提取关键词序列
+
+        使用预编译的单一正则从左到右扫描一次，每个位置只输出最长的关键词，
+        匹配结果天然按位置有序且互不重叠。
         
         Args:
             sql: SQL语句
@@ -30,31 +41,45 @@ class SQLMethodService:
             List[str]: 按顺序提取的关键词列表
         """
         # 将SQL转换为小写并去除多余空格
-        sql_lower = re.sub(r'\s+', ' ', sql.lower().strip())
-        
-        # 存储找到的关键词及其位置
-        found_keywords = []
-        
-        # 按关键词长度降序排序，优先匹配长关键词（如"group by"优先于"by"）
-        sorted_keywords = sorted(self.SQL_KEYWORDS, key=len, reverse=True)
-        
-        # 查找所有关键词的位置
-        for keyword in sorted_keywords:
-            # 使用正则表达式确保关键词是完整的单词
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            matches = re.finditer(pattern, sql_lower)
-            
-            for match in matches:
-                start_pos = match.start()
-                # 检查这个位置是否已经被更长的关键词占用
-                if not any(existing_start <= start_pos < existing_end for existing_start, existing_end, _ in found_keywords):
-                    found_keywords.append((start_pos, match.end(), keyword))
-        
-        # 按位置排序并返回关键词列表
-        found_keywords.sort(key=lambda x: x[0])
-        return [keyword for _, _, keyword in found_keywords]
+        sql_lower = self._WHITESPACE_PATTERN.sub(' ', sql.lower().strip())
+        return self._KEYWORD_PATTERN.findall(sql_lower)
+
+    def build_method_signature(self, sql: Optional[str]) -> Optional[str]:
+        """
+        根据SQL关键词序列生成方法签名
+
+        关键词序列相同的两条SQL视为同一种方法，签名为关键词序列的MD5摘要，
+        在提交答案时计算一次并保存到 answer_record.method_signature。
+
+        Args:
+            sql: SQL语句
+
+        Returns:
+            Optional[str]: 32位十六进制签名，SQL为空时返回None
+        """
+        if sql is None:
+            return None
+        keywords = self.extract_sql_keywords(sql)
+        return hashlib.md5(" ".join(keywords).encode("utf-8")).hexdigest()
+
+    def build_content_hash(self, sql: Optional[str]) -> Optional[str]:
+        """
+        生成规范化答案内容的哈希
+
+        折叠空白并去掉首尾空白和末尾分号后计算MD5，仅排版不同的两次提交视为同一答案内容，
+        在提交答案时计算一次并保存到 answer_record.content_hash。
+
+        Args:
+            sql: SQL语句
+
+        Returns:
+            Optional[str]: 32位十六进制哈希，SQL为空时返回None
+        """
+        if sql is None:
+            return None
+        normalized = self._WHITESPACE_PATTERN.sub(" ", sql).strip().rstrip(";").rstrip()
+        return hashlib.md5(normalized.encode("utf-8")).hexdigest()
 
-    
     def get_method_statistics(self, student_id: str, problem_id: int, db: Session) -> dict:
         """
         获取方法统计信息
@@ -73,28 +98,20 @@ class SQLMethodService:
             if not student:
                 return {"total_methods": 0, "max_method_count": 0}
 
-            # 获取该学生该题目的所有答题记录
-            records = db.query(AnswerRecord).filter(
+            # 不同方法数直接由数据库在 (student_id, problem_id, method_signature) 索引上统计
+            stats = db.query(
+                func.count().label("correct_submissions"),
+                func.count(distinct(AnswerRecord.method_signature)).label("total_methods")
+            ).filter(
                 AnswerRecord.student_id == student.id,
-                AnswerRecord.problem_id == problem_id
-            ).all()
-
-            if not records:
-                return {"total_methods": 0, "max_method_count": 0}
+                AnswerRecord.problem_id == problem_id,
+                AnswerRecord.result_type == 0
+            ).first()
 
-            # 统计不同的方法（通过SQL关键词序列）
-            unique_methods = set()
-            total_correct_submissions = 0
-
-            for record in records:
-                # 如果回答是正确的，提取SQL关键词序列
-                if record.result_type == 0:
-                    keywords = tuple(self.extract_sql_keywords(record.answer_content))
-                    unique_methods.add(keywords)
-                    total_correct_submissions += 1
+            total_correct_submissions = stats.correct_submissions if stats else 0
+            total_methods = stats.total_methods if stats else 0
 
             # 计算重复方法数（总正确提交数 - 不同方法数）
-            total_methods = len(unique_methods)
             repeat_methods = max(0, total_correct_submissions - total_methods)
 
             return {
@@ -107,5 +124,50 @@ class SQLMethodService:
             print(f"获取方法统计失败: {e}")
             return {"total_methods": 0, "max_method_count": 0}
 
+    def backfill_method_signatures(self, db: Session, batch_size: int = 1000) -> int:
+        """
+        为历史答题记录回填方法签名和答案内容哈希
+
+        按主键分批读取 method_signature 或 content_hash 为空的记录，计算后批量更新，
+        可重复执行，已回填的记录不会被再次处理。
+
+        Args:
+            db: 数据库会话
+            batch_size: 每批处理的记录数
+
+        Returns:
+            int: 本次回填的记录数
+        """
+        total = 0
+        last_id = 0
+
+        while True:
+            rows = db.query(
+                AnswerRecord.id,
+                AnswerRecord.answer_content
+            ).filter(
+                or_(AnswerRecord.method_signature.is_(None), AnswerRecord.content_hash.is_(None)),
+                AnswerRecord.id > last_id
+            ).order_by(AnswerRecord.id).limit(batch_size).all()
+
+            if not rows:
+                break
+
+            db.bulk_update_mappings(AnswerRecord, [
+                {
+                    "id": row.id,
+                    "method_signature": self.build_method_signature(row.answer_content),
+                    "content_hash": self.build_content_hash(row.answer_content)
+                }
+                for row in rows
+            ])
+            db.commit()
+
+            total += len(rows)
+            last_id = rows[-1].id
+            print(f"已回填方法签名和内容哈希: {total} 条")
+
+        return total
+
 # 全局SQL方法服务实例
 sql_method_service = SQLMethodService()
@@ -0,0 +1,229 @@
+import os
+from typing import Optional, List, Dict
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, distinct, insert, select
+from models import AnswerRecord, Problem, StudentProblemStats
+from utils.ttl_cache import TTLCache
+
+class StatisticsService:
+    """答题统计汇总服务类
+
+    维护 student_problem_stats 汇总表：提交答案时在同一事务内增量更新，
+    需要时可从 answer_record 原始记录全量重建。
+    """
+
+    def __init__(self):
+        # 题目完成情况缓存，键为 ("problem", 题目ID) 或 ("schema", 模式ID)；提交答案后按题目失效
+        self.summary_cache = TTLCache(ttl=float(os.getenv("PROBLEM_SUMMARY_CACHE_TTL", "10")), maxsize=4096)
+
+    def record_submission(self, db: Session, answer_record: AnswerRecord) -> StudentProblemStats:
+        """
+        将一条新的答题记录计入汇总表（不提交事务，由调用方与答题记录一起提交）
+
+        需在答题记录写入（flush）之前调用，以便判断其方法签名、答案内容是否首次出现。
+
+        Args:
+            db: 数据库会话
+            answer_record: 尚未写入的答题记录
+
+        Returns:
+            StudentProblemStats: 更新后的汇总行
+        """
+        stats = self._lock_stats_row(db, answer_record.student_id, answer_record.problem_id)
+
+        stats.submit_count += 1
+        if answer_record.content_hash is not None and not self._has_content(
+            db, answer_record.student_id, answer_record.problem_id, answer_record.content_hash
+        ):
+            stats.content_count += 1
+        if answer_record.result_type == 0:
+            # 汇总行已加锁，同一学生同一题目的并发提交在此串行化，方法签名判断不会重复计数
+            if answer_record.method_signature is not None and not self._has_correct_signature(
+                db, answer_record.student_id, answer_record.problem_id, answer_record.method_signature
+            ):
+                stats.method_count += 1
+            stats.correct_count += 1
+            if stats.first_correct_at is None or answer_record.timestep < stats.first_correct_at:
+                stats.first_correct_at = answer_record.timestep
+        elif answer_record.result_type == 1:
+            stats.syntax_error_count += 1
+        elif answer_record.result_type == 2:
+            stats.result_error_count += 1
+
+        return stats
+
+    def _lock_stats_row(self, db: Session, student_id: int, problem_id: int) -> StudentProblemStats:
+        """获取并锁定汇总行，不存在时创建
+
+        先以 upsert 写入全零行（已存在时不做修改），再 SELECT ... FOR UPDATE 加锁读取；
+        同一行的并发首次提交在插入时排队，不会出现先读后插的唯一键冲突。
+        """
+        values = dict(
+            student_id=student_id,
+            problem_id=problem_id,
+            submit_count=0,
+            correct_count=0,
+            syntax_error_count=0,
+            result_error_count=0,
+            method_count=0,
+            content_count=0
+        )
+        dialect = db.get_bind().dialect.name
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+            statement = mysql_insert(StudentProblemStats).values(**values).on_duplicate_key_update(
+                student_id=StudentProblemStats.student_id
+            )
+        else:
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            statement = dialect_insert(StudentProblemStats).values(**values).on_conflict_do_nothing(
+                index_elements=["student_id", "problem_id"]
+            )
+        db.execute(statement)
+
+        return db.query(StudentProblemStats).filter(
+            StudentProblemStats.student_id == student_id,
+            StudentProblemStats.problem_id == problem_id
+        ).with_for_update().populate_existing().one()
+
+    def _has_correct_signature(self, db: Session, student_id: int, problem_id: int, method_signature: str) -> bool:
+        """判断该学生在该题目上是否已有相同方法签名的正确提交"""
+        return db.query(AnswerRecord.id).filter(
+            AnswerRecord.student_id == student_id,
+            AnswerRecord.problem_id == problem_id,
+            AnswerRecord.method_signature == method_signature,
+            AnswerRecord.result_type == 0
+        ).first() is not None
+
+    def _has_content(self, db: Session, student_id: int, problem_id: int, content_hash: str) -> bool:
+        """判断该学生在该题目上是否已提交过相同内容的答案"""
+        return db.query(AnswerRecord.id).filter(
+            AnswerRecord.student_id == student_id,
+            AnswerRecord.problem_id == problem_id,
+            AnswerRecord.content_hash == content_hash
+        ).first() is not None
+
+    def get_stats(self, db: Session, student_id: int, problem_id: int) -> Optional[StudentProblemStats]:
+        """按主键获取学生×题目汇总行"""
+        return db.query(StudentProblemStats).filter(
+            StudentProblemStats.student_id == student_id,
+            StudentProblemStats.problem_id == problem_id
+        ).first()
+
+    def get_problem_summaries(self, db: Session, problem_ids: Optional[List[int]] = None,
+                              schema_id: Optional[int] = None) -> List[Dict[str, int]]:
+        """
+        批量获取题目完成情况（完成人数和总提交次数），优先使用缓存
+
+        Args:
+            db: 数据库会话
+            problem_ids: 题目ID列表（与 schema_id 二选一）
+            schema_id: 数据库模式ID，返回该模式下的所有题目
+
+        Returns:
+            List[Dict[str, int]]: 按传入顺序（按模式查询时按题目ID）排列的统计，不存在的题目不返回
+        """
+        if schema_id is not None:
+            return self.summary_cache.get_or_load(
+                ("schema", schema_id),
+                lambda: self._load_problem_summaries(db, schema_id=schema_id)
+            )
+
+        ordered_ids = list(dict.fromkeys(problem_ids or []))
+        summaries = {}
+        missing_ids = []
+        for problem_id in ordered_ids:
+            summary = self.summary_cache.get(("problem", problem_id))
+            if summary is None:
+                missing_ids.append(problem_id)
+            else:
+                summaries[problem_id] = summary
+
+        # 未命中缓存的题目用一次分组查询补齐
+        if missing_ids:
+            for summary in self._load_problem_summaries(db, problem_ids=missing_ids):
+                self.summary_cache.set(("problem", summary["problem_id"]), summary)
+                summaries[summary["problem_id"]] = summary
+
+        return [summaries[problem_id] for problem_id in ordered_ids if problem_id in summaries]
+
+    def _load_problem_summaries(self, db: Session, problem_ids: Optional[List[int]] = None,
+                                schema_id: Optional[int] = None) -> List[Dict[str, int]]:
+        """一次按题目分组的查询统计完成人数和总提交次数（外连接保证无人作答的题目也返回）"""
+        query = db.query(
+            Problem.problem_id,
+            func.count(case((StudentProblemStats.correct_count > 0, 1))).label("completed_student_count"),
+            func.coalesce(func.sum(StudentProblemStats.submit_count), 0).label("total_submission_count")
+        ).outerjoin(
+            StudentProblemStats, StudentProblemStats.problem_id == Problem.problem_id
+        )
+
+        if schema_id is not None:
+            query = query.filter(Problem.schema_id == schema_id)
+        else:
+            query = query.filter(Problem.problem_id.in_(problem_ids))
+
+        rows = query.group_by(Problem.problem_id).order_by(Problem.problem_id).all()
+
+        return [
+            {
+                "problem_id": row.problem_id,
+                "completed_student_count": int(row.completed_student_count),
+                "total_submission_count": int(row.total_submission_count)
+            }
+            for row in rows
+        ]
+
+    def invalidate_problem_summary(self, problem_id: int, schema_id: Optional[int] = None) -> None:
+        """提交答案后使该题目及其所属模式的完成情况缓存失效"""
+        self.summary_cache.invalidate(("problem", problem_id))
+        if schema_id is not None:
+            self.summary_cache.invalidate(("schema", schema_id))
+
+    def rebuild(self, db: Session) -> int:
+        """
+        从答题记录全量重建汇总表
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            int: 重建后的汇总行数
+        """
+        try:
+            db.query(StudentProblemStats).delete(synchronize_session=False)
+
+            aggregated = select(
+                AnswerRecord.student_id,
+                AnswerRecord.problem_id,
+                func.count(),
+                func.count(case((AnswerRecord.result_type == 0, 1))),
+                func.count(case((AnswerRecord.result_type == 1, 1))),
+                func.count(case((AnswerRecord.result_type == 2, 1))),
+                func.min(case((AnswerRecord.result_type == 0, AnswerRecord.timestep))),
+                func.count(distinct(case((AnswerRecord.result_type == 0, AnswerRecord.method_signature)))),
+                func.count(distinct(AnswerRecord.content_hash))
+            ).group_by(
+                AnswerRecord.student_id,
+                AnswerRecord.problem_id
+            )
+
+            db.execute(insert(StudentProblemStats).from_select([
+                "student_id", "problem_id", "submit_count", "correct_count",
+                "syntax_error_count", "result_error_count", "first_correct_at", "method_count",
+                "content_count"
+            ], aggregated))
+            db.commit()
+            self.summary_cache.clear()
+
+            return db.query(func.count()).select_from(StudentProblemStats).scalar() or 0
+
+        except Exception:
+            db.rollback()
+            raise
+
+# 全局答题统计汇总服务实例
+statistics_service = StatisticsService()
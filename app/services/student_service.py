@@ -1,15 +1,20 @@
 from typing import Optional, List, Dict, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case, distinct
 from models import Student, Teacher, Course, CourseSelection, Semester, AnswerRecord, Problem, DatabaseSchema
 from schemas.student import (
     StudentProfileResponse, StudentRankItem, AnswerRecordItem, AnswerRecordsResponse,
     ProblemItem, ProblemListResponse, DatabaseSchemaItem, DatabaseSchemaListResponse,
-    StudentDashboardItem, StudentDashboardResponse, StudentAnswerRecord, StudentAnswerRecordsResponse
+    StudentDashboardItem, StudentDashboardResponse, StudentAnswerRecord, StudentAnswerRecordsResponse,
+    LeaderboardItem, LeaderboardResponse
 )
 from services.database_engine_service import database_engine_service
 from services.sql_method_service import sql_method_service
+from services.identity_service import Identity
 from datetime import datetime
+import os
+
+# DML题目的判题方式：transaction（在共享模式上执行后回滚）或 sandbox（在模式副本中执行）
+DML_JUDGE_MODE = os.getenv("DML_JUDGE_MODE", "transaction")
 
 class StudentService:
     """学生服务类"""
@@ -88,78 +93,20 @@ class StudentService:
             if not current_semester:
                 return []
 
-            current_semester_id = current_semester.semester_id
-
-            # 2. 根据学期号确认课程号范围
-            courses = db.query(Course).filter(Course.semester_id == current_semester_id).all()
-            if not courses:
-                return []
-
-            course_ids = [course.course_id for course in courses]
-
-            # 3. 在选课表里根据课程号范围来确定学生名单
-            students_in_semester = db.query(
-                Student.id,
-                Student.student_id,
-                Student.student_name,
-                Student.class_
-            ).join(
-                CourseSelection, CourseSelection.student_id == Student.id
-            ).filter(
-                CourseSelection.course_id.in_(course_ids)
-            ).distinct().all()
-
-            # 计算每个学生的排名数据
-            student_rankings = []
-
-            for student in students_in_semester:
-                # 计算正确题目数（result_type = 0的不同题目数量）
-                correct_problems = db.query(
-                    distinct(AnswerRecord.problem_id)
-                ).filter(
-                    AnswerRecord.student_id == student.id,
-                    AnswerRecord.result_type == 0
-                ).count()
-
-                # 获取该学生答过的所有题目号
-                answered_problems = db.query(
-                    distinct(AnswerRecord.problem_id)
-                ).filter(
-                    AnswerRecord.student_id == student.id
-                ).all()
-
-                # 计算总方法数（所有题目的方法数之和）
-                total_methods = 0
-                for problem_tuple in answered_problems:
-                    problem_id = problem_tuple[0]
-                    # 使用sql_method_service获取该学生该题目的方法数量
-                    method_stats = sql_method_service.get_method_statistics(
-                        student.student_id, problem_id, db
-                    )
-                    total_methods += method_stats.get("total_methods", 0)
-
-                # 构建学生排名数据
-                student_name = f"{student.class_} {student.student_name}" if student.class_ else student.student_name
-                student_rankings.append({
-                    "student_name": student_name,
-                    "correct_count": correct_problems,
-                    "method_count": total_methods
-                })
-
-            # 按正确题目数降序，方法数降序排序
-            student_rankings.sort(
-                key=lambda x: (x["correct_count"], x["method_count"]),
-                reverse=True
-            )
+            # 2. 从共享的学期排名索引中取前N名（索引已按正确题目数降序、方法数降序排序）
+            from services.ranking_service import ranking_service
+            entries = ranking_service.get_index(current_semester.semester_id, db).entries
 
             # 构建最终结果
             result = []
-            for i, student_data in enumerate(student_rankings[:limit], 1):
+            for i, entry in enumerate(entries[:limit], 1):
+                # 学生姓名格式：班级 姓名
+                student_name = f"{entry.class_} {entry.student_name}" if entry.class_ else entry.student_name
                 result.append({
                     "名次": i,
-                    "姓名": student_data["student_name"],
-                    "题目数": student_data["correct_count"],
-                    "方法数": student_data["method_count"]
+                    "姓名": student_name,
+                    "题目数": entry.correct_count,
+                    "方法数": entry.method_count
                 })
 
             return result
@@ -168,49 +115,56 @@ class StudentService:
             print(f"获取学生排名失败: {e}")
             return []
 
-    def get_student_dashboard(self, student_id: str, problem_id: int, db: Session) -> StudentDashboardResponse:
+    def get_leaderboard(self, db: Session, course_id: Optional[int] = None, class_name: Optional[str] = None,
+                        cursor: Optional[str] = None, limit: int = 20,
+                        student_id: Optional[str] = None) -> LeaderboardResponse:
+        """获取当前学期按课程/班级范围的排行榜（游标分页，附带我的名次）"""
+        scope = "class" if class_name else "course" if course_id is not None else "semester"
+
+        from services.public_service import public_service
+        current_semester = public_service.get_current_semester(db)
+        if not current_semester:
+            return LeaderboardResponse(scope=scope, items=[], total=0)
+
+        # 游标非法时抛出ValueError，由控制器转换为400
+        from services.ranking_service import ranking_service
+        board = ranking_service.get_leaderboard(
+            semester_id=current_semester.semester_id,
+            db=db,
+            course_id=course_id,
+            class_name=class_name,
+            cursor=cursor,
+            limit=limit,
+            student_id=student_id
+        )
+
+        return LeaderboardResponse(
+            scope=scope,
+            items=[LeaderboardItem(**item) for item in board["items"]],
+            total=board["total"],
+            next_cursor=board["next_cursor"],
+            my_rank=LeaderboardItem(**board["my_rank"]) if board["my_rank"] else None
+        )
+
+    def get_student_dashboard(self, student: Identity, problem_id: int, db: Session) -> StudentDashboardResponse:
         """获取学生对特定题目的答题情况"""
         try:
-            # 首先获取学生的内部ID
-            student = db.query(Student).filter(Student.student_id == student_id).first()
-            if not student:
-                return StudentDashboardResponse(problems=[])
-
-            # 查询基本统计信息
-            basic_stats = db.query(
-                func.count().label("submit_count"),  # 总提交次数
-                func.count(case((AnswerRecord.result_type == 0, 1))).label("correct_count"),  # 正确次数
-                func.count(case((AnswerRecord.result_type != 0, 1))).label("wrong_count"),  # 错误次数
-                func.count(case((AnswerRecord.result_type == 1, 1))).label("syntax_error_count"),  # 语法错误数
-                func.count(case((AnswerRecord.result_type == 2, 1))).label("result_error_count"),  # 结果错误数
-            ).filter(
-                AnswerRecord.student_id == student.id,
-                AnswerRecord.problem_id == problem_id
-            ).first()
+            # 基本统计和方法统计都来自学生×题目汇总行，一次主键查询即可；
+            # 方法数量为不同答案内容（按内容哈希）的数量，在提交答案时维护
+            from services.statistics_service import statistics_service
+            basic_stats = statistics_service.get_stats(db, student.id, problem_id)
 
-            # 查询方法相关统计
-            # 获取所有不同的答案内容及其出现次数
-            method_stats = db.query(
-                AnswerRecord.answer_content,
-                func.count().label("method_count")
-            ).filter(
-                AnswerRecord.student_id == student.id,
-                AnswerRecord.problem_id == problem_id
-            ).group_by(AnswerRecord.answer_content).all()
-
-            # 计算方法数量（不同答案内容的数量）
-            correct_method_count = len(method_stats)
+            correct_method_count = basic_stats.content_count if basic_stats else 0
 
-            # 计算重复方法数（每个方法重复次数之和，减去方法总数）
-            total_submissions = sum(stat.method_count for stat in method_stats)
-            repeat_method_count = total_submissions - correct_method_count if correct_method_count > 0 else 0
+            # 计算重复方法数（总提交次数减去方法总数）
+            repeat_method_count = basic_stats.submit_count - correct_method_count if basic_stats else 0
 
             # 构建响应数据
             dashboard_item = StudentDashboardItem(
                 problem_id=problem_id,
                 submit_count=basic_stats.submit_count if basic_stats else 0,
                 correct_count=basic_stats.correct_count if basic_stats else 0,
-                wrong_count=basic_stats.wrong_count if basic_stats else 0,
+                wrong_count=basic_stats.submit_count - basic_stats.correct_count if basic_stats else 0,
                 correct_method_count=correct_method_count,
                 repeat_method_count=repeat_method_count,
                 syntax_error_count=basic_stats.syntax_error_count if basic_stats else 0,
@@ -223,22 +177,9 @@ class StudentService:
             print(f"获取学生数据面板失败: {e}")
             return StudentDashboardResponse(problems=[])
 
-    def submit_answer(self, student_id: str, problem_id: int, answer_content: str, db: Session, engine_type: str = "mysql") -> Tuple[int, str, Optional[int]]:
+    def submit_answer(self, student: Identity, problem_id: int, answer_content: str, db: Session, engine_type: str = "mysql") -> Tuple[int, str, Optional[int]]:
         """提交答题结果"""
         try:
-            # SQL安全检查：防止学生提交危险的SQL语句
-            dangerous_keywords = ['DELETE', 'TRUNCATE', 'DROP', 'ALTER']
-            answer_upper = answer_content.upper().strip()
-            
-            for keyword in dangerous_keywords:
-                if keyword in answer_upper:
-                    return -1, f"禁止使用 {keyword} 语句，学生不能对数据库表进行更改操作", None
-            
-            # 首先验证学生是否存在
-            student = db.query(Student).filter(Student.student_id == student_id).first()
-            if not student:
-                return -1, "学生不存在", None
-
             # 验证题目是否存在
             problem = db.query(Problem).filter(Problem.problem_id == problem_id).first()
             if not problem:
@@ -248,6 +189,16 @@ class StudentService:
             if not problem.example_sql:
                 return -1, "题目缺少标准答案", None
 
+            # SQL安全检查：防止学生提交危险的SQL语句
+            # DML题目的修改会回滚或只作用于沙箱，允许 DELETE，仍禁止修改表结构
+            is_dml_problem = bool(problem.check_sql)
+            dangerous_keywords = ['TRUNCATE', 'DROP', 'ALTER'] if is_dml_problem else ['DELETE', 'TRUNCATE', 'DROP', 'ALTER']
+            answer_upper = answer_content.upper().strip()
+
+            for keyword in dangerous_keywords:
+                if keyword in answer_upper:
+                    return -1, f"禁止使用 {keyword} 语句，学生不能对数据库表进行更改操作", None
+
             # 获取题目对应的数据库模式
             schema = None
             if problem.schema_id:
@@ -265,78 +216,98 @@ class StudentService:
             message = "结果正确"
             method_count = None
 
-            # 1. 如果有数据库模式，根据引擎类型切换数据库或模式
-            if schema and schema.sql_schema:
-                if engine_type == "mysql":
-                    # MySQL使用USE语句切换数据库
-                    switch_sql = f"USE {schema.sql_schema};"
-                elif engine_type in ["postgresql", "opengauss"]:
-                    # PostgreSQL和OpenGauss使用SET search_path切换模式
-                    switch_sql = f"SET search_path TO {schema.sql_schema};"
-                else:
-                    switch_sql = f"USE {schema.sql_schema};"  # 默认使用USE语句
-
-                switch_success, switch_message, _ = database_engine_service.execute_sql(switch_sql, engine_type)
-                if not switch_success:
-                    print(f"执行数据库切换失败: {switch_message}")
-                    # 结束并返回错误信息
-                    return -1, f"数据库切换失败: {switch_message}", None
+            if is_dml_problem:
+                # DML题目：执行学生语句后用验证查询比对数据状态，共享的教学模式不会被修改
+                if not schema or not schema.sql_schema:
+                    return -1, "DML题目缺少数据库模式", None
 
-            # 2. 检查学生SQL的语法
-            # 把switch_sql拼接在answer_content前面，用分号;分隔
-            if schema and schema.sql_schema:
-                # 构建完整的SQL语句（包含数据库切换语句）
-                if engine_type == "mysql":
-                    full_sql = f"USE {schema.sql_schema};{answer_content}"
-                elif engine_type in ["postgresql", "opengauss"]:
-                    full_sql = f"SET search_path TO {schema.sql_schema};{answer_content}"
+                if DML_JUDGE_MODE == "sandbox":
+                    from services.sandbox_service import sandbox_service
+                    judge_dml = sandbox_service.judge
                 else:
-                    full_sql = f"USE {schema.sql_schema};{answer_content}"
+                    judge_dml = database_engine_service.judge_dml_in_rollback
+
+                result_type, message = judge_dml(
+                    sql_schema=schema.sql_schema,
+                    engine_type=engine_type,
+                    answer_sql=answer_content,
+                    reference_sql=problem.example_sql,
+                    check_sql=problem.check_sql,
+                    is_ordered=bool(problem.is_ordered)
+                )
             else:
-                full_sql = answer_content
+                # 1. 如果有数据库模式，根据引擎类型切换数据库或模式
+                if schema and schema.sql_schema:
+                    if engine_type == "mysql":
+                        # MySQL使用USE语句切换数据库
+                        switch_sql = f"USE {schema.sql_schema};"
+                    elif engine_type in ["postgresql", "opengauss"]:
+                        # PostgreSQL和OpenGauss使用SET search_path切换模式
+                        switch_sql = f"SET search_path TO {schema.sql_schema};"
+                    else:
+                        switch_sql = f"USE {schema.sql_schema};"  # 默认使用USE语句
+
+                    switch_success, switch_message, _ = database_engine_service.execute_sql(switch_sql, engine_type)
+                    if not switch_success:
+                        print(f"执行数据库切换失败: {switch_message}")
+                        # 结束并返回错误信息
+                        return -1, f"数据库切换失败: {switch_message}", None
+
+                # 2. 检查学生SQL的语法
+                # 把switch_sql拼接在answer_content前面，用分号;分隔
+                if schema and schema.sql_schema:
+                    # 构建完整的SQL语句（包含数据库切换语句）
+                    if engine_type == "mysql":
+                        full_sql = f"USE {schema.sql_schema};{answer_content}"
+                    elif engine_type in ["postgresql", "opengauss"]:
+                        full_sql = f"SET search_path TO {schema.sql_schema};{answer_content}"
+                    else:
+                        full_sql = f"USE {schema.sql_schema};{answer_content}"
+                else:
+                    full_sql = answer_content
 
-            success, error_msg, student_result = database_engine_service.execute_sql(full_sql, engine_type)
+                success, error_msg, student_result = database_engine_service.execute_sql(full_sql, engine_type)
 
-            if not success:
-                # 语法错误
-                result_type = 1
-                message = f"语法错误: {error_msg}"
-            else:
-                # 语法正确，进行结果比较
-                # 根据题目的is_orderd字段选择比较方式
-                is_ordered = problem.is_ordered if problem.is_ordered is not None else 0
-
-                # 构建完整的SQL语句（包含数据库切换语句）
-                def build_full_sql(sql_content):
-                    if schema and schema.sql_schema:
-                        if engine_type == "mysql":
-                            return f"USE {schema.sql_schema};\n{sql_content}"
-                        elif engine_type in ["postgresql", "opengauss"]:
-                            return f"SET search_path TO {schema.sql_schema};\n{sql_content}"
-                        else:
-                            return f"USE {schema.sql_schema};\n{sql_content}"  # 默认使用USE语句
-                    return sql_content
-
-                student_full_sql = build_full_sql(answer_content)
-                answer_full_sql = build_full_sql(problem.example_sql)
-
-                if is_ordered == 0:
-                    # 行无序比较，使用EXCEPT ALL
-                    result_match, compare_msg = database_engine_service.compare_results_unordered(
-                        student_full_sql, answer_full_sql, engine_type
-                    )
+                if not success:
+                    # 语法错误
+                    result_type = 1
+                    message = f"语法错误: {error_msg}"
                 else:
-                    # 行有序比较，使用JSON数组比较
-                    result_match, compare_msg = database_engine_service.compare_results_ordered(
-                        student_full_sql, answer_full_sql, engine_type
-                    )
-
-                if not result_match:
-                    result_type = 2
-                    message = "结果错误"
-                else:
-                    result_type = 0
-                    message = "结果正确"
+                    # 语法正确，进行结果比较
+                    # 根据题目的is_orderd字段选择比较方式
+                    is_ordered = problem.is_ordered if problem.is_ordered is not None else 0
+
+                    # 构建完整的SQL语句（包含数据库切换语句）
+                    def build_full_sql(sql_content):
+                        if schema and schema.sql_schema:
+                            if engine_type == "mysql":
+                                return f"USE {schema.sql_schema};\n{sql_content}"
+                            elif engine_type in ["postgresql", "opengauss"]:
+                                return f"SET search_path TO {schema.sql_schema};\n{sql_content}"
+                            else:
+                                return f"USE {schema.sql_schema};\n{sql_content}"  # 默认使用USE语句
+                        return sql_content
+
+                    student_full_sql = build_full_sql(answer_content)
+                    answer_full_sql = build_full_sql(problem.example_sql)
+
+                    if is_ordered == 0:
+                        # 行无序比较，使用EXCEPT ALL
+                        result_match, compare_msg = database_engine_service.compare_results_unordered(
+                            student_full_sql, answer_full_sql, engine_type
+                        )
+                    else:
+                        # 行有序比较，使用JSON数组比较
+                        result_match, compare_msg = database_engine_service.compare_results_ordered(
+                            student_full_sql, answer_full_sql, engine_type
+                        )
+
+                    if not result_match:
+                        result_type = 2
+                        message = "结果错误"
+                    else:
+                        result_type = 0
+                        message = "结果正确"
 
             # 创建答题记录，使用当前服务器时间作为时间戳
             current_time = datetime.now()
@@ -345,13 +316,27 @@ class StudentService:
                 problem_id=problem_id,
                 answer_content=answer_content,
                 result_type=result_type,
-                timestep=current_time
+                timestep=current_time,
+                method_signature=sql_method_service.build_method_signature(answer_content),
+                content_hash=sql_method_service.build_content_hash(answer_content)
             )
 
+            # 在同一事务内更新学生×题目统计汇总和提交量时间桶
+            from services.statistics_service import statistics_service
+            from services.activity_service import activity_service
+            statistics_service.record_submission(db, answer_record)
+            activity_service.record_submission(db, answer_record)
+
             db.add(answer_record)
             db.commit()
             db.refresh(answer_record)
 
+            # 答题数据变化：答对时更新排行榜索引中该学生的名次，题目完成情况缓存失效
+            if result_type == 0:
+                from services.ranking_service import ranking_service
+                ranking_service.refresh_student(student.id, db)
+            statistics_service.invalidate_problem_summary(problem.problem_id, problem.schema_id)
+
             # 返回结果
             return result_type, message, answer_record.id
 
@@ -442,14 +427,9 @@ class StudentService:
             print(f"获取启用状态数据库模式列表失败: {e}")
             return DatabaseSchemaListResponse(schemas=[], total=0)
 
-    def get_student_answer_records(self, student_id: str, problem_id: int, db: Session) -> Optional[StudentAnswerRecordsResponse]:
+    def get_student_answer_records(self, student: Identity, problem_id: int, db: Session) -> Optional[StudentAnswerRecordsResponse]:
         """根据题目ID查询当前学生提交的答题记录"""
         try:
-            # 获取学生的内部ID
-            student = db.query(Student).filter(Student.student_id == student_id).first()
-            if not student:
-                return None
-
             # 查询该学生该题目的所有答题记录，按时间倒序排列
             answer_records = db.query(AnswerRecord).filter(
                 AnswerRecord.student_id == student.id,
@@ -470,7 +450,7 @@ class StudentService:
                 ))
 
             return StudentAnswerRecordsResponse(
-                student_id=int(student_id),
+                student_id=int(student.account),
                 problem_id=problem_id,
                 records=record_list
             )
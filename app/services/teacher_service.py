@@ -1,13 +1,13 @@
-from typing import Optional, List, Dict, Tuple, Any
+from typing import Optional, List, Dict, Tuple, Any, Iterator
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case, distinct, and_
+from sqlalchemy import func, case, and_, or_, update, select
 from starlette import status
 
 from models import (
     Teacher, Course, Semester, Student, CourseSelection, AnswerRecord, Problem,
-    DatabaseSchema
+    DatabaseSchema, StudentProblemStats
 )
 from schemas.teacher import (
     TeacherProfileResponse, StudentCreateRequest,
@@ -26,8 +26,13 @@ from schemas.teacher import (
 from datetime import datetime
 import json
 import os
-import psycopg2
 from services.public_service import public_service
+from utils.cursor import encode_cursor, decode_cursor
+from utils.stream_writers import iter_csv, iter_xlsx
+from services.statistics_service import statistics_service
+from services.schema_version_service import schema_version_service
+from services.jwt_service import jwt_service
+from services.identity_service import Identity
 
 class TeacherService:
     """教师服务类"""
@@ -69,14 +74,9 @@ class TeacherService:
         return '\n'.join(result_lines).strip()
 
 
-    def get_teacher_profile(self, teacher_id: str, db: Session) -> Optional[TeacherProfileResponse]:
+    def get_teacher_profile(self, teacher: Identity, db: Session) -> Optional[TeacherProfileResponse]:
         """获取教师个人信息"""
         try:
-            # 获取教师基本信息
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return None
-
             # 获取当前学期（调用公共服务）
             from services.public_service import public_service
             current_semester = public_service.get_current_semester(db)
@@ -85,8 +85,8 @@ class TeacherService:
             # 获取教师信息，这里假设任课教师就是教师本人
             # 根据实际业务逻辑调整
             return TeacherProfileResponse(
-                teacher_id=teacher.teacher_id,
-                teacher_name=teacher.teacher_name or "未知",
+                teacher_id=teacher.account,
+                teacher_name=teacher.name or "未知",
                 semester_name=semester_name,
             )
 
@@ -100,15 +100,10 @@ class TeacherService:
 
     # 已删除: export_course_grades 方法 - 功能已整合到其他方法
 
-    def create_student(self, teacher_id: str, student_data: StudentCreateRequest,
+    def create_student(self, teacher: Identity, student_data: StudentCreateRequest,
                       db: Session) -> Tuple[bool, str, Optional[StudentCreateResponse]]:
         """教师创建学生"""
         try:
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return False, "教师不存在", None
-
             # 检查学生ID是否已存在
             existing_student = db.query(Student).filter(
                 Student.student_id == student_data.student_id
@@ -121,7 +116,7 @@ class TeacherService:
                 student_id=student_data.student_id,
                 student_name=student_data.student_name,
                 class_=student_data.class_,
-                student_password=student_data.student_password
+                student_password=jwt_service.hash_password(student_data.student_password)
             )
 
             db.add(new_student)
@@ -143,95 +138,34 @@ class TeacherService:
             print(f"创建学生失败: {e}")
             return False, f"创建失败: {str(e)}", None
 
-    def add_student_course_batch(self, teacher_id: str, course_data_list: List[StudentCourseItem],
+    def add_student_course_batch(self, teacher: Identity, course_data_list: List[StudentCourseItem],
                                 db: Session) -> Tuple[bool, str, Optional[StudentCourseAddResponse]]:
         """批量添加学生选课信息"""
         try:
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return False, "教师不存在", None
-
             # 获取当前学期ID
             from services.public_service import public_service
             current_semester = public_service.get_current_semester(db)
             if not current_semester:
                 return False, "无法获取当前学期信息", None
 
-            success_count = 0
-            fail_count = 0
-            fail_details = []
-
-            for course_data in course_data_list:
-                try:
-                    # 验证课程是否存在
-                    course = db.query(Course).filter(Course.course_id == course_data.course_id).first()
-                    if not course:
-                        fail_count += 1
-                        fail_details.append(f"学生 {course_data.student_id}: 课程ID {course_data.course_id} 不存在")
-                        continue
-
-                    # 检查学生是否已存在
-                    existing_student = db.query(Student).filter(
-                        Student.student_id == course_data.student_id
-                    ).first()
-
-                    if existing_student:
-                        # 学生已存在，检查是否已经选择了该课程
-                        existing_selection = db.query(CourseSelection).filter(
-                            CourseSelection.student_id == existing_student.id,
-                            CourseSelection.course_id == course_data.course_id,
-                            CourseSelection.semester_id == current_semester.semester_id
-                        ).first()
-
-                        if existing_selection:
-                            fail_count += 1
-                            fail_details.append(f"学生 {course_data.student_id} 已经选择了课程 {course_data.course_id}")
-                            continue
-
-                        # 创建选课记录
-                        new_selection = CourseSelection(
-                            student_id=existing_student.id,
-                            course_id=course_data.course_id,
-                            status=course_data.status,
-                            semester_id=current_semester.semester_id,
-                            score=0  # 默认分数为0
-                        )
-
-                        db.add(new_selection)
-                        success_count += 1
-
-                    else:
-                        # 学生不存在，先创建学生
-                        new_student = Student(
-                            student_id=course_data.student_id,
-                            student_name=course_data.student_name,
-                            class_=course_data.class_,
-                            student_password="default@password"  # 默认密码
-                        )
-
-                        db.add(new_student)
-                        db.flush()  # 获取新学生的ID
-
-                        # 创建选课记录
-                        new_selection = CourseSelection(
-                            student_id=new_student.id,
-                            course_id=course_data.course_id,
-                            status=course_data.status,
-                            semester_id=current_semester.semester_id,
-                            score=0  # 默认分数为0
-                        )
-
-                        db.add(new_selection)
-                        success_count += 1
-
-                except Exception as e:
-                    fail_count += 1
-                    fail_details.append(f"学生{course_data.student_name} {course_data.student_id}: {str(e)}")
-
-            # 提交事务
-            if success_count > 0:
-                db.commit()
+            # 按集合批量导入：预取学生和选课，多行插入新记录
+            from services.roster_service import roster_service
+            rows = [
+                {
+                    "row": index + 1,
+                    "student_id": course_data.student_id,
+                    "student_name": course_data.student_name,
+                    "class_": course_data.class_,
+                    "status": course_data.status,
+                    "course_id": course_data.course_id
+                }
+                for index, course_data in enumerate(course_data_list)
+            ]
+            report = roster_service.import_rows(rows, current_semester.semester_id, db)
+
+            success_count = report["created_selections"]
+            fail_count = len(report["errors"])
+            fail_details = [f"第{error['row']}条 学生 {error['student_id']}: {error['error']}" for error in report["errors"]]
 
             # 根据成功和失败情况返回不同的响应
             if success_count == 0:
@@ -259,18 +193,22 @@ class TeacherService:
 
 
 
-    def calculate_scores(self, teacher_id: str, problem_ids: List[int],
-                        db: Session) -> ScoreUpdateResponse:
-        """教师核算分数"""
-        try:
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return ScoreUpdateResponse(
-                    code=400,
-                    msg="教师不存在"
-                )
+    def calculate_scores(self, teacher: Identity, problem_ids: List[int], db: Session,
+                        points_per_problem: int = 10, max_score: int = 100) -> ScoreUpdateResponse:
+        """
+        教师核算分数
+
+        一次聚合查询得到所有学生在指定题目上的正确题目数，再按课程批量更新选课记录的分数，
+        分数未变化的选课记录不会被更新。
 
+        Args:
+            teacher: 教师身份
+            problem_ids: 计分题目ID列表
+            db: 数据库会话
+            points_per_problem: 每道题的分值
+            max_score: 分数上限
+        """
+        try:
             # 获取当前学期
             from services.public_service import public_service
             current_semester = public_service.get_current_semester(db)
@@ -280,57 +218,55 @@ class TeacherService:
                     msg="未找到当前学期"
                 )
 
-            # 获取本学期的所有课程
-            courses = db.query(Course).filter(
+            # 获取本学期所有课程的选课记录
+            course_selections = db.query(
+                CourseSelection.id,
+                CourseSelection.course_id,
+                CourseSelection.student_id,
+                CourseSelection.score
+            ).join(
+                Course, CourseSelection.course_id == Course.course_id
+            ).filter(
                 Course.semester_id == current_semester.semester_id
             ).all()
 
-            if not courses:
+            if not course_selections:
+                has_course = db.query(Course.course_id).filter(
+                    Course.semester_id == current_semester.semester_id
+                ).first()
+                if not has_course:
+                    return ScoreUpdateResponse(
+                        code=400,
+                        msg="当前学期没有课程"
+                    )
                 return ScoreUpdateResponse(
-                    code=400,
-                    msg="当前学期没有课程"
+                    code=200,
+                    msg="更新分数成功"
                 )
 
-            score_list = []
-
-            # 遍历每门课程
-            for course in courses:
-                # 获取选课学生及其选课记录
-                course_selections = db.query(
-                    CourseSelection,
-                    Student.student_id,
-                    Student.student_name,
-                    Student.class_
-                ).join(
-                    Student, CourseSelection.student_id == Student.id
-                ).filter(
-                    CourseSelection.course_id == course.course_id
-                ).all()
-
-                # 计算每个学生的分数
-                for course_selection, student_id, student_name, student_class in course_selections:
-                    # 查询学生在指定题目上的正确答题数（result_type == 0表示正确）
-                    correct_count = db.query(func.count(distinct(AnswerRecord.problem_id))).filter(
-                        AnswerRecord.student_id == course_selection.student_id,
-                        AnswerRecord.problem_id.in_(problem_ids),
-                        AnswerRecord.result_type == 0
-                    ).scalar() or 0
-
-                    # 每道题10分
-                    total_score = correct_count * 10
-                    # 分数上限是100分
-                    total_score = min(total_score, 100)
-
-                    # 更新选课记录中的分数
-                    course_selection.score = total_score
+            # 一次聚合查询：每个学生在指定题目上的正确题目数（汇总行 correct_count > 0 表示已答对）
+            correct_counts = dict(db.query(
+                StudentProblemStats.student_id,
+                func.count()
+            ).filter(
+                StudentProblemStats.student_id.in_({selection.student_id for selection in course_selections}),
+                StudentProblemStats.problem_id.in_(problem_ids),
+                StudentProblemStats.correct_count > 0
+            ).group_by(StudentProblemStats.student_id).all())
+
+            # 按课程分组需要更新的分数
+            updates_by_course: Dict[int, List[Dict[str, int]]] = {}
+            for selection in course_selections:
+                total_score = min(correct_counts.get(selection.student_id, 0) * points_per_problem, max_score)
+                if selection.score != total_score:
+                    updates_by_course.setdefault(selection.course_id, []).append({
+                        "id": selection.id,
+                        "score": total_score
+                    })
 
-                    score_list.append(StudentScoreInfo(
-                        course_id=course.course_id,
-                        student_id=student_id,
-                        student_name=student_name or "未知",
-                        class_=student_class or "",
-                        total_score=total_score
-                    ))
+            # 每门课程一次批量UPDATE（按主键executemany）
+            for updates in updates_by_course.values():
+                db.execute(update(CourseSelection), updates)
 
             # 提交数据库事务，保存分数更新
             db.commit()
@@ -341,24 +277,16 @@ class TeacherService:
             )
 
         except Exception as e:
+            db.rollback()
             print(f"核算分数失败: {e}")
             return ScoreUpdateResponse(
                 code=500,
                 msg=f"核算失败: {str(e)}"
             )
 
-    def get_student_scores(self, teacher_id: str, db: Session) -> ScoreListResponse:
+    def get_student_scores(self, teacher: Identity, db: Session) -> ScoreListResponse:
         """获取学生分数列表"""
         try:
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return ScoreListResponse(
-                    code=400,
-                    msg="教师不存在",
-                    scorelist=[]
-                )
-
             # 获取当前学期
             from services.public_service import public_service
             current_semester = public_service.get_current_semester(db)
@@ -421,79 +349,92 @@ class TeacherService:
                 scorelist=[]
             )
 
-    def export_scores(self, teacher_id: str, course_id: int, class_id: Optional[str] = None,
-                     db: Session = None) -> Optional[Dict]:
-        """导出分数结果"""
-        try:
-            # 验证教师权限
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return None
+    # 分数导出的列名（与导出文件表头一致）
+    SCORE_EXPORT_COLUMNS = ["学号", "姓名", "班级", "学期", "总分"]
 
-            course = db.query(Course).filter(
-                Course.course_id == course_id,
-                Course.teacher_id == teacher.id
-            ).first()
-            if not course:
-                return None
+    def export_scores(self, teacher: Identity, course_id: int, class_name: Optional[str] = None,
+                      export_format: str = "CSV", db: Session = None) -> Tuple[Optional[Iterator], Optional[str], Optional[str]]:
+        """
+        导出课程分数（CSV、XLSX）
 
-            # 获取当前学期
-            from services.public_service import public_service
-            current_semester = public_service.get_current_semester(db)
-            semester_name = current_semester.semester_name if current_semester else "未知学期"
+        用一次连接查询取出课程（可按班级过滤）所有选课学生的分数，通过服务端游标
+        分批读取并流式写出，整门课程导出只需单次扫描且内存占用固定。
 
-            # 构建查询条件
-            query = db.query(
-                Student.student_id,
-                Student.student_name,
-                Student.class_
-            ).select_from(CourseSelection).join(
-                Student, CourseSelection.student_id == Student.id
-            ).filter(
-                CourseSelection.course_id == course_id
+        Args:
+            teacher: 教师身份
+            course_id: 课程ID
+            class_name: 班级（可选）
+            export_format: 导出格式（CSV、XLSX）
+            db: 数据库会话
+
+        Returns:
+            Tuple[Optional[Iterator], Optional[str], Optional[str]]: (文件流, 错误信息, 媒体类型)
+        """
+        export_format = export_format.upper()
+        if export_format not in ("CSV", "XLSX"):
+            return None, "不支持的导出格式，仅支持 CSV、XLSX", None
+
+        course = db.query(Course).filter(
+            Course.course_id == course_id,
+            Course.teacher_id == teacher.id
+        ).first()
+        if not course:
+            return None, "课程不存在或无权访问", None
+
+        query = db.query(
+            Student.student_id,
+            Student.student_name,
+            Student.class_,
+            Semester.semester_name,
+            CourseSelection.score
+        ).select_from(CourseSelection).join(
+            Student, CourseSelection.student_id == Student.id
+        ).join(
+            Semester, CourseSelection.semester_id == Semester.semester_id
+        ).filter(
+            CourseSelection.course_id == course_id
+        )
+
+        # 如果指定了班级，添加班级过滤
+        if class_name:
+            query = query.filter(Student.class_ == class_name)
+
+        rows = (
+            (row.student_id, row.student_name or "", row.class_ or "", row.semester_name or "", row.score)
+            for row in query.order_by(Student.class_, Student.student_id).yield_per(1000)
+        )
+
+        if export_format == "CSV":
+            content = iter_csv(
+                (dict(zip(self.SCORE_EXPORT_COLUMNS, row)) for row in rows),
+                fieldnames=self.SCORE_EXPORT_COLUMNS
             )
+            return content, None, "text/csv; charset=utf-8"
 
-            # 如果指定了班级，添加班级过滤
-            if class_id:
-                query = query.filter(Student.class_ == class_id)
-
-            students = query.all()
-
-            # 构建导出数据
-            export_data = {
-                "course_info": {
-                    "course_id": course_id,
-                    "course_name": course.course_name or "未命名课程",
-                    "semester_name": semester_name,
-                    "class_filter": class_id or "全部班级",
-                    "export_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "total_students": len(students)
-                },
-                "students": []
-            }
-            for student in students:
-                # 根据学号和课程号查询选课表里的分数
-                query = db.query(
-                    CourseSelection.score
-                ).select_from(CourseSelection).join(
-                    Student, CourseSelection.student_id == Student.id
-                ).filter(
-                    CourseSelection.course_id == course_id,
-                    CourseSelection.student_id == student.student_id
+        content = iter_xlsx([("成绩", self.SCORE_EXPORT_COLUMNS, rows)])
+        return content, None, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
-                )
-                export_data["students"].append({
-                    "学号": student.student_id,
-                    "姓名": student.student_name,
-                    "班级": student.class_,
-                    "总分": CourseSelection.score  # 模拟分数
-                })
+    def export_dataset(self, schema_name: str, format: str, db: Session,
+                       engine_type: str = "mysql") -> Tuple[Optional[Iterator], Optional[str], Optional[str]]:
+        """
+        导出数据库模式相关数据（XLSX、JSON、XML），数据从服务端游标流式写出
 
-            return export_data
+        Args:
+            schema_name: 数据库模式名称
+            format: 导出格式
+            db: 数据库会话
+            engine_type: 数据来源引擎
 
-        except Exception as e:
-            print(f"导出分数失败: {e}")
-            return None
+        Returns:
+            Tuple[Optional[Iterator], Optional[str], Optional[str]]: (文件流, 错误信息, 媒体类型)
+        """
+        from services.export_service import export_service
+        return export_service.export_schema(
+            schema_name=schema_name,
+            export_format=format,
+            db=db,
+            engine_type=engine_type
+        )
 
     def get_students_by_semester(self, page: int = 1, limit: int = 20, search: Optional[str] = None,
                                 class_filter: Optional[str] = None, semester_id: Optional[int] = None,
@@ -571,19 +512,9 @@ class TeacherService:
 
     # 已删除: get_dashboard_matrix 方法 - 接口已废弃
 
-    def execute_sql_query(self, teacher_id: str, query_data: SQLQueryRequest, db: Session) -> SQLQueryResponse:
+    def execute_sql_query(self, teacher: Identity, query_data: SQLQueryRequest, db: Session) -> SQLQueryResponse:
         """执行SQL查询"""
         try:
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return SQLQueryResponse(
-                    code=400,
-                    msg="教师不存在",
-                    columns=[],
-                    rows=[]
-                )
-
             # 验证数据库模式是否存在
             schema = db.query(DatabaseSchema).filter(DatabaseSchema.schema_id == query_data.schema_id).first()
             if not schema:
@@ -704,31 +635,19 @@ class TeacherService:
             course_id = course_selection.course_id
             status = course_selection.status if hasattr(course_selection, 'status') else 1  # 默认为正常
 
-            # 4. 根据数据库模式id得到题目id范围
-            problems = db.query(Problem).filter(Problem.schema_id == schema_id).all()
-            if not problems:
-                # 如果没有题目，返回基本信息但答题统计为0
-                return StudentProfileDocResponse(
-                    student_id=student.student_id,
-                    student_name=student.student_name or "",
-                    class_name=student.class_ or "",
-                    course_id=course_id,
-                    status=status,
-                    correct_count=0,
-                    submit_count=0
-                )
-
-            problem_ids = [p.problem_id for p in problems]
-
-            # 5. 到答题记录表里根据学号和题目的范围确认答题的正确数量和总提交数
-            answer_records = db.query(AnswerRecord).filter(
-                AnswerRecord.student_id == student.id,
-                AnswerRecord.problem_id.in_(problem_ids)
-            ).all()
+            # 4-5. 在学生×题目统计汇总中按数据库模式的题目范围累加正确数量和总提交数
+            totals = db.query(
+                func.coalesce(func.sum(StudentProblemStats.submit_count), 0).label("submit_count"),
+                func.coalesce(func.sum(StudentProblemStats.correct_count), 0).label("correct_count")
+            ).select_from(StudentProblemStats).join(
+                Problem, StudentProblemStats.problem_id == Problem.problem_id
+            ).filter(
+                StudentProblemStats.student_id == student.id,
+                Problem.schema_id == schema_id
+            ).first()
 
-            # 计算正确数量和总提交数
-            submit_count = len(answer_records)
-            correct_count = sum(1 for record in answer_records if record.result_type == 0)
+            submit_count = int(totals.submit_count) if totals else 0
+            correct_count = int(totals.correct_count) if totals else 0
 
             return StudentProfileDocResponse(
                 student_id=student.student_id,
@@ -750,6 +669,98 @@ class TeacherService:
 
     # 已删除: get_problem_statistics 方法 - 功能已整合到其他方法
 
+    def get_problem_summary(self, problem_id: int, db: Session) -> Optional[Dict[str, int]]:
+        """
+        获取单个题目的完成人数和总提交次数
+
+        Args:
+            problem_id: 题目ID
+            db: 数据库会话
+
+        Returns:
+            Optional[Dict[str, int]]: 包含 problem_id、completed_student_count、total_submission_count，题目不存在时返回None
+        """
+        summaries = statistics_service.get_problem_summaries(db, problem_ids=[problem_id])
+        return summaries[0] if summaries else None
+
+    def get_problem_summaries(self, db: Session, problem_ids: Optional[List[int]] = None,
+                              schema_id: Optional[int] = None) -> List[Dict[str, int]]:
+        """
+        批量获取题目完成情况，题目ID列表和模式ID二选一
+
+        Args:
+            db: 数据库会话
+            problem_ids: 题目ID列表
+            schema_id: 数据库模式ID
+
+        Returns:
+            List[Dict[str, int]]: 题目完成情况列表，不存在的题目不返回
+        """
+        return statistics_service.get_problem_summaries(db, problem_ids=problem_ids, schema_id=schema_id)
+
+    def get_student_problem_stats(self, student_ids: List[str], problem_ids: List[int], db: Session) -> List[Dict[str, Any]]:
+        """
+        批量统计学生在各题目上的提交情况
+
+        先用两次 IN 查询解析存在的学生和题目，再用一次查询从学生×题目统计汇总表
+        按主键范围读取所有组合的统计，不再逐个组合查询。
+
+        Args:
+            student_ids: 学号列表
+            problem_ids: 题目ID列表
+            db: 数据库会话
+
+        Returns:
+            List[Dict[str, Any]]: 按传入顺序排列的学生×题目统计，无提交记录的组合计数为0
+        """
+        # 解析学号对应的内部ID（不存在的学生跳过）
+        students = db.query(Student.id, Student.student_id).filter(
+            Student.student_id.in_(set(student_ids))
+        ).all()
+        student_pk_by_id = {}
+        for student in students:
+            student_pk_by_id.setdefault(student.student_id, student.id)
+
+        # 过滤掉不存在的题目
+        existing_problem_ids = {
+            row.problem_id for row in db.query(Problem.problem_id).filter(
+                Problem.problem_id.in_(set(problem_ids))
+            ).all()
+        }
+
+        if not student_pk_by_id or not existing_problem_ids:
+            return []
+
+        # 一次查询按主键范围读取所有组合的汇总行
+        stats = db.query(StudentProblemStats).filter(
+            StudentProblemStats.student_id.in_(set(student_pk_by_id.values())),
+            StudentProblemStats.problem_id.in_(existing_problem_ids)
+        ).all()
+        stats_by_pair = {(row.student_id, row.problem_id): row for row in stats}
+
+        # 按传入顺序组装结果（即使没有提交记录也添加，显示为0）
+        result_data = []
+        for student_id in student_ids:
+            student_pk = student_pk_by_id.get(student_id)
+            if student_pk is None:
+                continue
+
+            for problem_id in problem_ids:
+                if problem_id not in existing_problem_ids:
+                    continue
+
+                stat = stats_by_pair.get((student_pk, problem_id))
+                result_data.append({
+                    "student_id": student_id,
+                    "problem_id": str(problem_id),
+                    "submit_count": stat.submit_count if stat else 0,
+                    "correct_count": stat.correct_count if stat else 0,
+                    "syntax_error_count": stat.syntax_error_count if stat else 0,
+                    "result_error_count": stat.result_error_count if stat else 0
+                })
+
+        return result_data
+
     def get_all_problems(self, db: Session) -> 'TeacherProblemListDocResponse':
         """获取所有题目列表"""
         try:
@@ -767,7 +778,8 @@ class TeacherService:
                     is_ordered=problem.is_ordered or 0,
                     problem_content=problem.problem_content or "",
                     example_sql=problem.example_sql or "",
-                    knowledge=problem.knowledge or None
+                    knowledge=problem.knowledge or None,
+                    check_sql=problem.check_sql or None
                 ))
 
             return TeacherProblemListDocResponse(
@@ -785,17 +797,9 @@ class TeacherService:
                 data=[]
             )
 
-    def create_problem(self, teacher_id: str, problem_data: ProblemCreateRequest, db: Session) -> ProblemCreateResponse:
+    def create_problem(self, teacher: Identity, problem_data: ProblemCreateRequest, db: Session) -> ProblemCreateResponse:
         """创建题目"""
         try:
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return ProblemCreateResponse(
-                    code=400,
-                    msg="教师不存在"
-                )
-
             # 验证必要参数
             if problem_data.problem_content is None or problem_data.problem_content.strip() == "":
                 return ProblemCreateResponse(
@@ -818,6 +822,13 @@ class TeacherService:
                         msg="指定的数据库模式不存在"
                     )
 
+            # DML题目在教学模式的沙箱中判题，必须关联数据库模式
+            if problem_data.check_sql and problem_data.check_sql.strip() and problem_data.schema_id is None:
+                return ProblemCreateResponse(
+                    code=400,
+                    msg="DML题目必须指定数据库模式"
+                )
+
             # 创建新题目
             new_problem = Problem(
                 schema_id=problem_data.schema_id,
@@ -825,7 +836,8 @@ class TeacherService:
                 is_required=problem_data.is_required,
                 is_ordered=problem_data.is_ordered,
                 example_sql=problem_data.example_sql.strip(),
-                knowledge=problem_data.knowledge.strip() if problem_data.knowledge else None
+                knowledge=problem_data.knowledge.strip() if problem_data.knowledge else None,
+                check_sql=problem_data.check_sql.strip() if problem_data.check_sql and problem_data.check_sql.strip() else None
             )
 
             db.add(new_problem)
@@ -845,20 +857,18 @@ class TeacherService:
                 msg=f"创建题目失败: {str(e)}"
             )
 
-    def update_database_schema(self, teacher_id: str, schema_data: SchemaUpdateRequest,
+    def update_database_schema(self, teacher: Identity, schema_data: SchemaUpdateRequest,
                               db: Session) -> Tuple[bool, str, Optional[SchemaUpdateResponse]]:
         """更新数据库模式"""
         try:
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return False, "教师不存在", None
-
             # 检查数据库模式是否存在
             schema = db.query(DatabaseSchema).filter(DatabaseSchema.schema_id == schema_data.schema_id).first()
             if not schema:
                 return False, "数据库模式不存在", None
 
+            previous_sql_schema = schema.sql_schema
+            changed = False
+
             # 如果提供了SQL文件内容，则验证和执行SQL更新
             if schema_data.sql_file_content and schema_data.sql_file_content.strip():
                 # 验证SQL语句（只允许建表语句）
@@ -872,8 +882,17 @@ class TeacherService:
                 if not success:
                     return False, f"执行SQL失败: {error_msg}", None
 
-                # 更新sql_table字段
+                # 更新sql_table字段，模式版本号加一
                 schema.sql_table = schema_data.sql_file_content
+                schema_version_service.bump(
+                    schema, schema_version_service.compute_checksum(schema_data.sql_file_content)
+                )
+                changed = True
+
+            # 只修改模式名称（指向另一个已有模式）时同样递增版本号，按版本缓存的结构和数据集随之失效
+            if not changed and schema_data.sql_schema != previous_sql_schema:
+                schema_version_service.bump(schema, schema.schema_checksum)
+                changed = True
 
             # 更新数据库模式记录
             schema.schema_name = schema_data.schema_name
@@ -886,6 +905,10 @@ class TeacherService:
 
             db.commit()
 
+            if changed:
+                db.refresh(schema)
+                schema_version_service.publish(schema, previous_sql_schema=previous_sql_schema)
+
             return True, "修改数据库模式成功", SchemaUpdateResponse(
                 code=200,
                 msg="修改数据库模式成功"
@@ -897,71 +920,31 @@ class TeacherService:
             return False, f"更新数据库模式失败: {str(e)}", None
 
     def _execute_schema_sql_update(self, schema_data: SchemaUpdateRequest) -> Tuple[bool, str]:
-        """执行数据库模式SQL更新的私有方法"""
-        try:
-            from services.database_engine_service import database_engine_service
-
-            # 需要更新的数据库引擎列表
-            engines_to_update = ['mysql', 'postgresql', 'opengauss']
-            failed_engines = []
-            success_count = 0
-
-            for sql_engine in engines_to_update:
-                try:
-                    # 检查引擎是否可用
-                    if sql_engine not in database_engine_service.engines:
-                        failed_engines.append(f"{sql_engine}(不可用)")
-                        continue
-
-                    engine = database_engine_service.engines[sql_engine]
-
-                    # 执行SQL
-                    with engine.connect() as connection:
-                        from sqlalchemy import text
-
-                        # 根据数据库类型切换模式
-                        if sql_engine == "mysql":
-                            # MySQL切换代码
-                            connection.execute(text(f"DROP SCHEMA IF EXISTS {schema_data.sql_schema}"))
-                            connection.execute(text(f"CREATE SCHEMA {schema_data.sql_schema}"))
-                            connection.execute(text(f"USE {schema_data.sql_schema}"))
-                        elif sql_engine in ["postgresql", "opengauss"]:
-                            # PostgreSQL+OpenGauss切换代码
-                            connection.execute(text(f"DROP SCHEMA IF EXISTS {schema_data.sql_schema} CASCADE"))
-                            connection.execute(text(f"CREATE SCHEMA {schema_data.sql_schema}"))
-                            connection.execute(text(f"SET search_path TO {schema_data.sql_schema}"))
-
-                        # 执行SQL文件内容（更新时使用单一SQL内容）
-                        connection.execute(text(schema_data.sql_file_content))
-                        connection.commit()
-                        success_count += 1
-
-                except Exception as e:
-                    failed_engines.append(f"{sql_engine}({str(e)})")
-                    continue
-
-            # 如果有引擎执行失败，记录但不阻止整个操作（至少有一个成功即可）
-            if failed_engines:
-                print(f"警告：以下数据库引擎更新失败: {', '.join(failed_engines)}")
+        """
+        在三种数据库引擎上用新的SQL重建模式（更新时使用单一SQL内容）
 
-            # 如果所有引擎都失败，返回错误
-            if success_count == 0:
-                return False, f"所有数据库引擎执行都失败: {', '.join(failed_engines)}"
+        先在临时模式中建表，全部成功后才替换正在使用的模式；失败时原模式保持不变
+        """
+        from services.database_engine_service import database_engine_service
 
-            return True, "SQL执行成功"
+        success, engine_errors = database_engine_service.replace_schema(
+            sql_schema=schema_data.sql_schema,
+            scripts={
+                engine_type: schema_data.sql_file_content
+                for engine_type in ("mysql", "postgresql", "opengauss")
+            }
+        )
+        if not success:
+            engine_names = {"mysql": "MySQL", "postgresql": "PostgreSQL", "opengauss": "OpenGauss"}
+            error_messages = [f"{engine_names[engine_type]}错误: {message}" for engine_type, message in engine_errors.items()]
+            return False, f"数据库引擎执行失败，必须三种数据库都更新成功: {'; '.join(error_messages)}"
 
-        except Exception as e:
-            return False, f"执行SQL时发生异常: {str(e)}"
+        return True, "SQL执行成功"
 
-    def create_database_schema(self, teacher_id: str, schema_data: SchemaCreateRequest,
+    def create_database_schema(self, teacher: Identity, schema_data: SchemaCreateRequest,
                               db: Session) -> Tuple[bool, str, Optional[SchemaCreateResponse]]:
         """根据HTML格式文本、数据库模式名称、SQL引擎和SQL建表文件创建数据库模式"""
         try:
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return False, "教师不存在", None
-
             # 验证必要参数
             if not schema_data.schema_description or not schema_data.schema_description.strip():
                 return False, "模式描述不能为空", None
@@ -985,99 +968,22 @@ class TeacherService:
             if existing_schema:
                 return False, f"数据库模式 '{schema_data.schema_name}' 已存在", None
 
-            # 2. 连接指定的SQL引擎并执行SQL文件
+            # 2. 在三种数据库引擎上并发创建模式并执行SQL文件，任一失败时全部回滚
             from services.database_engine_service import database_engine_service
 
-            # 执行MySQL建表语句
-            mysql_schema_setup_sql = f"DROP SCHEMA IF EXISTS {schema_data.sql_schema};\nCREATE SCHEMA {schema_data.sql_schema};\nUSE {schema_data.sql_schema};"
-            mysql_complete_sql = mysql_schema_setup_sql + "\n" + schema_data.sql_file_content.mysql_engine
-
-            print(f"执行MySQL SQL语句: {mysql_complete_sql}")
-
-            mysql_success, mysql_error_msg, _ = database_engine_service.execute_sql(
-                sql=mysql_complete_sql,
-                engine_type="mysql"
-            )
-
-            # 执行PostgreSQL建表语句
-            postgresql_schema_setup_sql = f"DROP SCHEMA IF EXISTS {schema_data.sql_schema} CASCADE;\nCREATE SCHEMA {schema_data.sql_schema};\nSET search_path TO {schema_data.sql_schema};"
-            postgresql_complete_sql = postgresql_schema_setup_sql + "\n" + schema_data.sql_file_content.postgresql_opengauss_engine
-
-            print(f"执行PostgreSQL SQL语句: {postgresql_complete_sql}")
-
-            postgresql_success, postgresql_error_msg, _ = database_engine_service.execute_sql(
-                sql=postgresql_complete_sql,
-                engine_type="postgresql"
+            success, engine_errors = database_engine_service.provision_schema(
+                sql_schema=schema_data.sql_schema,
+                scripts={
+                    "mysql": schema_data.sql_file_content.mysql_engine,
+                    "postgresql": schema_data.sql_file_content.postgresql_opengauss_engine,
+                    "opengauss": schema_data.sql_file_content.postgresql_opengauss_engine
+                }
             )
 
-            # 执行OpenGauss建表语句（使用直接psycopg2连接）
-            opengauss_schema_setup_sql = f"DROP SCHEMA IF EXISTS {schema_data.sql_schema} CASCADE;\nCREATE SCHEMA {schema_data.sql_schema};\nSET search_path TO {schema_data.sql_schema};"
-            opengauss_complete_sql = opengauss_schema_setup_sql + "\n" + schema_data.sql_file_content.postgresql_opengauss_engine
-
-            opengauss_success = False
-            opengauss_error_msg = ""
-
-            try:
-                # 从环境变量获取 OpenGauss 连接配置
-                host = os.getenv("OPENGAUSS_HOST", "localhost")
-                port = os.getenv("OPENGAUSS_PORT", "15432")
-                database = os.getenv("OPENGAUSS_DATABASE", "postgres")
-                user = os.getenv("OPENGAUSS_USER", "gaussdb")
-                password = os.getenv("OPENGAUSS_PASSWORD", "@Wyx778899")
-
-                # 使用psycopg2直接连接OpenGauss
-                conn = psycopg2.connect(
-                    host=host,
-                    port=port,
-                    database=database,
-                    user=user,
-                    password=password,
-                    options=f"-c client_encoding=UTF8"  # 显式设置客户端编码为 UTF-8
-                )
-
-                with conn.cursor() as cur:
-                    # 分割并执行多个SQL语句
-                    sql_statements = [stmt.strip() for stmt in opengauss_complete_sql.split(';') if stmt.strip()]
-                    for statement in sql_statements:
-                        cur.execute(statement)
-
-                    # 提交事务
-                    conn.commit()
-                    opengauss_success = True
-
-            except psycopg2.Error as e:
-                opengauss_error_msg = f"OpenGauss连接错误: {e}"
-            except Exception as e:
-                opengauss_error_msg = f"OpenGauss执行错误: {e}"
-            finally:
-                # 确保关闭连接
-                if 'conn' in locals() and conn:
-                    conn.close()
-
-            # 检查执行结果
-            success_count = 0
-            error_messages = []
-
-            if mysql_success:
-                success_count += 1
-                print("MySQL执行成功")
-            else:
-                error_messages.append(f"MySQL错误: {mysql_error_msg}")
-
-            if postgresql_success:
-                success_count += 1
-                print("PostgreSQL执行成功")
-            else:
-                error_messages.append(f"PostgreSQL错误: {postgresql_error_msg}")
-
-            if opengauss_success:
-                success_count += 1
-                print("OpenGauss执行成功")
-            else:
-                error_messages.append(f"OpenGauss错误: {opengauss_error_msg}")
-
             # 必须三种数据库都成功才返回正确
-            if success_count < 3:
+            if not success:
+                engine_names = {"mysql": "MySQL", "postgresql": "PostgreSQL", "opengauss": "OpenGauss"}
+                error_messages = [f"{engine_names[engine_type]}错误: {message}" for engine_type, message in engine_errors.items()]
                 return False, f"数据库引擎执行失败，必须三种数据库都创建成功: {'; '.join(error_messages)}", None
 
             # 4. 执行成功后将数据插入到database_schema表中
@@ -1091,13 +997,21 @@ class TeacherService:
                 schema_discription=schema_data.schema_description,  # 使用模式描述
                 sql_schema=schema_data.sql_schema,  # 保存SQL模式名称
                 schema_author=schema_data.schema_author,  # 使用请求中的作者
-                sql_table=schema_definition_only  # 只保存建表语句部分，不包含INSERT语句
+                sql_table=schema_definition_only,  # 只保存建表语句部分，不包含INSERT语句
+                schema_version=1,
+                schema_checksum=schema_version_service.compute_checksum(
+                    schema_data.sql_file_content.mysql_engine,
+                    schema_data.sql_file_content.postgresql_opengauss_engine
+                )
             )
 
             db.add(new_schema)
             db.commit()
             db.refresh(new_schema)
 
+            # 同名模式可能被重建，通知依赖模式数据的缓存
+            schema_version_service.publish(new_schema)
+
             response = SchemaCreateResponse(
                 code=200,
                 msg="创建数据库模式成功"
@@ -1110,57 +1024,110 @@ class TeacherService:
             print(f"创建数据库模式失败: {e}")
             return False, f"创建失败: {str(e)}", None
 
-    def get_student_answer_records(self, semester_ids: List[int], db: Session) -> List[Dict[str, Any]]:
-        """根据学期ID列表获取学生答题记录"""
+    def _answer_records_query(self, semester_ids: List[int], db: Session):
+        """学期范围内学生答题记录的查询，按提交时间、记录ID倒序"""
+        # 学生范围用 IN 子查询表达，学生在同一学期选多门课时记录不会重复
+        student_scope = select(CourseSelection.student_id).where(
+            CourseSelection.semester_id.in_(semester_ids)
+        )
+
+        return db.query(
+            AnswerRecord.id,
+            Student.student_id,
+            Problem.problem_content,
+            AnswerRecord.result_type,
+            AnswerRecord.answer_content,
+            AnswerRecord.timestep
+        ).join(
+            Student, Student.id == AnswerRecord.student_id
+        ).join(
+            Problem, AnswerRecord.problem_id == Problem.problem_id
+        ).filter(
+            AnswerRecord.student_id.in_(student_scope)
+        ).order_by(
+            AnswerRecord.timestep.desc(),
+            AnswerRecord.id.desc()
+        )
+
+    def _format_answer_record(self, record) -> Dict[str, Any]:
+        """把答题记录查询结果行转换为字典"""
+        return {
+            "student_id": record.student_id,
+            "problem_content": record.problem_content or "",
+            "result_type": record.result_type,
+            "answer_content": record.answer_content or "",
+            "timestep": record.timestep.strftime("%Y-%m-%d %H:%M:%S") if record.timestep else ""
+        }
+
+    def get_student_answer_records(self, semester_ids: List[int], db: Session, cursor: Optional[str] = None,
+                                   limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        根据学期ID列表获取学生答题记录（按 (timestep, id) 游标分页）
+
+        Args:
+            semester_ids: 学期ID列表
+            db: 数据库会话
+            cursor: 上一页返回的游标
+            limit: 每页数量，为空时返回全部记录
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: (答题记录列表, 下一页游标)
+
+        Raises:
+            ValueError: 游标无效
+        """
+        query = self._answer_records_query(semester_ids, db)
+
+        if cursor:
+            values = decode_cursor(cursor)
+            try:
+                last_time = datetime.fromisoformat(values["t"])
+                last_id = int(values["i"])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"无效的分页游标: {cursor}")
+            query = query.filter(or_(
+                AnswerRecord.timestep < last_time,
+                and_(AnswerRecord.timestep == last_time, AnswerRecord.id < last_id)
+            ))
+
         try:
-            from schemas.teacher import StudentAnswerRecord
-            from models.course_selection import CourseSelection
-            
-            # 根据学期ID从选课表中获取学生范围，然后查询这些学生的答题记录
-            records = db.query(
-                Student.student_id,
-                Problem.problem_content,
-                AnswerRecord.result_type,
-                AnswerRecord.answer_content,
-                AnswerRecord.timestep
-            ).join(
-                AnswerRecord, Student.id == AnswerRecord.student_id
-            ).join(
-                Problem, AnswerRecord.problem_id == Problem.problem_id
-            ).join(
-                CourseSelection, Student.id == CourseSelection.student_id
-            ).filter(
-                CourseSelection.semester_id.in_(semester_ids)
-            ).order_by(
-                AnswerRecord.timestep.desc()
-            ).all()
+            if limit is None:
+                return [self._format_answer_record(record) for record in query.all()], None
 
-            # 转换为字典列表
-            result = []
-            for record in records:
-                result.append({
-                    "student_id": record.student_id,
-                    "problem_content": record.problem_content or "",
-                    "result_type": record.result_type,
-                    "answer_content": record.answer_content or "",
-                    "timestep": record.timestep.strftime("%Y-%m-%d %H:%M:%S") if record.timestep else ""
-                })
+            # 多取一条判断是否还有下一页
+            records = query.limit(limit + 1).all()
+            next_cursor = None
+            if len(records) > limit:
+                records = records[:limit]
+                last = records[-1]
+                next_cursor = encode_cursor({"t": last.timestep.isoformat(), "i": last.id})
 
-            return result
+            return [self._format_answer_record(record) for record in records], next_cursor
 
         except Exception as e:
             print(f"获取学生答题记录失败: {e}")
-            return []
+            return [], None
+
+    def iter_student_answer_records(self, semester_ids: List[int], db: Session,
+                                    batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        逐行产出学期范围内的学生答题记录，使用服务端游标分批读取，内存占用与记录数无关
+
+        Args:
+            semester_ids: 学期ID列表
+            db: 数据库会话
+            batch_size: 每批从数据库读取的行数
+
+        Yields:
+            Dict[str, Any]: 答题记录
+        """
+        for record in self._answer_records_query(semester_ids, db).yield_per(batch_size):
+            yield self._format_answer_record(record)
 
-    def update_schema_status(self, teacher_id: str, request_data: SchemaStatusUpdateRequest, 
+    def update_schema_status(self, teacher: Identity, request_data: SchemaStatusUpdateRequest, 
                            db: Session) -> Tuple[bool, str, Optional[SchemaStatusUpdateResponse]]:
         """设置数据库模式的权限"""
         try:
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return False, "教师不存在", None
-
             # 验证数据库模式是否存在
             schema = db.query(DatabaseSchema).filter(
                 DatabaseSchema.schema_id == request_data.schema_id
@@ -1188,51 +1155,73 @@ class TeacherService:
             print(f"设置数据库模式权限失败: {e}")
             return False, f"设置失败: {str(e)}", None
 
-    async def analyze_problem_knowledge_mastery(self, teacher_id: str, problem_data: List[Dict], db: Session) -> Tuple[bool, str, Optional['ProblemKnowledgeAnalysisResponse']]:
-        """AI分析题目知识点掌握度"""
+    async def analyze_problem_knowledge_mastery(self, teacher: Identity, db: Session, problem_ids: Optional[List[int]] = None,
+                                                schema_id: Optional[int] = None) -> Tuple[bool, str, Optional['ProblemKnowledgeAnalysisResponse']]:
+        """
+        AI分析题目知识点掌握度
+
+        题目用一次 IN 查询（或按模式）读取，完成人数和总提交次数由服务端从学生×题目统计汇总
+        一次分组查询得到，AI 接口在线程池中调用，不阻塞事件循环。
+
+        Args:
+            teacher: 教师身份
+            db: 数据库会话
+            problem_ids: 题目ID列表（与 schema_id 二选一）
+            schema_id: 数据库模式ID，分析该模式下的所有题目
+
+        Returns:
+            Tuple[bool, str, Optional[ProblemKnowledgeAnalysisResponse]]: (是否成功, 消息, 响应)
+        """
         try:
             from schemas.teacher import ProblemKnowledgeAnalysisResponse
             from services.ai_service import ai_service
-            
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                return False, "教师不存在", None
 
-            # 构建AI分析的数据
+            # 一次查询读取所有题目的知识点
+            query = db.query(Problem.problem_id, Problem.knowledge)
+            if schema_id is not None:
+                query = query.filter(Problem.schema_id == schema_id).order_by(Problem.problem_id)
+            else:
+                query = query.filter(Problem.problem_id.in_(problem_ids or []))
+            knowledge_by_id = {row.problem_id: row.knowledge for row in query.all()}
+
+            if not knowledge_by_id:
+                return False, "没有可分析的题目", None
+
+            # 一次分组查询统计完成情况（结果带缓存）
+            summaries = statistics_service.get_problem_summaries(db, problem_ids=list(knowledge_by_id.keys()))
+            summary_by_id = {summary["problem_id"]: summary for summary in summaries}
+
+            # 构建AI分析的数据，按传入顺序（按模式分析时按题目ID）排列
+            ordered_ids = knowledge_by_id.keys() if schema_id is not None else dict.fromkeys(problem_ids)
             analysis_data = []
-            for item in problem_data:
-                problem_id = item.get('problem_id')
-                completed_student_count = item.get('completed_student_count')
-                total_submission_count = item.get('total_submission_count')
-                
-                # 根据problem_id获取题目的knowledge字段
-                problem = db.query(Problem).filter(Problem.problem_id == problem_id).first()
-                if problem:
-                    analysis_data.append({
-                        "problem_knowledge": problem.knowledge or "未指定知识点",
-                        "completed_student_count": completed_student_count,
-                        "total_submission_count": total_submission_count
-                    })
+            for problem_id in ordered_ids:
+                if problem_id not in knowledge_by_id:
+                    continue
+                summary = summary_by_id.get(problem_id, {})
+                analysis_data.append({
+                    "problem_knowledge": knowledge_by_id[problem_id] or "未指定知识点",
+                    "completed_student_count": summary.get("completed_student_count", 0),
+                    "total_submission_count": summary.get("total_submission_count", 0)
+                })
 
             # 构建AI分析的prompt
             prompt = self._build_knowledge_analysis_prompt(analysis_data)
-            
+
             # 调用AI服务进行分析
-            ai_result = ai_service._call_ai_api(prompt)
-            
+            ai_result = await ai_service._call_ai_api_async(prompt)
+
             response = ProblemKnowledgeAnalysisResponse(
                 code=200,
                 msg="分析成功",
                 data={"ai_result": ai_result}
             )
-            
+
             return True, "分析成功", response
-            
+
         except Exception as e:
             print(f"AI分析知识点掌握度失败: {e}")
             return False, f"分析失败: {str(e)}", None
-    
+
     def _build_knowledge_analysis_prompt(self, analysis_data: List[Dict]) -> str:
         """构建知识点分析的AI prompt"""
         prompt = "你是一个数据分析师和大学数据库课程的助教，根据每道题目知识点和学生完成情况分析学生的作答情况以及后续的教学建议。\n\n"
@@ -1252,17 +1241,9 @@ class TeacherService:
         
         return prompt
 
-    def get_database_link_info(self, teacher_id: str, db: Session) -> DatabaseLinkInfoResponse:
+    def get_database_link_info(self, teacher: Identity, db: Session) -> DatabaseLinkInfoResponse:
         """获取数据库连接信息"""
         try:
-            # 验证教师是否存在
-            teacher = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
-            if not teacher:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="教师不存在"
-                )
-
             # 获取数据库连接信息
             database_links = [
                 DatabaseLinkInfo(
@@ -2,11 +2,13 @@ from typing import Optional, Tuple, List
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from fastapi import HTTPException, status
-from models import Teacher, Student, CourseSelection, Course, Semester, AnswerRecord
+from models import Teacher, Student, CourseSelection, Course, Semester, AnswerRecord, StudentProblemStats
 from schemas.admin import (
     TeacherInfo, TeacherListResponse, StudentInfo
 )
 from schemas.teacher import StudentDetailInfo, StudentUpdateResponse
+from services.jwt_service import jwt_service
+from services.identity_service import identity_service
 
 class UserManagementService:
     """用户管理服务类"""
@@ -92,10 +94,11 @@ class UserManagementService:
             if class_ is not None:
                 student.class_ = class_
             if student_password is not None:
-                student.student_password = student_password
+                student.student_password = jwt_service.hash_password(student_password)
 
             db.commit()
             db.refresh(student)
+            identity_service.invalidate("student", student_id)
 
             response = StudentUpdateResponse(
                 code=200,
@@ -128,6 +131,11 @@ class UserManagementService:
                 for answer_record in answer_records:
                     db.delete(answer_record)
 
+            # 删除关联的答题统计汇总
+            db.query(StudentProblemStats).filter(
+                StudentProblemStats.student_id == student.id
+            ).delete(synchronize_session=False)
+
             # 删除关联的选课记录
             course_selections = db.query(CourseSelection).filter(CourseSelection.student_id == student.id).all()
             course_selection_count = len(course_selections)
@@ -138,6 +146,7 @@ class UserManagementService:
             # 删除学生
             db.delete(student)
             db.commit()
+            identity_service.invalidate("student", student_id)
 
             # 构建删除成功消息
             message_parts = ["学生删除成功"]
@@ -170,7 +179,7 @@ class UserManagementService:
             new_teacher = Teacher(
                 teacher_id=teacher_id,
                 teacher_name=teacher_name,
-                teacher_password=teacher_password
+                teacher_password=jwt_service.hash_password(teacher_password)
             )
             
             db.add(new_teacher)
@@ -268,10 +277,11 @@ class UserManagementService:
             if teacher_name is not None:
                 teacher.teacher_name = teacher_name
             if teacher_password is not None:
-                teacher.teacher_password = teacher_password
+                teacher.teacher_password = jwt_service.hash_password(teacher_password)
             
             db.commit()
             db.refresh(teacher)
+            identity_service.invalidate("teacher", teacher_id)
             
             teacher_info = TeacherInfo(
                 id=teacher.id,
@@ -302,6 +312,7 @@ class UserManagementService:
             
             db.delete(teacher)
             db.commit()
+            identity_service.invalidate("teacher", teacher_id)
             
             return True, "教师删除成功"
             
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试以 app 目录为根导入 services、utils 等模块
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,137 @@
+"""DML 题目判题测试"""
+import itertools
+import re
+
+import pytest
+
+from services.database_engine_service import DatabaseEngineService
+from utils.sql_script import check_dml_script
+
+BASE_ROWS = [{"id": 1, "name": "Alice"}, {"id": 2, "name": "Bob"}, {"id": 3, "name": "Carol"}]
+
+_INSERT = re.compile(r"INSERT INTO employee \(name\) VALUES \('(\w+)'\)", re.IGNORECASE)
+_DELETE = re.compile(r"DELETE FROM employee WHERE id = (\d+)", re.IGNORECASE)
+_UPDATE = re.compile(r"UPDATE employee SET name = '(\w+)' WHERE id = (\d+)", re.IGNORECASE)
+
+
+def make_service(monkeypatch):
+    """不连接数据库的判题服务：模拟回滚执行模式下的 employee 表（id 为自增列）"""
+    service = DatabaseEngineService.__new__(DatabaseEngineService)
+    # 回滚不会归还自增值，每次 INSERT 都分配新的 id
+    next_id = itertools.count(len(BASE_ROWS) + 1)
+
+    def fake_execute_in_rollback(sql_schema, dml_sql, check_sql, engine_type="mysql", template_schema=None):
+        statements, error_msg = check_dml_script(dml_sql, backslash_escapes=engine_type == "mysql")
+        if error_msg:
+            return False, error_msg, None
+        rows = [dict(row) for row in BASE_ROWS]
+        watermarks = {"id": max(row["id"] for row in rows)}
+        for statement in statements:
+            if _INSERT.match(statement):
+                rows.append({"id": next(next_id), "name": _INSERT.match(statement).group(1)})
+            elif _DELETE.match(statement):
+                rows = [row for row in rows if row["id"] != int(_DELETE.match(statement).group(1))]
+            elif _UPDATE.match(statement):
+                name, row_id = _UPDATE.match(statement).groups()
+                for row in rows:
+                    if row["id"] == int(row_id):
+                        row["name"] = name
+            else:
+                return False, f"syntax error near {statement[:10]}", None
+        return True, "执行成功", service._mask_generated(rows, watermarks)
+
+    monkeypatch.setattr(service, "execute_in_rollback", fake_execute_in_rollback)
+    return service
+
+
+def judge(service, answer_sql, reference_sql="INSERT INTO employee (name) VALUES ('Dora')"):
+    return service.judge_dml_in_rollback(
+        sql_schema="hr",
+        engine_type="mysql",
+        answer_sql=answer_sql,
+        reference_sql=reference_sql,
+        check_sql="SELECT id, name FROM employee"
+    )
+
+
+def test_insert_problem_ignores_generated_keys(monkeypatch):
+    service = make_service(monkeypatch)
+    assert judge(service, "insert into employee (name) values ('Dora');") == (0, "结果正确")
+
+
+def test_insert_problem_wrong_value(monkeypatch):
+    service = make_service(monkeypatch)
+    assert judge(service, "INSERT INTO employee (name) VALUES ('Dave')") == (2, "结果错误")
+
+
+def test_delete_problem_compares_existing_keys(monkeypatch):
+    service = make_service(monkeypatch)
+    reference_sql = "DELETE FROM employee WHERE id = 3"
+    assert judge(service, "DELETE FROM employee WHERE id = 3", reference_sql) == (0, "结果正确")
+    assert judge(service, "DELETE FROM employee WHERE id = 1", reference_sql) == (2, "结果错误")
+
+
+def test_update_problem_compares_existing_keys(monkeypatch):
+    service = make_service(monkeypatch)
+    reference_sql = "UPDATE employee SET name = 'Eve' WHERE id = 2"
+    assert judge(service, "UPDATE employee SET name = 'Eve' WHERE id = 2", reference_sql) == (0, "结果正确")
+    assert judge(service, "UPDATE employee SET name = 'Eve' WHERE id = 1", reference_sql) == (2, "结果错误")
+
+
+class FakeCursor:
+    """记录执行的查询，MAX 查询返回固定值"""
+
+    def __init__(self, maximum):
+        self.maximum = maximum
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+    def fetchone(self):
+        return (self.maximum,)
+
+
+def test_watermarks_only_cover_tables_in_check_sql(monkeypatch):
+    service = DatabaseEngineService.__new__(DatabaseEngineService)
+    monkeypatch.setattr(service, "generated_columns", lambda sql_schema, engine_type: {
+        "employee": frozenset({"id"}), "department": frozenset({"dept_no"})
+    })
+    cur = FakeCursor(5)
+
+    watermarks = service._generated_watermarks(cur, "hr", "hr", "SELECT e.id, e.name FROM employee e", "mysql")
+
+    assert watermarks == {"id": 5}
+    assert cur.executed == ["SELECT COALESCE(MAX(`id`), 0) FROM hr.`employee`"]
+    assert service._mask_generated([{"ID": 6, "dept_no": 9}, {"ID": 5, "dept_no": 9}], watermarks) == [
+        {"ID": "<generated>", "dept_no": 9}, {"ID": 5, "dept_no": 9}
+    ]
+
+
+@pytest.mark.parametrize("answer_sql", [
+    "INSERT INTO employee (name) VALUES ('Carol'); END",
+    "INSERT INTO employee (name) VALUES ('Carol'); ANALYZE TABLE employee",
+    "INSERT INTO employee (name) VALUES ('Carol'); COMMIT",
+])
+def test_insert_problem_rejects_transaction_control(monkeypatch, answer_sql):
+    service = make_service(monkeypatch)
+    result_type, _ = judge(service, answer_sql)
+    assert result_type == 1
+
+
+@pytest.mark.parametrize("answer_sql, backslash_escapes", [
+    ("USE hr_template; DELETE FROM employee", True),
+    ("DELETE FROM hr_template.employee", True),
+    ("DELETE FROM `hr_template`.`employee`", True),
+    ('DELETE FROM "HR_TEMPLATE"."employee"', False),
+])
+def test_dml_script_cannot_leave_its_schema(answer_sql, backslash_escapes):
+    _, error_msg = check_dml_script(answer_sql, backslash_escapes, forbidden_schemas={"hr_template"})
+    assert error_msg
+
+
+def test_dml_script_allows_alias_qualifiers():
+    _, error_msg = check_dml_script(
+        "UPDATE employee e SET e.name = 'hr_template.x' WHERE e.id = 1", True, forbidden_schemas={"hr_template"}
+    )
+    assert error_msg is None
@@ -0,0 +1,45 @@
+from services.ranking_service import RankEntry, RankingIndex
+
+
+def _entry(student_pk, class_, correct_count, method_count=0):
+    return RankEntry(
+        student_pk=student_pk,
+        student_id=f"S{student_pk}",
+        student_name=f"student{student_pk}",
+        class_=class_,
+        correct_count=correct_count,
+        method_count=method_count
+    )
+
+
+def _index():
+    entries = sorted(
+        [_entry(1, "A", 3), _entry(2, "A", 2), _entry(3, "B", 1), _entry(4, "B", 0)],
+        key=lambda entry: entry.sort_key
+    )
+    return RankingIndex(semester_id=1, entries=entries, course_members={10: {1, 3}, 20: {2, 4}})
+
+
+def test_update_entry_reorders_and_invalidates_only_affected_scopes():
+    index = _index()
+    course_20_before = index.scoped(20)
+    class_b_before = index.scoped(None, "B")
+    index.scoped(10)
+
+    index.update_entry(3, correct_count=5, method_count=1)
+
+    assert [entry.student_pk for entry in index.scoped()] == [3, 1, 2, 4]
+    assert [entry.student_pk for entry in index.scoped(10)] == [3, 1]
+    assert index.scoped(20) is course_20_before
+    assert index.scoped(None, "B") is not class_b_before
+    assert [entry.student_pk for entry in index.scoped(None, "B")] == [3, 4]
+
+
+def test_update_entry_ignores_students_outside_the_semester():
+    index = _index()
+    entries = index.entries
+
+    index.update_entry(99, correct_count=10, method_count=0)
+    index.update_entry(1, correct_count=3, method_count=0)
+
+    assert index.entries is entries
@@ -0,0 +1,33 @@
+from utils.sql_script import InsertRun, plan_script
+
+
+def test_indexes_and_foreign_keys_are_deferred_after_seed_data():
+    steps, deferred = plan_script(
+        "CREATE TABLE dept (id INT, name VARCHAR(20));"
+        "CREATE TABLE emp (id INT, dept_id INT);"
+        "CREATE UNIQUE INDEX dept_id_idx ON dept (id);"
+        "ALTER TABLE emp ADD FOREIGN KEY (dept_id) REFERENCES dept (id);"
+        "INSERT INTO dept VALUES (1, 'a');"
+        "INSERT INTO emp VALUES (1, 1);"
+    )
+
+    assert [type(step) for step in steps] == [str, str, InsertRun, InsertRun]
+    assert deferred == [
+        "CREATE UNIQUE INDEX dept_id_idx ON dept (id)",
+        "ALTER TABLE emp ADD FOREIGN KEY (dept_id) REFERENCES dept (id)",
+    ]
+
+
+def test_index_referenced_by_a_later_table_is_not_deferred():
+    steps, deferred = plan_script(
+        "CREATE TABLE dept (id INT, name VARCHAR(20));"
+        "CREATE UNIQUE INDEX dept_id_idx ON `dept` (id);"
+        "CREATE INDEX dept_name_idx ON other.unrelated (name);"
+        "CREATE TABLE emp (id INT, dept_id INT REFERENCES dept (id));"
+        "INSERT INTO dept VALUES (1, 'a');",
+        backslash_escapes=True
+    )
+
+    assert steps[1] == "CREATE UNIQUE INDEX dept_id_idx ON `dept` (id)"
+    assert steps[2] == "CREATE TABLE emp (id INT, dept_id INT REFERENCES dept (id))"
+    assert deferred == ["CREATE INDEX dept_name_idx ON other.unrelated (name)"]
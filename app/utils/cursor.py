@@ -0,0 +1,24 @@
+"""
+分页游标编解码
+"""
+import base64
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """将游标字段编码为URL安全的不透明字符串"""
+    raw = json.dumps(values, separators=(",", ":"), ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """解码游标字符串，格式非法时抛出ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+    if not isinstance(values, dict):
+        raise ValueError(f"无效的分页游标: {cursor}")
+    return values
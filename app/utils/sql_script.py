@@ -0,0 +1,401 @@
+"""
+SQL 脚本解析
+
+把建表脚本切分为语句（识别引号、注释和 $$ 块中的分号），并把连续写入同一张表的
+INSERT ... VALUES 语句合并为一组，供批量导入使用。
+
+只合并值全部为字面量（字符串、数字、NULL、布尔）的 INSERT；含表达式、函数调用、
+类型转换等写法的语句原样执行。
+"""
+import io
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple, Union
+
+_INSERT_PATTERN = re.compile(
+    r"INSERT\s+INTO\s+((?:[`\"]?[\w$]+[`\"]?\s*\.\s*)?[`\"]?[\w$]+[`\"]?)\s*(\([^()]*\))?\s*VALUES\s*",
+    re.IGNORECASE
+)
+
+_NUMBER_PATTERN = re.compile(r"[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?")
+
+_KEYWORD_PATTERN = re.compile(r"(NULL|TRUE|FALSE)\b", re.IGNORECASE)
+
+_DOLLAR_TAG_PATTERN = re.compile(r"\$(?:[A-Za-z_]\w*)?\$")
+
+# 可以推迟到数据导入之后执行的语句：建索引、追加外键约束
+_DEFERRABLE_PATTERN = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\b|ALTER\s+TABLE\b[^;]*\bFOREIGN\s+KEY\b",
+    re.IGNORECASE
+)
+
+# 建索引语句所在的表，以及外键引用的表
+_INDEX_TABLE_PATTERN = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\b.*?\bON\s+(?:ONLY\s+)?((?:[`\"]?[\w$]+[`\"]?\s*\.\s*)?[`\"]?[\w$]+[`\"]?)",
+    re.IGNORECASE | re.DOTALL
+)
+_REFERENCES_PATTERN = re.compile(
+    r"\bREFERENCES\s+((?:[`\"]?[\w$]+[`\"]?\s*\.\s*)?[`\"]?[\w$]+[`\"]?)",
+    re.IGNORECASE
+)
+
+# DML 题目判题时允许执行的语句类型，其余语句（DDL、事务控制、会话设置、
+# ANALYZE/OPTIMIZE/FLUSH 等可能隐式提交事务的语句）一律拒绝
+DML_STATEMENT_TYPES = ("INSERT", "UPDATE", "DELETE", "REPLACE", "SELECT", "WITH")
+
+_LEADING_WORD_PATTERN = re.compile(r"[\s(]*([A-Za-z_]+)")
+
+# 写服务器文件的 SELECT ... INTO OUTFILE/DUMPFILE（MySQL）
+_INTO_FILE_PATTERN = re.compile(r"\bINTO\s+(?:OUTFILE|DUMPFILE)\b", re.IGNORECASE)
+
+# 标识符（可带反引号或双引号）及 a.b、a.b.c 形式的限定名
+_IDENTIFIER = r'(?:`[^`]+`|"[^"]+"|[A-Za-z_][\w$]*)'
+_QUALIFIED_NAME_PATTERN = re.compile(_IDENTIFIER + r"(?:\s*\.\s*" + _IDENTIFIER + r")+")
+
+# 查询的 FROM 子句（到 WHERE 等子句或右括号为止）、JOIN 的表以及单个（可带模式限定的）表名
+_FROM_CLAUSE_PATTERN = re.compile(
+    r"\bFROM\b(.*?)(?=\b(?:WHERE|GROUP|ORDER|HAVING|LIMIT|UNION|EXCEPT|INTERSECT|WINDOW|FOR)\b|\)|$)",
+    re.IGNORECASE | re.DOTALL
+)
+_JOIN_KEYWORD_PATTERN = re.compile(r"\b(?:JOIN|ON|USING|INNER|LEFT|RIGHT|FULL|CROSS|NATURAL|STRAIGHT_JOIN)\b", re.IGNORECASE)
+_TABLE_NAME_PATTERN = re.compile(r"\s*(" + _IDENTIFIER + r"(?:\s*\.\s*" + _IDENTIFIER + r")?)")
+_JOIN_TABLE_PATTERN = re.compile(r"\bJOIN\s+(" + _IDENTIFIER + r"(?:\s*\.\s*" + _IDENTIFIER + r")?)", re.IGNORECASE)
+
+# MySQL 字符串中的反斜杠转义
+_MYSQL_ESCAPES = {"0": "\0", "b": "\b", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a"}
+
+
+@dataclass
+class InsertRun:
+    """连续写入同一张表（相同列列表）的 INSERT 语句合并后的数据"""
+    table: str
+    column_sql: str  # 原始列名部分，如 "(id, name)"；未写列名时为空字符串
+    rows: List[List[Optional[str]]] = field(default_factory=list)  # 解析后的值，None 表示 NULL
+    raw_rows: List[str] = field(default_factory=list)  # 每行原始的 "(...)" 文本，用于拼接多行 INSERT
+
+
+def _skip_quoted(sql: str, start: int, backslash_escapes: bool) -> int:
+    """跳过从 start 开始的引号内容，返回结束引号之后的位置"""
+    quote = sql[start]
+    i = start + 1
+    while i < len(sql):
+        ch = sql[i]
+        if backslash_escapes and ch == "\\":
+            i += 2
+            continue
+        if ch == quote:
+            if i + 1 < len(sql) and sql[i + 1] == quote:
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    return len(sql)
+
+
+def _strip_leading_comments(statement: str) -> str:
+    """去掉语句开头的注释和空白"""
+    while True:
+        statement = statement.lstrip()
+        if statement.startswith("--") or statement.startswith("#"):
+            newline = statement.find("\n")
+            statement = "" if newline < 0 else statement[newline + 1:]
+        elif statement.startswith("/*"):
+            end = statement.find("*/")
+            statement = "" if end < 0 else statement[end + 2:]
+        else:
+            return statement
+
+
+def split_statements(sql: str, backslash_escapes: bool = False) -> List[str]:
+    """
+    按分号切分 SQL 脚本
+
+    Args:
+        sql: SQL 脚本
+        backslash_escapes: 字符串中的反斜杠是否为转义符（MySQL）
+
+    Returns:
+        List[str]: 去掉开头注释后的非空语句
+    """
+    statements = []
+    start = 0
+    i = 0
+    while i < len(sql):
+        ch = sql[i]
+        if ch in "'\"`":
+            i = _skip_quoted(sql, i, backslash_escapes)
+            continue
+        if sql.startswith("--", i) or (backslash_escapes and ch == "#"):
+            newline = sql.find("\n", i)
+            i = len(sql) if newline < 0 else newline + 1
+            continue
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = len(sql) if end < 0 else end + 2
+            continue
+        if ch == "$" and not backslash_escapes:
+            tag = _DOLLAR_TAG_PATTERN.match(sql, i)
+            if tag:
+                end = sql.find(tag.group(0), tag.end())
+                i = len(sql) if end < 0 else end + len(tag.group(0))
+                continue
+        if ch == ";":
+            statement = _strip_leading_comments(sql[start:i]).strip()
+            if statement:
+                statements.append(statement)
+            start = i + 1
+        i += 1
+
+    statement = _strip_leading_comments(sql[start:]).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def _parse_string(text: str, start: int, backslash_escapes: bool) -> Tuple[str, int]:
+    """解析从 start 开始的字符串字面量，返回 (值, 结束位置)"""
+    quote = text[start]
+    chars = []
+    i = start + 1
+    while i < len(text):
+        ch = text[i]
+        if backslash_escapes and ch == "\\" and i + 1 < len(text):
+            escaped = text[i + 1]
+            chars.append(_MYSQL_ESCAPES.get(escaped, escaped if escaped not in "%_" else "\\" + escaped))
+            i += 2
+            continue
+        if ch == quote:
+            if i + 1 < len(text) and text[i + 1] == quote:
+                chars.append(quote)
+                i += 2
+                continue
+            return "".join(chars), i + 1
+        chars.append(ch)
+        i += 1
+    raise ValueError("字符串未结束")
+
+
+def _parse_values(text: str, backslash_escapes: bool) -> Optional[Tuple[List[List[Optional[str]]], List[str]]]:
+    """解析 VALUES 之后的 (...), (...) 列表，出现非字面量时返回 None"""
+    quotes = "'\"" if backslash_escapes else "'"
+    rows, raw_rows = [], []
+    i = 0
+    length = len(text)
+    while True:
+        while i < length and text[i].isspace():
+            i += 1
+        if i >= length or text[i] != "(":
+            return None
+        row_start = i
+        i += 1
+        row = []
+        while True:
+            while i < length and text[i].isspace():
+                i += 1
+            if i >= length:
+                return None
+            if text[i] in quotes:
+                try:
+                    value, i = _parse_string(text, i, backslash_escapes)
+                except ValueError:
+                    return None
+                row.append(value)
+            else:
+                keyword = _KEYWORD_PATTERN.match(text, i)
+                number = _NUMBER_PATTERN.match(text, i)
+                if keyword:
+                    word = keyword.group(1).lower()
+                    row.append(None if word == "null" else word)
+                    i = keyword.end()
+                elif number:
+                    row.append(number.group(0))
+                    i = number.end()
+                else:
+                    return None
+            while i < length and text[i].isspace():
+                i += 1
+            if i < length and text[i] == ",":
+                i += 1
+                continue
+            if i < length and text[i] == ")":
+                i += 1
+                break
+            return None
+        rows.append(row)
+        raw_rows.append(text[row_start:i])
+
+        while i < length and text[i].isspace():
+            i += 1
+        if i >= length:
+            return rows, raw_rows
+        if text[i] != ",":
+            return None
+        i += 1
+
+
+def parse_insert(statement: str, backslash_escapes: bool = False) -> Optional[InsertRun]:
+    """把单条 INSERT ... VALUES 语句解析为 InsertRun，不是纯字面量插入时返回 None"""
+    match = _INSERT_PATTERN.match(statement)
+    if not match:
+        return None
+    parsed = _parse_values(statement[match.end():], backslash_escapes)
+    if parsed is None:
+        return None
+    rows, raw_rows = parsed
+    return InsertRun(
+        table=match.group(1),
+        column_sql=" ".join((match.group(2) or "").split()),
+        rows=rows,
+        raw_rows=raw_rows
+    )
+
+
+def plan_script(sql: str, backslash_escapes: bool = False) -> Tuple[List[Union[str, InsertRun]], List[str]]:
+    """
+    规划脚本的执行顺序
+
+    连续写入同一张表的字面量 INSERT 合并为一个 InsertRun；脚本中有数据导入时，
+    建索引和追加外键的语句推迟到所有数据导入之后执行。之后仍按原位置执行的语句
+    （如 CREATE TABLE ... REFERENCES）引用了某张表时，该表上的索引不推迟，
+    外键需要被引用列上已有唯一索引或索引。
+
+    Returns:
+        Tuple[List[Union[str, InsertRun]], List[str]]: (按顺序执行的语句或批量插入, 推迟执行的语句)
+    """
+    steps: List[Union[str, InsertRun]] = []
+    deferrable: List[Tuple[int, str]] = []
+
+    for statement in split_statements(sql, backslash_escapes):
+        run = parse_insert(statement, backslash_escapes)
+        if run is None:
+            if _DEFERRABLE_PATTERN.match(statement):
+                deferrable.append((len(steps), statement))
+            steps.append(statement)
+            continue
+
+        previous = steps[-1] if steps else None
+        if (isinstance(previous, InsertRun) and previous.table == run.table
+                and previous.column_sql == run.column_sql):
+            previous.rows.extend(run.rows)
+            previous.raw_rows.extend(run.raw_rows)
+        else:
+            steps.append(run)
+
+    if not any(isinstance(step, InsertRun) for step in steps):
+        return steps, []
+
+    deferred_positions = {position for position, _ in deferrable}
+    referenced_later = set()
+    for position in range(len(steps) - 1, -1, -1):
+        step = steps[position]
+        if isinstance(step, InsertRun):
+            continue
+        if position in deferred_positions:
+            index = _INDEX_TABLE_PATTERN.match(step)
+            if index is None or _table_key(index.group(1)) not in referenced_later:
+                continue
+            deferred_positions.discard(position)
+        referenced_later.update(_table_key(name) for name in _REFERENCES_PATTERN.findall(step))
+
+    steps_in_order = [step for position, step in enumerate(steps) if position not in deferred_positions]
+    return steps_in_order, [statement for position, statement in deferrable if position in deferred_positions]
+
+
+def _table_key(name: str) -> str:
+    """比较表名用的键：去掉模式限定和引号，转为小写"""
+    return re.split(r"\s*\.\s*", name)[-1].strip('`"').lower()
+
+
+def copy_csv_buffer(rows: List[List[Optional[str]]]) -> io.StringIO:
+    """把解析后的值写成 COPY ... CSV 格式：NULL 为不带引号的空值，其余值都加引号"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join("" if value is None else '"' + value.replace('"', '""') + '"' for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def statement_type(statement: str) -> str:
+    """语句的第一个关键字（大写），语句以括号开头时跳过括号"""
+    match = _LEADING_WORD_PATTERN.match(statement)
+    return match.group(1).upper() if match else ""
+
+
+def _mask_literals(statement: str, backslash_escapes: bool) -> str:
+    """把字符串字面量和注释替换为空格（标识符引号保留），用于在语句中查找名称"""
+    string_quotes = "'\"" if backslash_escapes else "'"
+    chars = []
+    i = 0
+    while i < len(statement):
+        ch = statement[i]
+        if ch in string_quotes:
+            end = _skip_quoted(statement, i, backslash_escapes)
+        elif statement.startswith("--", i) or (backslash_escapes and ch == "#"):
+            newline = statement.find("\n", i)
+            end = len(statement) if newline < 0 else newline
+        elif statement.startswith("/*", i):
+            close = statement.find("*/", i + 2)
+            end = len(statement) if close < 0 else close + 2
+        else:
+            chars.append(ch)
+            i += 1
+            continue
+        chars.append(" " * (end - i))
+        i = end
+    return "".join(chars)
+
+
+def qualifiers(statement: str, backslash_escapes: bool = False) -> List[str]:
+    """语句中限定名的前缀部分（模式名、表名或别名，去掉引号），如 hr.emp.id 返回 hr、emp"""
+    result = []
+    for match in _QUALIFIED_NAME_PATTERN.finditer(_mask_literals(statement, backslash_escapes)):
+        parts = re.findall(_IDENTIFIER, match.group(0))
+        result.extend(part.strip('`"') for part in parts[:-1])
+    return result
+
+
+def check_dml_script(sql: str, backslash_escapes: bool = False,
+                     forbidden_schemas: Iterable[str] = ()) -> Tuple[List[str], Optional[str]]:
+    """
+    切分并检查 DML 题目的答案脚本，只允许 DML_STATEMENT_TYPES 中的语句
+
+    Args:
+        sql: 答案脚本
+        backslash_escapes: 字符串中的反斜杠是否为转义符（MySQL）
+        forbidden_schemas: 不允许在限定名中引用的模式（执行所在模式以外的模式）
+
+    Returns:
+        Tuple[List[str], Optional[str]]: (切分后的语句, 错误信息；检查通过时为 None)
+    """
+    forbidden = {schema.lower() for schema in forbidden_schemas}
+    statements = split_statements(sql, backslash_escapes)
+    if not statements:
+        return [], "答案不能为空"
+    for statement in statements:
+        keyword = statement_type(statement)
+        if keyword not in DML_STATEMENT_TYPES:
+            return statements, f"DML题目只允许 {'、'.join(DML_STATEMENT_TYPES)} 语句，不支持: {keyword or statement[:20]}"
+        if _INTO_FILE_PATTERN.search(statement):
+            return statements, "不支持 SELECT ... INTO OUTFILE/DUMPFILE"
+        if backslash_escapes and "/*!" in statement:
+            # MySQL 会执行 /*! ... */ 中的内容，绕过上面的检查
+            return statements, "不支持 MySQL 可执行注释 /*! ... */"
+        for qualifier in qualifiers(statement, backslash_escapes):
+            if qualifier.lower() in forbidden:
+                return statements, f"不允许访问其他数据库模式: {qualifier}"
+    return statements, None
+
+
+def referenced_tables(sql: str, backslash_escapes: bool = False) -> List[str]:
+    """查询在 FROM 和 JOIN 中引用的表名（去掉模式限定和引号，小写，按出现顺序去重）；不识别子查询中的表"""
+    masked = _mask_literals(sql, backslash_escapes)
+    names = []
+    for clause in _FROM_CLAUSE_PATTERN.finditer(masked):
+        # 第一个 JOIN 之前的逗号分隔的表列表
+        for item in _JOIN_KEYWORD_PATTERN.split(clause.group(1))[0].split(","):
+            match = _TABLE_NAME_PATTERN.match(item)
+            if match:
+                names.append(match.group(1))
+    names.extend(_JOIN_TABLE_PATTERN.findall(masked))
+    return list(dict.fromkeys(_table_key(name) for name in names))
@@ -0,0 +1,87 @@
+"""
+进程内TTL缓存
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class TTLCache:
+    """线程安全的进程内缓存，条目在TTL到期后失效，超过容量时淘汰最久未使用的条目"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存值，不存在或已过期时返回default"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存值，ttl为空时使用默认TTL"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """获取缓存值，未命中时调用loader加载并写入缓存"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """删除指定条目"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def values(self) -> List[Any]:
+        """未过期的缓存值"""
+        now = time.monotonic()
+        with self._lock:
+            return [value for value, expires_at in self._data.values() if expires_at > now]
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中统计：条目数、容量、命中次数、未命中次数、命中率"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+_MISSING = object()